@@ -1,18 +1,23 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
+# Same local dataset store as the backend loaders (downloads once, then reads Parquet)
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from dataset_store import load_dataset
 
 print("Analisando dados do Brasil...")
 print("=" * 60)
 
 # Aeroportos
 print("\n1. AEROPORTOS BRASILEIROS:")
-airports_df = pd.read_csv('https://raw.githubusercontent.com/datasets/airport-codes/master/data/airport-codes.csv')
+airports_df = load_dataset('airports')
 br_airports = airports_df[airports_df['iso_country'] == 'BR'].copy()
 br_airports_iata = br_airports[br_airports['iata_code'].notna()].copy()
 print(f"   Total de aeroportos BR com código IATA: {len(br_airports_iata)}")
 
 # Rotas
 print("\n2. ROTAS:")
-routes_df = pd.read_csv('https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/13e519574832172b538fd5588673132cb826cd20/routes.csv')
+routes_df = load_dataset('routes')
 print(f"   Total de rotas no CSV: {len(routes_df)}")
 
 # Códigos brasileiros
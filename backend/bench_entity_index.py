@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Lookup latency of the in-memory entity index (entity_index.EntityIndex)
+behind /api/autocomplete and GraphRAG entity resolution.
+
+Times autocomplete for prefixes of every length (one letter up to whole
+names, plus misspellings) and question resolution, against a per-lookup
+target. Uses synthetic airports and airlines the size of the full dataset
+by default, or the database contents with --neo4j.
+
+Usage:
+  python bench_entity_index.py
+  python bench_entity_index.py --neo4j
+  python bench_entity_index.py --airports 20000 --target-p95-ms 0.5
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+import numpy as np
+
+import entity_index
+from countries import COUNTRIES
+
+SYLLABLES = ['ba', 'ra', 'sa', 'o', 'pa', 'u', 'lo', 'ri', 'ma', 'na', 'go', 'te', 'ca', 'le', 'ne', 'vi',
+             'ja', 'po', 'do', 'ta', 'mi', 'ro', 'zu', 'ki', 'fa', 'lu', 'be', 'si', 'gua', 'hos']
+
+
+def synthetic_entities(airport_count, airline_count, seed=5):
+    rng = random.Random(seed)
+
+    def word():
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+    countries = [code for code, _, _ in COUNTRIES]
+    cities = [(f"{word()}" if rng.random() < 0.7 else f"{word()} {word()}", rng.choice(countries))
+              for _ in range(airport_count // 2)]
+    airports = []
+    for i in range(airport_count):
+        city, country = rng.choice(cities)
+        kind = rng.choice(['International Airport', 'Airport', 'Regional Airport', 'Aeroporto'])
+        airports.append({'code': f"{chr(65 + i // 676 % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}",
+                         'name': f"{city} {word()} {kind}", 'city': city, 'country': country,
+                         'weight': int(1000 / (i + 1) ** 0.7)})
+    airlines = [{'code': f"{chr(65 + i // 26 % 26)}{chr(48 + i % 10) if i % 3 else chr(65 + i % 26)}{i // 676 or ''}",
+                 'name': f"{word()} {rng.choice(['Airlines', 'Air', 'Airways', 'Linhas Aéreas'])}",
+                 'country': rng.choice(COUNTRIES)[1], 'weight': rng.randint(0, 300)}
+                for i in range(airline_count)]
+    return airports, airlines
+
+
+async def load_from_neo4j():
+    from database import run_neo4j_query, close_driver
+    airports = await run_neo4j_query(entity_index.AIRPORTS_QUERY, readonly=True)
+    airlines = await run_neo4j_query(entity_index.AIRLINES_QUERY, readonly=True)
+    await close_driver()
+    return airports, airlines
+
+
+def misspell(rng, text):
+    position = rng.randrange(1, len(text))
+    return text[:position] + rng.choice('aeiou') + text[position + 1:]
+
+
+def time_lookups(fn, inputs):
+    timings = []
+    for value in inputs:
+        started = time.perf_counter()
+        fn(value)
+        timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95)), float(timings.max())
+
+
+async def run(args):
+    if args.neo4j:
+        airports, airlines = await load_from_neo4j()
+    else:
+        airports, airlines = synthetic_entities(args.airports, args.airlines)
+    index = entity_index.EntityIndex(airports, airlines)
+    summary = index.summary()
+
+    print("\n" + "=" * 60)
+    print(f"🔎 Entity index: {summary['entities']} "
+          f"({summary['prefix_keys']} prefix keys, built in {index.seconds * 1000:.0f} ms)")
+    print("=" * 60)
+    print(f"   {'lookup':<28}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}  target")
+
+    rng = random.Random(args.seed)
+    names = [entity_index.fold(entity['label']) for entity in index.entities if len(entity['label']) >= 8]
+    samples = [rng.choice(names) for _ in range(args.lookups)]
+    cases = [(f'prefix, {length} char{"s" if length > 1 else ""}', [name[:length] for name in samples])
+             for length in (1, 2, 3, 5)]
+    cases += [('whole name', samples), ('misspelled prefix', [misspell(rng, name[:6]) for name in samples])]
+
+    failed = False
+    for label, inputs in cases:
+        p50, p95, worst = time_lookups(lambda text: index.complete(text, 10), inputs)
+        ok = p95 <= args.target_p95_ms
+        failed |= not ok
+        print(f"   {label:<28}{p50:>9.3f}{p95:>9.3f}{worst:>9.3f}  {'✅' if ok else '❌'} p95 <= {args.target_p95_ms:g} ms")
+
+    codes = [entity['code'] for entity in index.entities if entity['type'] == 'airport']
+    questions = [rng.choice([f"rotas de {rng.choice(codes)} para {rng.choice(codes)}",
+                             f"aeroportos em {rng.choice(names).title()}",
+                             f"quantas rotas saem de {rng.choice(names).title()} no Brasil"])
+                 for _ in range(args.lookups)]
+    p50, p95, worst = time_lookups(index.resolve, questions)
+    print(f"   {'resolve question':<28}{p50:>9.3f}{p95:>9.3f}{worst:>9.3f}")
+    print()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure entity index lookup latency")
+    parser.add_argument('--airports', type=int, default=10000)
+    parser.add_argument('--airlines', type=int, default=6000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--target-p95-ms', type=float, default=1.0)
+    parser.add_argument('--neo4j', action='store_true', help="index the database contents")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
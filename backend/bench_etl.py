@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+ETL benchmark for the BR seed path: the previous row-by-row transform
+(iterrows over airports and routes, one airlines_df scan per airline code)
+against the vectorized etl.build_dataset.
+
+Sources come from the local dataset store (downloaded on first use), or from
+a synthetic dataset of the same shape with --synthetic:
+
+  python bench_etl.py
+  python bench_etl.py --region AR -r 5
+  python bench_etl.py --synthetic --airlines 6000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import pandas as pd
+
+from etl import build_dataset
+
+
+def legacy_region_transform(airports_df, routes_df, airlines_df, region='BR'):
+    """The transform seed_brazil_data used before etl.py, minus the Neo4j writes"""
+    region_airports_all = airports_df[airports_df['iso_country'] == region].copy()
+    region_codes_all = set(region_airports_all['iata_code'].dropna().str.strip().str.upper().values)
+
+    region_routes = routes_df[
+        (routes_df['source_airport'].isin(region_codes_all)) &
+        (routes_df['destination_apirport'].isin(region_codes_all))
+    ].copy()
+    airports_with_routes = set(region_routes['source_airport'].unique()) | set(region_routes['destination_apirport'].unique())
+    region_airports = region_airports_all[region_airports_all['iata_code'].isin(airports_with_routes)].copy()
+
+    airports_batch = []
+    for _, row in region_airports.iterrows():
+        iata = row.get('iata_code')
+        if pd.notna(iata) and iata:
+            lat, lon = 0.0, 0.0
+            if pd.notna(row.get('coordinates')):
+                try:
+                    coords = row['coordinates'].split(',')
+                    lon = float(coords[0])
+                    lat = float(coords[1])
+                except:
+                    pass
+            airports_batch.append({
+                'code': str(iata).strip().upper(), 'name': row.get('name', ''), 'city': row.get('municipality', ''),
+                'country': region, 'latitude': lat, 'longitude': lon
+            })
+
+    routes_batch = []
+    for _, route in region_routes.iterrows():
+        airline = route.get('airline', 'Unknown')
+        if airline and str(airline).lower() not in ['', 'null', 'none']:
+            routes_batch.append({
+                'from': route['source_airport'], 'to': route['destination_apirport'],
+                'airline': str(airline), 'distance': float(route.get('distance', 0))
+            })
+
+    unique_airlines = region_routes['airline'].dropna().unique()
+    unique_airlines = [a for a in unique_airlines if str(a).lower() not in ['unknown', '', 'null', 'none']]
+    airlines_batch = []
+    for airline_code in unique_airlines:
+        airline_code_upper = str(airline_code).strip().upper()
+        airline_row = None
+        if 'IATA' in airlines_df.columns:
+            airline_row = airlines_df[airlines_df['IATA'].str.upper() == airline_code_upper]
+        if (airline_row is None or airline_row.empty) and 'ICAO' in airlines_df.columns:
+            airline_row = airlines_df[airlines_df['ICAO'].str.upper() == airline_code_upper]
+        if (airline_row is None or airline_row.empty) and 'Code' in airlines_df.columns:
+            airline_row = airlines_df[airlines_df['Code'].str.upper() == airline_code_upper]
+        if airline_row is not None and not airline_row.empty:
+            row = airline_row.iloc[0]
+            name = row.get('Name') or row.get('Airline') or airline_code_upper
+            country = row.get('Country', 'Unknown')
+        else:
+            name, country = airline_code_upper, 'Unknown'
+        airlines_batch.append({'code': airline_code_upper, 'name': name, 'country': country})
+
+    return {'airports': airports_batch, 'routes': routes_batch, 'airlines': airlines_batch}
+
+
+def synthetic_sources(airport_count, route_count, airline_count, seed=11):
+    """Frames shaped like the real airports, routes and airline CSVs"""
+    rng = random.Random(seed)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    codes = [''.join(rng.choice(letters) for _ in range(3)) for _ in range(airport_count)]
+    countries = ['BR'] * (airport_count // 10) + ['US', 'AR', 'FR', 'CN'] * airport_count
+    airports = pd.DataFrame({
+        'iata_code': codes,
+        'name': [f"Airport {code}" for code in codes],
+        'municipality': ['City'] * airport_count,
+        'iso_country': countries[:airport_count],
+        'coordinates': [f"{rng.uniform(-180, 180):.4f}, {rng.uniform(-60, 70):.4f}" for _ in codes],
+    }, dtype=object)
+    airline_codes = [''.join(rng.choice(letters) for _ in range(2)) + str(i) for i in range(airline_count)]
+    # Route endpoints favour the first (BR) airports so the region has traffic
+    weights = [20 if i < airport_count // 10 else 1 for i in range(airport_count)]
+    sources = rng.choices(codes, weights=weights, k=route_count)
+    targets = rng.choices(codes, weights=weights, k=route_count)
+    routes = pd.DataFrame({
+        'airline': rng.choices(airline_codes, k=route_count),
+        'source_airport': sources,
+        'destination_apirport': targets,
+        'distance': [f"{rng.uniform(100, 12000):.1f}" for _ in range(route_count)],
+    }, dtype=object)
+    airlines = pd.DataFrame({
+        'IATA': [code if i % 3 else None for i, code in enumerate(airline_codes)],
+        'ICAO': [code + 'X' for code in airline_codes],
+        'Name': [f"Airline {code}" for code in airline_codes],
+        'Country': ['Brazil'] * airline_count,
+    }, dtype=object)
+    return airports, routes, [airlines]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        timings.append(time.perf_counter() - started)
+    return output, min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and vectorized region ETL")
+    parser.add_argument('--region', default='BR')
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('--synthetic', action='store_true', help="use generated data instead of the dataset store")
+    parser.add_argument('--airports', type=int, default=60000)
+    parser.add_argument('--routes', type=int, default=67000)
+    parser.add_argument('--airlines', type=int, default=6000)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        airports_df, routes_df, airline_tables = synthetic_sources(args.airports, args.routes, args.airlines)
+    else:
+        from dataset_store import load_dataset
+        airports_df, routes_df = load_dataset('airports'), load_dataset('routes')
+        airline_tables = [load_dataset('airlines_base'), load_dataset('airlines_info')]
+
+    print("\n" + "=" * 60)
+    print(f"🧪 {args.region} ETL: {len(airports_df)} airports, {len(routes_df)} routes in the sources")
+    print("=" * 60)
+
+    # The legacy path only looked airlines up in the base table
+    legacy, legacy_ms = best_of(
+        lambda: legacy_region_transform(airports_df, routes_df, airline_tables[0], args.region), args.repeat)
+    vectorized, vectorized_ms = best_of(
+        lambda: build_dataset(airports_df, routes_df, airline_tables, args.region), args.repeat)
+
+    for label, output, ms in (('legacy', legacy, legacy_ms), ('vectorized', vectorized, vectorized_ms)):
+        print(f"   {label:<12}{ms:>10.1f} ms   {len(output['airports']):>6} airports"
+              f"{len(output['routes']):>7} routes{len(output['airlines']):>6} airlines")
+    print(f"   speedup      {legacy_ms / vectorized_ms:>9.1f}x")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Payload benchmark for /api/graph/data: JSON vs the AGB1 columnar encoding
+
+Each source is either a running API (http://.../api, its current graph is
+downloaded) or a JSON file saved from /api/graph/data. Seed the sample, BR
+and full datasets in turn and pass one source per dataset:
+
+  python bench_graph_payload.py sample=sample.json br=br.json full=http://localhost:8000/api
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+
+import requests
+
+from graph_export import encode_graph_binary
+
+
+def load_source(source):
+    if source.startswith('http://') or source.startswith('https://'):
+        response = requests.get(f"{source.rstrip('/')}/graph/data", timeout=300)
+        response.raise_for_status()
+        return response.json()
+    with open(source, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        timings.append(time.perf_counter() - started)
+    return output, min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and AGB1 graph payloads")
+    parser.add_argument('sources', nargs='+', help="label=source, where source is an API base URL or a saved JSON file")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 86)
+    print("📦 Graph payload benchmark: JSON vs AGB1")
+    print("=" * 86)
+    print(f"   {'dataset':<10}{'nodes':>8}{'links':>8}{'json KB':>10}{'agb1 KB':>10}"
+          f"{'json gz':>10}{'agb1 gz':>10}{'json ms':>10}{'agb1 ms':>10}")
+
+    for item in args.sources:
+        label, _, source = item.partition('=')
+        if not source:
+            label, source = item, item
+        payload = load_source(source)
+        nodes, links = payload['nodes'], payload['links']
+
+        json_bytes, json_ms = best_of(lambda: json.dumps(payload, separators=(',', ':')).encode('utf-8'), args.repeat)
+        binary_bytes, binary_ms = best_of(lambda: encode_graph_binary(nodes, links), args.repeat)
+
+        print(f"   {label:<10}{len(nodes):>8}{len(links):>8}"
+              f"{len(json_bytes) / 1024:>10.1f}{len(binary_bytes) / 1024:>10.1f}"
+              f"{len(gzip.compress(json_bytes)) / 1024:>10.1f}{len(gzip.compress(binary_bytes)) / 1024:>10.1f}"
+              f"{json_ms:>10.1f}{binary_ms:>10.1f}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Which GraphRAG questions the intent fast path (intents.py) answers, and
+how long /api/graphrag/query takes on each path.
+
+Three modes:
+  local - resolve and classify the questions in-process on a synthetic
+          entity index: the intent picked per question and the time spent
+          deciding (entity resolution + intent match).
+  http  - POST every question to a running server and report p50/p95 per
+          path ('template' or 'llm') from the responses.
+  stream - POST every question to /api/graphrag/stream and report, per
+          path, the time to the `query` event (Cypher and results) and to
+          the end of the streamed answer.
+
+Usage:
+  python bench_graphrag_paths.py local
+  python bench_graphrag_paths.py http --url http://localhost:8000/api -r 5
+  python bench_graphrag_paths.py stream -r 5
+"""
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# The /api/examples questions and the few-shot examples, plus common variations
+QUESTIONS = [
+    "Quais aeroportos estão no Brasil?",
+    "Mostre todas as rotas saindo de GRU",
+    "Quais companhias aéreas operam rotas internacionais?",
+    "Qual é a rota mais longa?",
+    "Quantos aeroportos existem em cada país?",
+    "Quais são os maiores hubs?",
+    "linhas aéreas no Brasil",
+    "quantas linhas aéreas",
+    "rotas da LATAM",
+    "rotas de GRU para JFK",
+    "quantas rotas saem de GRU?",
+    "as 5 rotas mais longas",
+    "top 10 hubs no Brasil",
+    "aeroportos com mais de 10 rotas",
+    "companhias com mais rotas",
+]
+
+
+def percentile_ms(latencies, q):
+    latencies = sorted(latencies)
+    return latencies[max(int(len(latencies) * q) - 1, 0)] * 1000
+
+
+def bench_local(repeat):
+    import entity_index
+    import intents
+    from bench_entity_index import synthetic_entities
+
+    airports, airlines = synthetic_entities(10000, 6000)
+    airports += [{'code': 'GRU', 'name': 'Aeroporto Internacional de São Paulo/Guarulhos', 'city': 'São Paulo',
+                  'country': 'BR', 'weight': 500},
+                 {'code': 'JFK', 'name': 'John F. Kennedy International Airport', 'city': 'New York',
+                  'country': 'US', 'weight': 500}]
+    airlines += [{'code': 'LA', 'name': 'LATAM Airlines', 'country': 'Brazil', 'weight': 300}]
+    index = entity_index.EntityIndex(airports, airlines)
+
+    hits = 0
+    for question in QUESTIONS:
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            match = intents.match_intent(question, index.resolve(question))
+            latencies.append(time.perf_counter() - started)
+        hits += match is not None
+        print(f"   {question:<52} {statistics.median(latencies) * 1000:6.3f} ms  "
+              f"{match.intent if match else '-> llm'}")
+    print(f"\n   {hits}/{len(QUESTIONS)} questions answered by a template")
+
+
+def bench_http(url, repeat):
+    import requests
+
+    session = requests.Session()
+    by_path = {}
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            response = session.post(f"{url}/graphrag/query", json={"query": question}, timeout=120)
+            elapsed = time.perf_counter() - started
+            path = response.json().get('path', 'llm') if response.ok else f"error {response.status_code}"
+            by_path.setdefault(path, []).append(elapsed)
+    for path, latencies in sorted(by_path.items()):
+        print(f"   {path:<12} {len(latencies):5d} requests   p50 {percentile_ms(latencies, 0.5):8.1f} ms   "
+              f"p95 {percentile_ms(latencies, 0.95):8.1f} ms")
+
+
+def bench_stream(url, repeat):
+    import json
+    import requests
+
+    session = requests.Session()
+    by_path = {}
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            response = session.post(f"{url}/graphrag/stream", json={"query": question}, stream=True, timeout=120)
+            if not response.ok:
+                by_path.setdefault(f"error {response.status_code}", ([], []))[1].append(time.perf_counter() - started)
+                continue
+            path, first_event, event = 'llm', None, None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: ') and event == 'query':
+                    first_event = time.perf_counter() - started
+                    path = json.loads(line[6:]).get('path', 'llm')
+            first, total = by_path.setdefault(path, ([], []))
+            if first_event is not None:
+                first.append(first_event)
+            total.append(time.perf_counter() - started)
+    for path, (first, total) in sorted(by_path.items()):
+        line = f"   {path:<12} {len(total):5d} requests"
+        if first:
+            line += f"   query event p50 {percentile_ms(first, 0.5):8.1f} ms  p95 {percentile_ms(first, 0.95):8.1f} ms"
+        print(line + f"   done p50 {percentile_ms(total, 0.5):8.1f} ms  p95 {percentile_ms(total, 0.95):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GraphRAG intent fast path coverage and latency")
+    parser.add_argument('mode', choices=['local', 'http', 'stream'])
+    parser.add_argument('--url', default=os.environ.get('BENCH_API_URL', 'http://localhost:8000/api'))
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"⚡ GraphRAG paths ({args.mode}): {len(QUESTIONS)} questions x {args.repeat}")
+    print("=" * 60)
+    if args.mode == 'local':
+        bench_local(args.repeat)
+    elif args.mode == 'http':
+        bench_http(args.url, args.repeat)
+    else:
+        bench_stream(args.url, args.repeat)
+    print()
+
+
+if __name__ == "__main__":
+    main()
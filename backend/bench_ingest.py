@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Ingest benchmark: rows/sec of the chunked route ingest against batch size,
+worker count and schema (constraints and indexes).
+
+Writes a synthetic dataset (random airports and routes, the size of the full
+dataset by default) with the same queries as seed_full_dataset, but under the
+BenchAirport label and BENCH_ROUTE type so the real graph is left untouched.
+Every combination starts from an empty route set; everything is removed at
+the end. By default the matrix runs twice, without and with the code
+constraint and ROUTE.airline index that schema.py creates, to show what they
+are worth on a fresh database.
+
+Usage:
+  python bench_ingest.py --batch-sizes 500 2000 5000 20000 --workers 1 2 4 8
+  python bench_ingest.py --routes 67000 --airports 7000 --single-transaction
+  python bench_ingest.py --schema without --batch-sizes 5000 --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import run_neo4j_query, close_driver
+from ingest import AIRPORTS_QUERY, ROUTES_QUERY, ingest_rows
+
+
+def bench_query(query):
+    return query.replace(':Airport', ':BenchAirport').replace(':ROUTE', ':BENCH_ROUTE')
+
+
+def synthetic_dataset(airport_count, route_count, seed=7):
+    rng = random.Random(seed)
+    codes = [f"{chr(65 + i // 676 % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}{i // 17576 or ''}"
+             for i in range(airport_count)]
+    airports = [
+        {'code': code, 'name': f"Airport {code}", 'city': '', 'country': 'XX',
+         'latitude': rng.uniform(-60, 70), 'longitude': rng.uniform(-180, 180)}
+        for code in codes
+    ]
+    airlines = [f"A{i:02d}" for i in range(500)]
+    routes = [
+        {'from': rng.choice(codes), 'to': rng.choice(codes), 'airline': rng.choice(airlines),
+         'distance': round(rng.uniform(100, 15000), 1)}
+        for _ in range(route_count)
+    ]
+    return airports, routes
+
+
+# Same schema as migrations 1 and 3 in schema.py, for the bench label and type
+BENCH_SCHEMA = [
+    "CREATE CONSTRAINT bench_airport_code_unique IF NOT EXISTS FOR (a:BenchAirport) REQUIRE a.code IS UNIQUE",
+    "CREATE INDEX bench_route_airline IF NOT EXISTS FOR ()-[r:BENCH_ROUTE]-() ON (r.airline)",
+]
+DROP_BENCH_SCHEMA = [
+    "DROP CONSTRAINT bench_airport_code_unique IF EXISTS",
+    "DROP INDEX bench_route_airline IF EXISTS",
+]
+
+
+async def run(args):
+    airports, routes = synthetic_dataset(args.airports, args.routes)
+    routes_query = bench_query(ROUTES_QUERY)
+    schema_modes = ['without', 'with'] if args.schema == 'both' else [args.schema]
+
+    async def clear_routes():
+        await run_neo4j_query("MATCH (:BenchAirport)-[r:BENCH_ROUTE]->() DELETE r")
+
+    def report(schema_mode, batch_label, stats):
+        print(f"   {schema_mode:<9}{batch_label:>9}{stats['workers']:>9}{stats['seconds']:>10.2f}"
+              f"{stats['rows_per_sec']:>10}{stats['retries']:>9}")
+
+    print("\n" + "=" * 60)
+    print(f"🚚 Route ingest: {len(routes)} routes over {len(airports)} airports")
+    print("=" * 60)
+    print(f"   {'schema':<9}{'batch':>9}{'workers':>9}{'seconds':>10}{'rows/s':>10}{'retries':>9}")
+
+    try:
+        for schema_mode in schema_modes:
+            await run_neo4j_query("MATCH (a:BenchAirport) DETACH DELETE a")
+            for statement in (BENCH_SCHEMA if schema_mode == 'with' else DROP_BENCH_SCHEMA):
+                await run_neo4j_query(statement)
+
+            # Airport MERGEs are where the uniqueness constraint matters most
+            stats = await ingest_rows(bench_query(AIRPORTS_QUERY), airports, label='bench airports')
+            report(schema_mode, 'airports', stats)
+
+            if args.single_transaction:
+                # The old behaviour: every route in one UNWIND transaction
+                await clear_routes()
+                stats = await ingest_rows(routes_query, routes, label='bench routes',
+                                          batch_size=len(routes), workers=1)
+                report(schema_mode, 'all', stats)
+
+            for batch_size in args.batch_sizes:
+                for workers in args.workers:
+                    await clear_routes()
+                    stats = await ingest_rows(routes_query, routes, label='bench routes',
+                                              batch_size=batch_size, workers=workers)
+                    report(schema_mode, batch_size, stats)
+    finally:
+        await run_neo4j_query("MATCH (a:BenchAirport) DETACH DELETE a")
+        for statement in DROP_BENCH_SCHEMA:
+            await run_neo4j_query(statement)
+        await close_driver()
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunked route ingest")
+    parser.add_argument('--airports', type=int, default=7000)
+    parser.add_argument('--routes', type=int, default=67000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--schema', choices=['with', 'without', 'both'], default='both',
+                        help="run with the constraint and index from schema.py, without them, or both")
+    parser.add_argument('--single-transaction', action='store_true',
+                        help="also time the previous single-transaction load")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
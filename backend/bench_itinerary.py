@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Itinerary search latency (itinerary.search_itineraries behind
+/api/itineraries) against latency targets.
+
+Random origin/destination pairs are searched with and without a stop limit,
+for one and several alternatives, and as one batch. The route graph is a
+synthetic graph the size of the full dataset by default, or the database
+snapshot with --neo4j (load the full dataset first for the real figures).
+
+Usage:
+  python bench_itinerary.py
+  python bench_itinerary.py --neo4j --pairs 500
+  python bench_itinerary.py --target-p95-ms 20 --k 5
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+import numpy as np
+
+import itinerary
+import route_graph
+from bench_route_graph import load_from_neo4j
+
+
+def synthetic_graph(airport_count, route_count, seed=3):
+    """
+    Airports scattered over the globe with great-circle route distances and
+    hub-skewed endpoints, so searches behave as on real data (distances
+    that follow geography prune far better than random weights).
+    """
+    rng = random.Random(seed)
+    latitude = np.radians([rng.uniform(-55, 70) for _ in range(airport_count)])
+    longitude = np.radians([rng.uniform(-180, 180) for _ in range(airport_count)])
+    airports = [{'code': f"A{i:05d}", 'name': f"Airport {i}", 'city': '', 'country': 'XX'} for i in range(airport_count)]
+    weights = [1.0 / (i + 1) ** 0.8 for i in range(airport_count)]
+    sources = np.array(rng.choices(range(airport_count), weights=weights, k=route_count))
+    targets = np.array(rng.choices(range(airport_count), weights=weights, k=route_count))
+    a = (np.sin((latitude[targets] - latitude[sources]) / 2) ** 2
+         + np.cos(latitude[sources]) * np.cos(latitude[targets]) * np.sin((longitude[targets] - longitude[sources]) / 2) ** 2)
+    distances = 2 * 6371.0 * np.arcsin(np.sqrt(a))
+    routes = [
+        {'source': airports[s]['code'], 'target': airports[t]['code'],
+         'airline': f"L{rng.randrange(500)}", 'distance': float(d)}
+        for s, t, d in zip(sources.tolist(), targets.tolist(), distances.tolist())
+    ]
+    return airports, routes
+
+
+def percentile_ms(timings, q):
+    return float(np.percentile(np.array(timings) * 1000, q))
+
+
+async def run(args):
+    if args.neo4j:
+        airports, routes = await load_from_neo4j()
+        from database import close_driver
+        await close_driver()
+    else:
+        airports, routes = synthetic_graph(args.airports, args.routes)
+    graph = route_graph.RouteGraph(airports, routes)
+
+    # Only airports with routes make meaningful pairs
+    connected = graph.codes[(graph.out_degree > 0) & (graph.in_degree > 0)].tolist()
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(connected, 2)) for _ in range(args.pairs)]
+
+    started = time.perf_counter()
+    itinerary.route_view(graph)
+    view_ms = (time.perf_counter() - started) * 1000
+
+    print("\n" + "=" * 60)
+    print(f"🧭 Itinerary search: {graph.airport_count} airports, {graph.route_count} routes, "
+          f"{len(pairs)} pairs (view built in {view_ms:.0f} ms)")
+    print("=" * 60)
+    print(f"   {'case':<24}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'found':>8}  target")
+
+    failed = False
+    cases = [('shortest', 1, None), ('shortest, <=1 stop', 1, 1), ('shortest, <=2 stops', 1, 2),
+             (f'{args.k} shortest', args.k, None), (f'{args.k} shortest, <=2 stops', args.k, 2)]
+    for label, k, max_stops in cases:
+        timings, found = [], 0
+        for origin, destination in pairs:
+            started = time.perf_counter()
+            result = itinerary.search_itineraries(graph, origin, destination, k, max_stops)
+            timings.append(time.perf_counter() - started)
+            found += bool(result['itineraries'])
+        p95 = percentile_ms(timings, 95)
+        ok = p95 <= args.target_p95_ms
+        failed |= not ok
+        print(f"   {label:<24}{percentile_ms(timings, 50):>9.2f}{p95:>9.2f}{max(timings) * 1000:>9.2f}"
+              f"{found:>8}  {'✅' if ok else '❌'} p95 <= {args.target_p95_ms:g} ms")
+
+    started = time.perf_counter()
+    for origin, destination in pairs:
+        itinerary.search_itineraries(graph, origin, destination, 1, 2)
+    batch_seconds = time.perf_counter() - started
+    print(f"   batch of {len(pairs)} (<=2 stops): {batch_seconds * 1000:.0f} ms, "
+          f"{len(pairs) / batch_seconds:.0f} pairs/s")
+    print()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure itinerary search latency")
+    parser.add_argument('--airports', type=int, default=3500)
+    parser.add_argument('--routes', type=int, default=67000)
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--target-p95-ms', type=float, default=50.0)
+    parser.add_argument('--neo4j', action='store_true', help="search the database snapshot")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for /api/query
+
+Two modes:
+  http   - fire N parallel POST /api/query calls at a running server and report
+           throughput. Run it once against the old build and once against the
+           new one to compare.
+  direct - in-process comparison of the old execution path (sync driver called
+           from inside the event loop) against the async managed-transaction
+           layer in database.py, using the same Cypher and concurrency.
+
+Usage:
+  python bench_query_concurrency.py http --url http://localhost:8000/api -n 32 -r 200
+  python bench_query_concurrency.py direct -n 32 -r 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+DEFAULT_QUERY = "MATCH (a:Airport)-[r:ROUTE]->(b:Airport) RETURN a.code, b.code, r.distance_km LIMIT 50"
+
+
+def print_report(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"   {label:<28} {len(latencies) / elapsed:8.1f} req/s   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+
+
+def bench_http(url, query, concurrency, total):
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def one_call(_):
+        started = time.perf_counter()
+        response = session.post(f"{url}/query", json={"query": query}, timeout=120)
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    # Warm up the connection pool and the server side driver
+    one_call(0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one_call, range(total)))
+    print_report(f"HTTP x{concurrency}", latencies, time.perf_counter() - started)
+
+
+async def bench_direct(query, concurrency, total):
+    from neo4j import GraphDatabase
+    from database import run_neo4j_query, close_driver, neo4j_uri, neo4j_user, neo4j_password, neo4j_database
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Old path: sync driver called from a coroutine, blocking the loop
+    sync_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+
+    async def sync_call():
+        async with semaphore:
+            started = time.perf_counter()
+            with sync_driver.session(database=neo4j_database) as session:
+                list(session.run(query))
+            return time.perf_counter() - started
+
+    # New path: async managed transaction
+    async def async_call():
+        async with semaphore:
+            started = time.perf_counter()
+            await run_neo4j_query(query, readonly=True)
+            return time.perf_counter() - started
+
+    for label, call in (("sync driver (before)", sync_call), ("async driver (after)", async_call)):
+        await call()  # warm up
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[call() for _ in range(total)])
+        print_report(f"{label} x{concurrency}", latencies, time.perf_counter() - started)
+
+    sync_driver.close()
+    await close_driver()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for /api/query")
+    parser.add_argument('mode', choices=['http', 'direct'])
+    parser.add_argument('--url', default=os.environ.get('BENCH_API_URL', 'http://localhost:8000/api'))
+    parser.add_argument('--query', default=DEFAULT_QUERY)
+    parser.add_argument('-n', '--concurrency', type=int, default=32)
+    parser.add_argument('-r', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"⏱️  /api/query concurrency benchmark ({args.mode})")
+    print("=" * 60)
+    print(f"   Query: {args.query}")
+    print(f"   Requests: {args.requests}, concurrency: {args.concurrency}\n")
+
+    if args.mode == 'http':
+        bench_http(args.url, args.query, args.concurrency, args.requests)
+    else:
+        asyncio.run(bench_direct(args.query, args.concurrency, args.requests))
+    print()
+
+
+if __name__ == "__main__":
+    main()
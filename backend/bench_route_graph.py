@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Latency of the in-process route graph (route_graph.RouteGraph) behind
+/api/analytics: snapshot build time and per-call time of degree
+distribution, neighbours and connected components.
+
+Runs on a synthetic graph the size of the full dataset by default. With
+--neo4j the snapshot is read from the database instead, and the same
+questions are also timed as Cypher round trips for comparison.
+
+Usage:
+  python bench_route_graph.py
+  python bench_route_graph.py --airports 20000 --routes 300000
+  python bench_route_graph.py --neo4j -r 20
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+import route_graph
+
+# Cypher equivalents of the analytics calls, for --neo4j
+CYPHER_NEIGHBORS = """
+MATCH (a:Airport {code: $code})-[r:ROUTE]->(b:Airport)
+RETURN b.code as code, collect(r.airline) as airlines, min(r.distance_km) as distance_km
+"""
+CYPHER_DEGREE_DISTRIBUTION = """
+MATCH (a:Airport)
+WITH a, COUNT { (a)-[:ROUTE]->() } as degree
+RETURN degree, count(*) as airports ORDER BY degree
+"""
+
+
+def synthetic_graph(airport_count, route_count, seed=3):
+    rng = random.Random(seed)
+    airports = [{'code': f"A{i:05d}", 'name': f"Airport {i}", 'city': '', 'country': 'XX'} for i in range(airport_count)]
+    # Skewed endpoints, so a few hubs carry most routes as in the real data
+    weights = [1.0 / (i + 1) for i in range(airport_count)]
+    sources = rng.choices(range(airport_count), weights=weights, k=route_count)
+    targets = rng.choices(range(airport_count), weights=weights, k=route_count)
+    routes = [
+        {'source': airports[s]['code'], 'target': airports[t]['code'],
+         'airline': f"L{rng.randrange(500)}", 'distance': rng.uniform(100, 15000)}
+        for s, t in zip(sources, targets)
+    ]
+    return airports, routes
+
+
+def time_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def time_cypher(query, params, repeat):
+    from database import run_neo4j_query
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await run_neo4j_query(query, params, readonly=True)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def load_from_neo4j():
+    from database import run_neo4j_query
+    airports = await run_neo4j_query(route_graph.AIRPORTS_QUERY, readonly=True)
+    routes = await run_neo4j_query(route_graph.ROUTES_QUERY, readonly=True)
+    return airports, routes
+
+
+async def run(args):
+    if args.neo4j:
+        airports, routes = await load_from_neo4j()
+    else:
+        airports, routes = synthetic_graph(args.airports, args.routes)
+
+    graph = route_graph.RouteGraph(airports, routes)
+    by_degree = graph.out_degree.argsort(kind='stable')
+    hub = graph.codes[by_degree[-1]]
+    typical = graph.codes[by_degree[len(by_degree) // 2]]
+
+    print("\n" + "=" * 60)
+    print(f"🕸️ Route graph: {graph.airport_count} airports, {graph.route_count} routes "
+          f"(snapshot built in {graph.seconds * 1000:.0f} ms)")
+    print("=" * 60)
+    print(f"   {'call':<28}{'in-process':>14}{'cypher':>14}")
+
+    calls = [
+        ('degree distribution', lambda: graph.degree_distribution('out'),
+         (CYPHER_DEGREE_DISTRIBUTION, {})),
+        (f'neighbors of {hub} (hub)', lambda: graph.neighbors(hub), (CYPHER_NEIGHBORS, {'code': hub})),
+        (f'neighbors of {typical}', lambda: graph.neighbors(typical), (CYPHER_NEIGHBORS, {'code': typical})),
+        ('weak components', lambda: graph.component_sizes('weak'), None),
+        (f'component of {hub}', lambda: graph.component_of(hub, 'strong'), None),
+    ]
+    for label, fn, cypher in calls:
+        in_process = time_call(fn, args.repeat)
+        remote = await time_cypher(cypher[0], cypher[1], args.repeat) if args.neo4j and cypher else None
+        remote_text = f"{remote:>11.0f} µs" if remote is not None else f"{'-':>14}"
+        print(f"   {label:<28}{in_process:>11.0f} µs{remote_text}")
+
+    if args.neo4j:
+        from database import close_driver
+        await close_driver()
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the in-process route graph analytics")
+    parser.add_argument('--airports', type=int, default=7000)
+    parser.add_argument('--routes', type=int, default=67000)
+    parser.add_argument('-r', '--repeat', type=int, default=100)
+    parser.add_argument('--neo4j', action='store_true', help="snapshot the database and compare with Cypher")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for route ingest: peak RSS of the buffered seed path
+(whole CSV in a DataFrame, build_dataset, every record in a list) against
+the streaming path (etl.iter_route_records feeding ingest.ingest_stream).
+
+Writes a synthetic route CSV of --routes lines, then runs each mode in its
+own subprocess so the peak RSS of one does not hide the other. By default
+the records are only produced and batched (no database needed), which is
+where the memory goes; with --neo4j they are written under the
+BenchAirport label and BENCH_ROUTE type, as in bench_ingest.py, and removed
+at the end.
+
+Usage:
+  python bench_stream_ingest.py --routes 2000000
+  python bench_stream_ingest.py --routes 500000 --chunk-rows 20000 --neo4j
+  python bench_stream_ingest.py --csv /data/routes.csv --modes stream
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+import pandas as pd
+
+from etl import STREAM_CHUNK_ROWS, build_dataset, iter_route_records
+from ingest import INGEST_BATCH_SIZE, chunked
+
+
+def write_synthetic_csv(path, route_count, airport_count=7000, seed=5):
+    """Route CSV with the columns of the real dataset, written in blocks"""
+    rng = random.Random(seed)
+    codes = [f"{chr(65 + i // 676 % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}" for i in range(airport_count)]
+    airlines = [f"A{i:02d}" for i in range(500)]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("airline,airline_id,source_airport,source_airport_id,destination_apirport,"
+                "destination_airport_id,codeshare,stops,equipment,distance\n")
+        for start in range(0, route_count, 100000):
+            lines = [
+                f"{rng.choice(airlines)},{i},{rng.choice(codes)},1,{rng.choice(codes)},2,,0,738,"
+                f"{rng.uniform(100, 15000):.1f}\n"
+                for i in range(start, min(start + 100000, route_count))
+            ]
+            f.writelines(lines)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def bench_query(query):
+    return query.replace(':Airport', ':BenchAirport').replace(':ROUTE', ':BENCH_ROUTE')
+
+
+def buffered_batches(csv_path):
+    """The seed_region_data path: whole file, whole dataset, then batches"""
+    routes_df = pd.read_csv(csv_path, dtype=str)
+    airports_df = pd.DataFrame(columns=['iata_code', 'name', 'municipality', 'iso_country', 'coordinates'])
+    airlines_df = pd.DataFrame(columns=['IATA', 'ICAO', 'Name', 'Country'])
+    dataset = build_dataset(airports_df, routes_df, [airlines_df], None)
+    return dataset['routes']
+
+
+async def run_child(mode, csv_path, chunk_rows, use_neo4j):
+    started = time.perf_counter()
+    if mode == 'buffered':
+        records = buffered_batches(csv_path)
+        if use_neo4j:
+            from ingest import ROUTES_QUERY, ingest_rows
+            stats = await ingest_rows(bench_query(ROUTES_QUERY), records, label='bench routes')
+            rows = stats['rows']
+        else:
+            rows = sum(len(batch) for batch in chunked(records, INGEST_BATCH_SIZE))
+    else:
+        chunks = iter_route_records(csv_path, chunk_rows=chunk_rows)
+        if use_neo4j:
+            from ingest import ROUTES_QUERY, ingest_stream, iterate_in_thread
+            stats = await ingest_stream(bench_query(ROUTES_QUERY), iterate_in_thread(chunks), label='bench routes')
+            rows = stats['rows']
+        else:
+            rows = sum(len(batch) for chunk in chunks for batch in chunked(chunk, INGEST_BATCH_SIZE))
+    if use_neo4j:
+        from database import close_driver
+        await close_driver()
+    return {'mode': mode, 'rows': rows, 'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb()}
+
+
+async def prepare_neo4j(airport_codes):
+    from database import run_neo4j_query, close_driver
+    from ingest import AIRPORTS_QUERY, ingest_rows
+    await run_neo4j_query("MATCH (a:BenchAirport) DETACH DELETE a")
+    airports = [{'code': code, 'name': code, 'city': '', 'country': 'XX', 'latitude': 0.0, 'longitude': 0.0}
+                for code in airport_codes]
+    await ingest_rows(bench_query(AIRPORTS_QUERY), airports, label='bench airports')
+    await close_driver()
+
+
+async def cleanup_neo4j():
+    from database import run_neo4j_query, close_driver
+    await run_neo4j_query("MATCH (a:BenchAirport) DETACH DELETE a")
+    await close_driver()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of buffered and streaming route ingest")
+    parser.add_argument('--routes', type=int, default=1000000, help="lines in the synthetic CSV")
+    parser.add_argument('--csv', help="use this route CSV instead of a synthetic one")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS)
+    parser.add_argument('--modes', nargs='+', choices=['buffered', 'stream'], default=['buffered', 'stream'])
+    parser.add_argument('--neo4j', action='store_true', help="write the routes to Neo4j under bench labels")
+    parser.add_argument('--child', choices=['buffered', 'stream'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(run_child(args.child, args.csv, args.chunk_rows, args.neo4j))
+        print(json.dumps(result))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = args.csv
+        if not csv_path:
+            csv_path = os.path.join(tmp_dir, 'routes.csv')
+            write_synthetic_csv(csv_path, args.routes)
+
+        print("\n" + "=" * 60)
+        print(f"🧠 Route ingest memory: {os.path.getsize(csv_path) / 1e6:.0f} MB CSV, "
+              f"{args.chunk_rows} rows per chunk{', Neo4j' if args.neo4j else ', dry run'}")
+        print("=" * 60)
+        print(f"   {'mode':<10}{'rows':>10}{'seconds':>10}{'peak RSS':>12}")
+
+        if args.neo4j:
+            codes = set()
+            for chunk in pd.read_csv(csv_path, dtype=str, usecols=['source_airport', 'destination_apirport'],
+                                     chunksize=args.chunk_rows):
+                codes.update(chunk['source_airport'].dropna().str.strip().str.upper())
+                codes.update(chunk['destination_apirport'].dropna().str.strip().str.upper())
+            asyncio.run(prepare_neo4j(sorted(codes)))
+
+        try:
+            for mode in args.modes:
+                command = [sys.executable, __file__, '--child', mode, '--csv', csv_path,
+                           '--chunk-rows', str(args.chunk_rows)] + (['--neo4j'] if args.neo4j else [])
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"   {result['mode']:<10}{result['rows']:>10}{result['seconds']:>10.2f}"
+                      f"{result['peak_rss_mb']:>9.0f} MB")
+        finally:
+            if args.neo4j:
+                asyncio.run(cleanup_neo4j())
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
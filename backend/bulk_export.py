@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline bulk-import export for cold rebuilds.
+
+Transactional MERGEs (/api/seed-data) are the right tool for loading into a
+running database, but a rebuild from scratch is much faster with Neo4j's
+offline importer. This writes the same airports, routes and airlines the seed
+loaders would (etl.build_dataset over the dataset store) as the node and
+relationship files `neo4j-admin database import full` expects:
+
+  airports.header.csv / airports.csv   (:Airport, ID space Airport)
+  airlines.header.csv / airlines.csv   (:Airline, ID space Airline)
+  routes.header.csv   / routes.csv     (:ROUTE between Airport IDs)
+  manifest.json                        files, row counts, SHA-256, command
+  import.sh                            runs the import with those files
+
+Differences from the online load are resolved the way the ingest queries
+resolve them: routes whose endpoints are not exported airports are dropped
+(ROUTES_QUERY MATCHes them), duplicate routes keep the last row (MERGE then
+SET), and airports at 0,0 get no location point. Constraints and indexes are
+not part of the import; schema.ensure_schema creates them when the backend
+starts against the imported database, and POST /api/analytics/rankings then
+adds the hub ranking properties.
+
+Usage:
+  python bulk_export.py --output import/              # full dataset
+  python bulk_export.py --output import/ --region BR --gzip
+  sh import/import.sh neo4j                           # with the database stopped
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+import pandas as pd
+
+from dataset_store import load_dataset
+from etl import build_dataset
+
+# (header field, record key) per file. The header field carries the
+# importer type; ID fields are stored as the `code` property of each node.
+AIRPORT_FIELDS: List[Tuple[str, str]] = [
+    ('code:ID(Airport)', 'code'),
+    ('name', 'name'),
+    ('city', 'city'),
+    ('country', 'country'),
+    ('latitude:double', 'latitude'),
+    ('longitude:double', 'longitude'),
+    ('location:point{crs:WGS-84}', 'location'),
+]
+
+AIRLINE_FIELDS: List[Tuple[str, str]] = [
+    ('code:ID(Airline)', 'code'),
+    ('name', 'name'),
+    ('country', 'country'),
+]
+
+ROUTE_FIELDS: List[Tuple[str, str]] = [
+    (':START_ID(Airport)', 'from'),
+    (':END_ID(Airport)', 'to'),
+    ('airline', 'airline'),
+    ('distance_km:double', 'distance'),
+]
+
+
+def _format_value(value: Any) -> str:
+    """
+    One CSV field. Missing values stay empty (the importer skips the property),
+    strings are always quoted so an empty string is kept as one.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _location(record: Dict[str, Any]) -> Optional[str]:
+    # Same rule as AIRPORTS_QUERY: no point for missing or 0,0 coordinates
+    latitude, longitude = record.get('latitude'), record.get('longitude')
+    if latitude is None or longitude is None or (latitude == 0.0 and longitude == 0.0):
+        return None
+    return f"{{latitude:{latitude!r}, longitude:{longitude!r}}}"
+
+
+def _open(path: Path, compress: bool):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_entity(output_dir: Path, name: str, fields: List[Tuple[str, str]],
+                 records: Iterable[Dict[str, Any]], compress: bool = False) -> Dict[str, Any]:
+    """Write `<name>.header.csv` and the data file; return the manifest entry"""
+    header_path = output_dir / f'{name}.header.csv'
+    data_path = output_dir / (f'{name}.csv.gz' if compress else f'{name}.csv')
+    with open(header_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(header for header, _ in fields) + '\n')
+
+    rows = 0
+    with _open(data_path, compress) as f:
+        for record in records:
+            f.write(','.join(_format_value(record.get(key)) for _, key in fields) + '\n')
+            rows += 1
+
+    return {
+        'header': header_path.name,
+        'data': data_path.name,
+        'rows': rows,
+        'sha256': _sha256(data_path),
+    }
+
+
+def importable_routes(dataset: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Routes the online load would create: both airports exported, one per (from, to, airline)"""
+    codes = {airport['code'] for airport in dataset['airports']}
+    routes = pd.DataFrame(dataset['routes'], columns=['from', 'to', 'airline', 'distance'])
+    routes = routes[routes['from'].isin(codes) & routes['to'].isin(codes)]
+    routes = routes.drop_duplicates(['from', 'to', 'airline'], keep='last')
+    return routes.to_dict('records')
+
+
+def import_command(manifest: Dict[str, Any], database: str = '$DATABASE') -> str:
+    files = manifest['files']
+
+    def source(entry):
+        return f"{entry['header']},{entry['data']}"
+
+    return (
+        '"$NEO4J_ADMIN" database import full'
+        f" --nodes=Airport={source(files['airports'])}"
+        f" --nodes=Airline={source(files['airlines'])}"
+        f" --relationships=ROUTE={source(files['routes'])}"
+        " --overwrite-destination"
+        f" {database}"
+    )
+
+
+IMPORT_SCRIPT = """#!/bin/sh
+# Generated by bulk_export.py ({region}, {created}).
+# Replaces database "${{1:-{database}}}" with the exported graph. Stop the
+# database first; start it again and run the backend to create the schema.
+set -e
+cd "$(dirname "$0")"
+NEO4J_ADMIN="${{NEO4J_ADMIN:-neo4j-admin}}"
+DATABASE="${{1:-{database}}}"
+{command}
+"""
+
+
+def export_bulk_import(output_dir: Path, region: Optional[str] = None, compress: bool = False,
+                       database: Optional[str] = None) -> Dict[str, Any]:
+    """Build the dataset for `region` (None for everything) and write the import files"""
+    started = time.perf_counter()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    database = database or os.environ.get('NEO4J_DATABASE') or 'neo4j'
+
+    airline_tables = [load_dataset('airlines_base'), load_dataset('airlines_info')]
+    dataset = build_dataset(load_dataset('airports'), load_dataset('routes'), airline_tables, region)
+    airports = ({**airport, 'location': _location(airport)} for airport in dataset['airports'])
+
+    manifest = {
+        'format': 'neo4j-admin database import full',
+        'region': region or 'full',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'database': database,
+        'files': {
+            'airports': {'label': 'Airport', **write_entity(output_dir, 'airports', AIRPORT_FIELDS, airports, compress)},
+            'airlines': {'label': 'Airline', **write_entity(output_dir, 'airlines', AIRLINE_FIELDS, dataset['airlines'], compress)},
+            'routes': {'type': 'ROUTE', **write_entity(output_dir, 'routes', ROUTE_FIELDS, importable_routes(dataset), compress)},
+        },
+    }
+    manifest['command'] = import_command(manifest, database)
+    manifest['seconds'] = round(time.perf_counter() - started, 2)
+
+    with open(output_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    script_path = output_dir / 'import.sh'
+    with open(script_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(IMPORT_SCRIPT.format(region=manifest['region'], created=manifest['created_at'],
+                                     database=database, command=import_command(manifest)))
+    script_path.chmod(0o755)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write neo4j-admin bulk-import files for the airport graph")
+    parser.add_argument('--output', type=Path, default=ROOT_DIR / 'bulk_import')
+    parser.add_argument('--region', help="ISO country code; the whole dataset when omitted")
+    parser.add_argument('--gzip', action='store_true', help="compress the data files")
+    parser.add_argument('--database', help="target database (default: NEO4J_DATABASE or neo4j)")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"📦 Bulk-import export: {args.region or 'full'} dataset -> {args.output}")
+    print("=" * 60)
+    manifest = export_bulk_import(args.output, args.region.upper() if args.region else None, args.gzip, args.database)
+    for name, entry in manifest['files'].items():
+        print(f"   {name:<10}{entry['rows']:>9} rows   {entry['data']}")
+    print(f"   done in {manifest['seconds']:.2f}s\n")
+    print(f"   Stop the database, then run:  sh {args.output / 'import.sh'}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+In-process caches used by the API.
+
+TranslationCache maps a normalized natural-language question to the Cypher the
+LLM produced for it, so repeated questions skip the LLM round-trip.
+
+ResultCache keeps the records of executed read-only Cypher, keyed by the graph
+version, so a query is only sent to Neo4j again after the graph changed.
+
+GraphDataCache holds the full /api/graph/data payload. Concurrent misses share
+one in-flight load, and an outdated copy keeps being served while a
+background task refreshes it.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def normalize_question(question: str) -> str:
+    """Fold case, accents, punctuation and whitespace so equivalent questions share a key"""
+    text = unicodedata.normalize('NFKD', question)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+
+
+class TranslationCache:
+    """
+    Two-tier question -> Cypher cache.
+
+    Tier 1 is an in-memory LRU with TTL. Tier 2 is an optional SQLite file that
+    survives restarts. Entries are tied to the fingerprint of the schema prompt
+    they were generated with; when the prompt changes, both tiers are purged.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 86400, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prompt_hash: Optional[str] = None
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " prompt_hash TEXT NOT NULL,"
+                " question TEXT NOT NULL,"
+                " cypher TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (prompt_hash, question))"
+            )
+            self._db.commit()
+            logging.info(f"Translation cache persisted at {db_path}")
+
+    def bind_prompt(self, prompt: str):
+        """Invalidate every entry generated with a different schema prompt"""
+        fingerprint = prompt_fingerprint(prompt)
+        if fingerprint == self.prompt_hash:
+            return
+        with self._lock:
+            if self.prompt_hash is not None:
+                self.stats['invalidations'] += 1
+                logging.info("Schema prompt changed, invalidating translation cache")
+            self.prompt_hash = fingerprint
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations WHERE prompt_hash != ?", (fingerprint,))
+                self._db.commit()
+
+    def get(self, question: str, prompt: str) -> Optional[str]:
+        self.bind_prompt(prompt)
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, cypher = entry
+                if now - created_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return cypher
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT cypher, created_at FROM translations WHERE prompt_hash = ? AND question = ?",
+                    (self.prompt_hash, key),
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    self._store(key, row[0], row[1])
+                    self.stats['disk_hits'] += 1
+                    return row[0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, question: str, cypher: str, prompt: str):
+        self.bind_prompt(prompt)
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._store(key, cypher, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (prompt_hash, question, cypher, created_at) VALUES (?, ?, ?, ?)",
+                    (self.prompt_hash, key, cypher, now),
+                )
+                self._db.commit()
+
+    def _store(self, key: str, cypher: str, created_at: float):
+        self._entries[key] = (created_at, cypher)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': round((self.stats['hits'] + self.stats['disk_hits']) / lookups, 3) if lookups else 0.0,
+            'persistent': self._db is not None,
+        }
+
+
+class GraphVersion:
+    """
+    Monotonic counter bumped whenever the graph is modified.
+
+    It starts from the process start time in milliseconds, so versions handed
+    out before a restart are always older than the ones handed out after it.
+    """
+
+    def __init__(self, initial: Optional[int] = None):
+        self.value = initial if initial is not None else int(time.time() * 1000)
+        self._lock = threading.Lock()
+
+    def bump(self) -> int:
+        with self._lock:
+            self.value += 1
+            logging.info(f"Graph version is now {self.value}")
+            return self.value
+
+
+class ResultCache:
+    """
+    Cache of Cypher results keyed by (cypher text, parameters, graph version).
+
+    Memory is bounded by an estimate of each entry's serialized size; the least
+    recently used entries are evicted first, and results larger than
+    `max_entry_bytes` are not cached at all. Entries from older graph versions
+    can never be hit again and are dropped as soon as the version moves on;
+    lookups and results for a version older than the current one are ignored.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.current_bytes = 0
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'oversized': 0,
+        }
+
+    @staticmethod
+    def _key(query: str, parameters: Optional[dict], version: int) -> Tuple[str, str, int]:
+        params = json.dumps(parameters or {}, sort_keys=True, default=str)
+        return (query.strip(), params, version)
+
+    def _advance(self, version: int) -> bool:
+        """Move to `version`, dropping older entries; False when it is already out of date"""
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self.current_bytes = 0
+        return True
+
+    def get(self, query: str, parameters: Optional[dict], version: int) -> Optional[List[Dict[str, Any]]]:
+        key = self._key(query, parameters, version)
+        with self._lock:
+            entry = self._entries.get(key) if self._advance(version) else None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, query: str, parameters: Optional[dict], version: int, results: List[Dict[str, Any]]):
+        size = len(json.dumps(results, default=str))
+        if size > self.max_entry_bytes:
+            self.stats['oversized'] += 1
+            return
+        key = self._key(query, parameters, version)
+        with self._lock:
+            # A query that started before the graph changed must not evict current entries
+            if not self._advance(version):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[0]
+            self._entries[key] = (size, results)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.stats['evictions'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'graph_version': self._version,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
+
+
+class GraphDataCache:
+    """
+    Single-flight, stale-while-revalidate cache for one expensive payload.
+
+    An entry is fresh while it was loaded at the current graph version and is
+    younger than `max_age`. Otherwise it is stale: callers that accept stale
+    data get it immediately and a single background refresh is started;
+    callers that don't wait for that same refresh. When there is no entry at
+    all, every concurrent caller awaits one shared load instead of each
+    running its own.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], max_age: float = 60):
+        self._loader = loader
+        self.max_age = max_age
+        self.entry: Optional[Dict[str, Any]] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._inflight_version: Optional[int] = None
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'loads': 0,
+            'load_errors': 0,
+        }
+
+    def is_fresh(self, version: int) -> bool:
+        return (self.entry is not None and
+                self.entry['version'] == version and
+                time.time() - self.entry['timestamp'] < self.max_age)
+
+    async def _load(self, version: int) -> Dict[str, Any]:
+        self.stats['loads'] += 1
+        try:
+            data = await self._loader()
+        except Exception:
+            self.stats['load_errors'] += 1
+            raise
+        entry = {'data': data, 'version': version, 'timestamp': time.time(), 'binary': None}
+        # A slower load for an older version must not replace a newer entry
+        if self.entry is None or self.entry['version'] <= version:
+            self.entry = entry
+        return entry
+
+    def _refresh(self, version: int) -> asyncio.Task:
+        """Start a load for `version`, or join the one already running for it"""
+        if self._inflight is not None and not self._inflight.done() and self._inflight_version >= version:
+            self.stats['coalesced'] += 1
+            return self._inflight
+        task = asyncio.ensure_future(self._load(version))
+        task.add_done_callback(self._log_refresh_error)
+        self._inflight = task
+        self._inflight_version = version
+        return task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Graph data refresh failed: {task.exception()}")
+
+    async def get(self, version: int, allow_stale: bool = True) -> Dict[str, Any]:
+        """Entry dict with 'data', 'version', 'timestamp' and a 'binary' slot for encoders"""
+        if self.is_fresh(version):
+            self.stats['hits'] += 1
+            return self.entry
+        task = self._refresh(version)
+        if self.entry is not None and allow_stale:
+            self.stats['stale_hits'] += 1
+            return self.entry
+        self.stats['misses'] += 1
+        # shield: a caller that disconnects must not cancel the load others are waiting on
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'version': self.entry['version'] if self.entry else None,
+            'age_seconds': round(time.time() - self.entry['timestamp'], 1) if self.entry else None,
+            'refreshing': self._inflight is not None and not self._inflight.done(),
+        }
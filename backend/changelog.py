@@ -0,0 +1,77 @@
+"""
+Graph changelog used for delta sync of /api/graph/data.
+
+The seed loaders record the business keys they wrote (airport codes, airline
+codes and (from, airline, to) route keys) while they run. When the seed
+finishes, the staged keys are committed under the new graph version, so a
+client holding version N can ask for only what changed after N.
+
+Removals are not tracked key by key: the only operations that delete data are
+`clear_existing` reseeds and arbitrary write queries, and both are recorded as
+a reset, which tells the client to reload the full graph.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+RouteKey = Tuple[str, str, str]
+
+
+class GraphChangelog:
+    """Bounded list of (version, changed keys) entries"""
+
+    def __init__(self, max_entries: int = 50):
+        self._entries = deque(maxlen=max_entries)
+        self._pending = self._empty()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty() -> Dict[str, Set]:
+        return {'airports': set(), 'airlines': set(), 'routes': set(), 'reset': False}
+
+    def record(self, airports: Iterable[str] = (), airlines: Iterable[str] = (),
+               routes: Iterable[RouteKey] = (), reset: bool = False):
+        """Stage keys written by a seed loader until the next commit"""
+        with self._lock:
+            self._pending['airports'].update(str(code) for code in airports)
+            self._pending['airlines'].update(str(code) for code in airlines)
+            self._pending['routes'].update((str(a), str(airline), str(b)) for a, airline, b in routes)
+            self._pending['reset'] = self._pending['reset'] or reset
+
+    def commit(self, version: int):
+        """Attach the staged keys to `version`"""
+        with self._lock:
+            entry = self._pending
+            self._pending = self._empty()
+            self._entries.append((version, entry))
+        logging.info(
+            f"Changelog v{version}: {len(entry['airports'])} airports, {len(entry['airlines'])} airlines, "
+            f"{len(entry['routes'])} routes{' (reset)' if entry['reset'] else ''}"
+        )
+
+    def changes_since(self, version: int, current: int) -> Optional[Dict[str, Set]]:
+        """
+        Union of every change committed after `version`, or None when the
+        client must reload everything: a reset happened, `version` is older
+        than the changelog window, or it comes from another server process.
+        """
+        if version == current:
+            return self._empty()
+        if version > current:
+            return None
+        with self._lock:
+            entries = list(self._entries)
+        # Every bump commits an entry, so entries cover a contiguous version range
+        if not entries or version < entries[0][0] - 1:
+            return None
+        merged = self._empty()
+        for entry_version, entry in entries:
+            if entry_version <= version:
+                continue
+            if entry['reset']:
+                return None
+            for key in ('airports', 'airlines', 'routes'):
+                merged[key] |= entry[key]
+        return merged
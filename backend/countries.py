@@ -0,0 +1,290 @@
+"""
+ISO 3166-1 alpha-2 country codes with English and Portuguese names.
+
+The loaders store countries inconsistently: the sample data writes English
+names ('Brazil', 'USA'), the BR/full loaders write ISO codes on airports
+('BR') and the airline tables carry English names. entity_index maps every
+stored value and every name below to one country, so 'Brasil', 'Brazil' and
+'BR' in a question all resolve to the values actually present in the graph.
+"""
+
+from typing import Dict, List, Tuple
+
+# (ISO code, English name, Portuguese name)
+COUNTRIES: List[Tuple[str, str, str]] = [
+    ('AD', 'Andorra', 'Andorra'),
+    ('AE', 'United Arab Emirates', 'Emirados Árabes Unidos'),
+    ('AF', 'Afghanistan', 'Afeganistão'),
+    ('AG', 'Antigua and Barbuda', 'Antígua e Barbuda'),
+    ('AI', 'Anguilla', 'Anguila'),
+    ('AL', 'Albania', 'Albânia'),
+    ('AM', 'Armenia', 'Armênia'),
+    ('AO', 'Angola', 'Angola'),
+    ('AQ', 'Antarctica', 'Antártida'),
+    ('AR', 'Argentina', 'Argentina'),
+    ('AS', 'American Samoa', 'Samoa Americana'),
+    ('AT', 'Austria', 'Áustria'),
+    ('AU', 'Australia', 'Austrália'),
+    ('AW', 'Aruba', 'Aruba'),
+    ('AX', 'Aland Islands', 'Ilhas Aland'),
+    ('AZ', 'Azerbaijan', 'Azerbaijão'),
+    ('BA', 'Bosnia and Herzegovina', 'Bósnia e Herzegovina'),
+    ('BB', 'Barbados', 'Barbados'),
+    ('BD', 'Bangladesh', 'Bangladesh'),
+    ('BE', 'Belgium', 'Bélgica'),
+    ('BF', 'Burkina Faso', 'Burkina Faso'),
+    ('BG', 'Bulgaria', 'Bulgária'),
+    ('BH', 'Bahrain', 'Bahrein'),
+    ('BI', 'Burundi', 'Burundi'),
+    ('BJ', 'Benin', 'Benin'),
+    ('BL', 'Saint Barthelemy', 'São Bartolomeu'),
+    ('BM', 'Bermuda', 'Bermudas'),
+    ('BN', 'Brunei', 'Brunei'),
+    ('BO', 'Bolivia', 'Bolívia'),
+    ('BQ', 'Caribbean Netherlands', 'Países Baixos Caribenhos'),
+    ('BR', 'Brazil', 'Brasil'),
+    ('BS', 'Bahamas', 'Bahamas'),
+    ('BT', 'Bhutan', 'Butão'),
+    ('BW', 'Botswana', 'Botsuana'),
+    ('BY', 'Belarus', 'Bielorrússia'),
+    ('BZ', 'Belize', 'Belize'),
+    ('CA', 'Canada', 'Canadá'),
+    ('CC', 'Cocos (Keeling) Islands', 'Ilhas Cocos'),
+    ('CD', 'Democratic Republic of the Congo', 'República Democrática do Congo'),
+    ('CF', 'Central African Republic', 'República Centro-Africana'),
+    ('CG', 'Republic of the Congo', 'República do Congo'),
+    ('CH', 'Switzerland', 'Suíça'),
+    ('CI', "Cote d'Ivoire", 'Costa do Marfim'),
+    ('CK', 'Cook Islands', 'Ilhas Cook'),
+    ('CL', 'Chile', 'Chile'),
+    ('CM', 'Cameroon', 'Camarões'),
+    ('CN', 'China', 'China'),
+    ('CO', 'Colombia', 'Colômbia'),
+    ('CR', 'Costa Rica', 'Costa Rica'),
+    ('CU', 'Cuba', 'Cuba'),
+    ('CV', 'Cape Verde', 'Cabo Verde'),
+    ('CW', 'Curacao', 'Curaçao'),
+    ('CX', 'Christmas Island', 'Ilha Christmas'),
+    ('CY', 'Cyprus', 'Chipre'),
+    ('CZ', 'Czech Republic', 'República Tcheca'),
+    ('DE', 'Germany', 'Alemanha'),
+    ('DJ', 'Djibouti', 'Djibuti'),
+    ('DK', 'Denmark', 'Dinamarca'),
+    ('DM', 'Dominica', 'Dominica'),
+    ('DO', 'Dominican Republic', 'República Dominicana'),
+    ('DZ', 'Algeria', 'Argélia'),
+    ('EC', 'Ecuador', 'Equador'),
+    ('EE', 'Estonia', 'Estônia'),
+    ('EG', 'Egypt', 'Egito'),
+    ('EH', 'Western Sahara', 'Saara Ocidental'),
+    ('ER', 'Eritrea', 'Eritreia'),
+    ('ES', 'Spain', 'Espanha'),
+    ('ET', 'Ethiopia', 'Etiópia'),
+    ('FI', 'Finland', 'Finlândia'),
+    ('FJ', 'Fiji', 'Fiji'),
+    ('FK', 'Falkland Islands', 'Ilhas Malvinas'),
+    ('FM', 'Micronesia', 'Micronésia'),
+    ('FO', 'Faroe Islands', 'Ilhas Faroé'),
+    ('FR', 'France', 'França'),
+    ('GA', 'Gabon', 'Gabão'),
+    ('GB', 'United Kingdom', 'Reino Unido'),
+    ('GD', 'Grenada', 'Granada'),
+    ('GE', 'Georgia', 'Geórgia'),
+    ('GF', 'French Guiana', 'Guiana Francesa'),
+    ('GG', 'Guernsey', 'Guernsey'),
+    ('GH', 'Ghana', 'Gana'),
+    ('GI', 'Gibraltar', 'Gibraltar'),
+    ('GL', 'Greenland', 'Groenlândia'),
+    ('GM', 'Gambia', 'Gâmbia'),
+    ('GN', 'Guinea', 'Guiné'),
+    ('GP', 'Guadeloupe', 'Guadalupe'),
+    ('GQ', 'Equatorial Guinea', 'Guiné Equatorial'),
+    ('GR', 'Greece', 'Grécia'),
+    ('GT', 'Guatemala', 'Guatemala'),
+    ('GU', 'Guam', 'Guam'),
+    ('GW', 'Guinea-Bissau', 'Guiné-Bissau'),
+    ('GY', 'Guyana', 'Guiana'),
+    ('HK', 'Hong Kong', 'Hong Kong'),
+    ('HN', 'Honduras', 'Honduras'),
+    ('HR', 'Croatia', 'Croácia'),
+    ('HT', 'Haiti', 'Haiti'),
+    ('HU', 'Hungary', 'Hungria'),
+    ('ID', 'Indonesia', 'Indonésia'),
+    ('IE', 'Ireland', 'Irlanda'),
+    ('IL', 'Israel', 'Israel'),
+    ('IM', 'Isle of Man', 'Ilha de Man'),
+    ('IN', 'India', 'Índia'),
+    ('IO', 'British Indian Ocean Territory', 'Território Britânico do Oceano Índico'),
+    ('IQ', 'Iraq', 'Iraque'),
+    ('IR', 'Iran', 'Irã'),
+    ('IS', 'Iceland', 'Islândia'),
+    ('IT', 'Italy', 'Itália'),
+    ('JE', 'Jersey', 'Jersey'),
+    ('JM', 'Jamaica', 'Jamaica'),
+    ('JO', 'Jordan', 'Jordânia'),
+    ('JP', 'Japan', 'Japão'),
+    ('KE', 'Kenya', 'Quênia'),
+    ('KG', 'Kyrgyzstan', 'Quirguistão'),
+    ('KH', 'Cambodia', 'Camboja'),
+    ('KI', 'Kiribati', 'Kiribati'),
+    ('KM', 'Comoros', 'Comores'),
+    ('KN', 'Saint Kitts and Nevis', 'São Cristóvão e Névis'),
+    ('KP', 'North Korea', 'Coreia do Norte'),
+    ('KR', 'South Korea', 'Coreia do Sul'),
+    ('KW', 'Kuwait', 'Kuwait'),
+    ('KY', 'Cayman Islands', 'Ilhas Cayman'),
+    ('KZ', 'Kazakhstan', 'Cazaquistão'),
+    ('LA', 'Laos', 'Laos'),
+    ('LB', 'Lebanon', 'Líbano'),
+    ('LC', 'Saint Lucia', 'Santa Lúcia'),
+    ('LI', 'Liechtenstein', 'Liechtenstein'),
+    ('LK', 'Sri Lanka', 'Sri Lanka'),
+    ('LR', 'Liberia', 'Libéria'),
+    ('LS', 'Lesotho', 'Lesoto'),
+    ('LT', 'Lithuania', 'Lituânia'),
+    ('LU', 'Luxembourg', 'Luxemburgo'),
+    ('LV', 'Latvia', 'Letônia'),
+    ('LY', 'Libya', 'Líbia'),
+    ('MA', 'Morocco', 'Marrocos'),
+    ('MC', 'Monaco', 'Mônaco'),
+    ('MD', 'Moldova', 'Moldávia'),
+    ('ME', 'Montenegro', 'Montenegro'),
+    ('MF', 'Saint Martin', 'São Martinho'),
+    ('MG', 'Madagascar', 'Madagáscar'),
+    ('MH', 'Marshall Islands', 'Ilhas Marshall'),
+    ('MK', 'North Macedonia', 'Macedônia do Norte'),
+    ('ML', 'Mali', 'Mali'),
+    ('MM', 'Myanmar', 'Mianmar'),
+    ('MN', 'Mongolia', 'Mongólia'),
+    ('MO', 'Macau', 'Macau'),
+    ('MP', 'Northern Mariana Islands', 'Ilhas Marianas do Norte'),
+    ('MQ', 'Martinique', 'Martinica'),
+    ('MR', 'Mauritania', 'Mauritânia'),
+    ('MS', 'Montserrat', 'Montserrat'),
+    ('MT', 'Malta', 'Malta'),
+    ('MU', 'Mauritius', 'Maurícia'),
+    ('MV', 'Maldives', 'Maldivas'),
+    ('MW', 'Malawi', 'Malawi'),
+    ('MX', 'Mexico', 'México'),
+    ('MY', 'Malaysia', 'Malásia'),
+    ('MZ', 'Mozambique', 'Moçambique'),
+    ('NA', 'Namibia', 'Namíbia'),
+    ('NC', 'New Caledonia', 'Nova Caledônia'),
+    ('NE', 'Niger', 'Níger'),
+    ('NF', 'Norfolk Island', 'Ilha Norfolk'),
+    ('NG', 'Nigeria', 'Nigéria'),
+    ('NI', 'Nicaragua', 'Nicarágua'),
+    ('NL', 'Netherlands', 'Países Baixos'),
+    ('NO', 'Norway', 'Noruega'),
+    ('NP', 'Nepal', 'Nepal'),
+    ('NR', 'Nauru', 'Nauru'),
+    ('NU', 'Niue', 'Niue'),
+    ('NZ', 'New Zealand', 'Nova Zelândia'),
+    ('OM', 'Oman', 'Omã'),
+    ('PA', 'Panama', 'Panamá'),
+    ('PE', 'Peru', 'Peru'),
+    ('PF', 'French Polynesia', 'Polinésia Francesa'),
+    ('PG', 'Papua New Guinea', 'Papua-Nova Guiné'),
+    ('PH', 'Philippines', 'Filipinas'),
+    ('PK', 'Pakistan', 'Paquistão'),
+    ('PL', 'Poland', 'Polônia'),
+    ('PM', 'Saint Pierre and Miquelon', 'São Pedro e Miquelão'),
+    ('PR', 'Puerto Rico', 'Porto Rico'),
+    ('PS', 'Palestine', 'Palestina'),
+    ('PT', 'Portugal', 'Portugal'),
+    ('PW', 'Palau', 'Palau'),
+    ('PY', 'Paraguay', 'Paraguai'),
+    ('QA', 'Qatar', 'Catar'),
+    ('RE', 'Reunion', 'Reunião'),
+    ('RO', 'Romania', 'Romênia'),
+    ('RS', 'Serbia', 'Sérvia'),
+    ('RU', 'Russia', 'Rússia'),
+    ('RW', 'Rwanda', 'Ruanda'),
+    ('SA', 'Saudi Arabia', 'Arábia Saudita'),
+    ('SB', 'Solomon Islands', 'Ilhas Salomão'),
+    ('SC', 'Seychelles', 'Seicheles'),
+    ('SD', 'Sudan', 'Sudão'),
+    ('SE', 'Sweden', 'Suécia'),
+    ('SG', 'Singapore', 'Singapura'),
+    ('SH', 'Saint Helena', 'Santa Helena'),
+    ('SI', 'Slovenia', 'Eslovênia'),
+    ('SJ', 'Svalbard and Jan Mayen', 'Svalbard e Jan Mayen'),
+    ('SK', 'Slovakia', 'Eslováquia'),
+    ('SL', 'Sierra Leone', 'Serra Leoa'),
+    ('SM', 'San Marino', 'San Marino'),
+    ('SN', 'Senegal', 'Senegal'),
+    ('SO', 'Somalia', 'Somália'),
+    ('SR', 'Suriname', 'Suriname'),
+    ('SS', 'South Sudan', 'Sudão do Sul'),
+    ('ST', 'Sao Tome and Principe', 'São Tomé e Príncipe'),
+    ('SV', 'El Salvador', 'El Salvador'),
+    ('SX', 'Sint Maarten', 'São Martinho (Países Baixos)'),
+    ('SY', 'Syria', 'Síria'),
+    ('SZ', 'Eswatini', 'Essuatíni'),
+    ('TC', 'Turks and Caicos Islands', 'Ilhas Turcas e Caicos'),
+    ('TD', 'Chad', 'Chade'),
+    ('TG', 'Togo', 'Togo'),
+    ('TH', 'Thailand', 'Tailândia'),
+    ('TJ', 'Tajikistan', 'Tajiquistão'),
+    ('TL', 'Timor-Leste', 'Timor-Leste'),
+    ('TM', 'Turkmenistan', 'Turcomenistão'),
+    ('TN', 'Tunisia', 'Tunísia'),
+    ('TO', 'Tonga', 'Tonga'),
+    ('TR', 'Turkey', 'Turquia'),
+    ('TT', 'Trinidad and Tobago', 'Trinidad e Tobago'),
+    ('TV', 'Tuvalu', 'Tuvalu'),
+    ('TW', 'Taiwan', 'Taiwan'),
+    ('TZ', 'Tanzania', 'Tanzânia'),
+    ('UA', 'Ukraine', 'Ucrânia'),
+    ('UG', 'Uganda', 'Uganda'),
+    ('UM', 'United States Minor Outlying Islands', 'Ilhas Menores Distantes dos Estados Unidos'),
+    ('US', 'United States', 'Estados Unidos'),
+    ('UY', 'Uruguay', 'Uruguai'),
+    ('UZ', 'Uzbekistan', 'Uzbequistão'),
+    ('VC', 'Saint Vincent and the Grenadines', 'São Vicente e Granadinas'),
+    ('VE', 'Venezuela', 'Venezuela'),
+    ('VG', 'British Virgin Islands', 'Ilhas Virgens Britânicas'),
+    ('VI', 'U.S. Virgin Islands', 'Ilhas Virgens Americanas'),
+    ('VN', 'Vietnam', 'Vietnã'),
+    ('VU', 'Vanuatu', 'Vanuatu'),
+    ('WF', 'Wallis and Futuna', 'Wallis e Futuna'),
+    ('WS', 'Samoa', 'Samoa'),
+    ('XK', 'Kosovo', 'Kosovo'),
+    ('YE', 'Yemen', 'Iêmen'),
+    ('YT', 'Mayotte', 'Mayotte'),
+    ('ZA', 'South Africa', 'África do Sul'),
+    ('ZM', 'Zambia', 'Zâmbia'),
+    ('ZW', 'Zimbabwe', 'Zimbábue'),
+]
+
+# Other spellings seen in the data sources and in questions
+ALIASES: Dict[str, List[str]] = {
+    'AE': ['UAE', 'EAU', 'Emirados Arabes'],
+    'BO': ['Plurinational State of Bolivia'],
+    'CD': ['Congo (Kinshasa)', 'DR Congo', 'Zaire'],
+    'CG': ['Congo (Brazzaville)', 'Congo'],
+    'CI': ['Ivory Coast'],
+    'CV': ['Cabo Verde'],
+    'CZ': ['Czechia', 'Tchéquia'],
+    'FM': ['Federated States of Micronesia'],
+    'GB': ['UK', 'Great Britain', 'England', 'Inglaterra', 'Grã-Bretanha'],
+    'HK': ['Hong Kong SAR of China'],
+    'IR': ['Islamic Republic of Iran'],
+    'KP': ["Democratic People's Republic of Korea"],
+    'KR': ['Korea', 'Republic of Korea', 'Coreia'],
+    'LA': ["Lao People's Democratic Republic"],
+    'MK': ['Macedonia', 'Macedônia'],
+    'MM': ['Burma', 'Birmânia'],
+    'MO': ['Macao'],
+    'NL': ['Holland', 'Holanda'],
+    'PS': ['Palestinian Territory'],
+    'RU': ['Russian Federation'],
+    'SY': ['Syrian Arab Republic'],
+    'SZ': ['Swaziland', 'Suazilândia'],
+    'TL': ['East Timor', 'Timor Leste'],
+    'TR': ['Türkiye'],
+    'TZ': ['United Republic of Tanzania'],
+    'US': ['USA', 'U.S.A.', 'United States of America', 'America', 'EUA', 'Estados Unidos da América'],
+    'VE': ['Bolivarian Republic of Venezuela'],
+    'VN': ['Viet Nam'],
+}
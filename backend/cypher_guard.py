@@ -0,0 +1,243 @@
+"""
+Cost guard for Cypher written by clients (/api/query) or by the LLM
+(GraphRAG), applied before it reaches the database.
+
+`CypherGuard.check`:
+- appends `LIMIT CYPHER_DEFAULT_LIMIT` to every top-level RETURN that has
+  none (each part of a UNION separately);
+- runs EXPLAIN and walks the plan. A CartesianProduct estimated above
+  CYPHER_MAX_ESTIMATED_ROWS is rejected. An unbounded variable-length
+  expansion (`*`, `*2..`) above the threshold is rewritten to at most
+  CYPHER_MAX_HOPS hops and explained again; it is rejected if the
+  estimate is still too high.
+
+Queries that already start with EXPLAIN are passed through; PROFILE is
+rejected, since it runs the query (and Neo4j refuses EXPLAIN PROFILE).
+
+Decisions are cached per (query, graph version), so repeated queries do not
+pay for the EXPLAIN round trip. The queries themselves then run in read
+transactions with the endpoint's timeout (CYPHER_TIMEOUT_QUERY,
+CYPHER_TIMEOUT_GRAPHRAG), which the database enforces.
+"""
+
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+CYPHER_GUARD = os.environ.get('CYPHER_GUARD', 'true').lower() in ('1', 'true', 'yes')
+CYPHER_MAX_ESTIMATED_ROWS = float(os.environ.get('CYPHER_MAX_ESTIMATED_ROWS', '1000000'))
+CYPHER_DEFAULT_LIMIT = int(os.environ.get('CYPHER_DEFAULT_LIMIT', '1000'))
+CYPHER_MAX_HOPS = int(os.environ.get('CYPHER_MAX_HOPS', '3'))
+# Transaction timeouts in seconds, per endpoint
+CYPHER_TIMEOUT_QUERY = float(os.environ.get('CYPHER_TIMEOUT_QUERY', '10'))
+CYPHER_TIMEOUT_GRAPHRAG = float(os.environ.get('CYPHER_TIMEOUT_GRAPHRAG', '15'))
+
+DECISION_CACHE_SIZE = 512
+
+# String literals, quoted identifiers and comments, which may contain anything
+LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.DOTALL)
+CLAUSE_PATTERN = re.compile(r"[{}()\[\]]|\b(RETURN|LIMIT|UNION)\b", re.IGNORECASE)
+# A relationship pattern with a length: -[r:ROUTE*1..]-
+VAR_LENGTH_PATTERN = re.compile(r"-\s*\[[^\[\]*]*\*(?P<spec>\s*\d*\s*(?:\.\.\s*\d*)?)[^\[\]]*\]")
+LENGTH_SPEC_PATTERN = re.compile(r"\*\s*(\d*)\s*(\.\.)?\s*(\d*)")
+
+VAR_LENGTH_OPERATORS = ('VarLengthExpand', 'VarExpand', 'BFSPruningVarExpand')
+
+
+class QueryRejected(Exception):
+    """The query is not allowed, or its plan is estimated to be too expensive to run"""
+
+
+class GuardedQuery:
+    """The Cypher to run in place of the original and what was changed"""
+
+    def __init__(self, query: str, notes: List[str]):
+        self.query = query
+        self.notes = notes
+
+
+def mask_literals(query: str) -> str:
+    """The query with literals and comments blanked out, keeping every offset"""
+    return LITERAL_PATTERN.sub(lambda match: '_' * len(match.group(0)), query)
+
+
+def ensure_limit(query: str, limit: int = CYPHER_DEFAULT_LIMIT) -> str:
+    """Append LIMIT to each top-level RETURN without one; subqueries are left alone"""
+    masked = mask_literals(query)
+    depth = 0
+    # Per UNION part: [end offset, whether its last RETURN has a LIMIT or None without RETURN]
+    parts: List[List[Any]] = [[len(query), None]]
+    for match in CLAUSE_PATTERN.finditer(masked):
+        token = match.group(0)
+        if token in '{([':
+            depth += 1
+        elif token in '})]':
+            depth -= 1
+        elif depth == 0:
+            keyword = token.upper()
+            if keyword == 'UNION':
+                parts[-1][0] = match.start()
+                parts.append([len(query), None])
+            elif keyword == 'RETURN':
+                parts[-1][1] = False
+            elif parts[-1][1] is False:
+                parts[-1][1] = True
+    # Insert from the end so earlier offsets stay valid
+    for end, has_limit in reversed(parts):
+        if has_limit is not False:
+            continue
+        head, tail = query[:end].rstrip(), query[end:]
+        if not tail:
+            head = head.rstrip(';').rstrip()
+        # A trailing // comment would swallow the clause
+        last = None
+        for last in LITERAL_PATTERN.finditer(head):
+            pass
+        separator = '\n' if last and last.end() == len(head) and last.group(0).startswith('//') else ' '
+        query = f"{head}{separator}LIMIT {limit}" + (f" {tail}" if tail else "")
+    return query
+
+
+def is_unbounded(spec: str) -> bool:
+    """Whether a length spec ('', '2..', '..', '1..3', '2') has no upper bound"""
+    spec = spec.replace(' ', '')
+    return spec == '' or spec.endswith('..')
+
+
+def unbounded_var_lengths(query: str) -> List[Tuple[int, int, str]]:
+    """(start, end, spec) of every unbounded variable-length relationship"""
+    return [(match.start('spec'), match.end('spec'), match.group('spec'))
+            for match in VAR_LENGTH_PATTERN.finditer(mask_literals(query))
+            if is_unbounded(match.group('spec'))]
+
+
+def cap_var_lengths(query: str, max_hops: int = CYPHER_MAX_HOPS) -> str:
+    """Give every unbounded variable-length relationship an upper bound of max_hops"""
+    for start, end, spec in reversed(unbounded_var_lengths(query)):
+        lower = int(spec.split('..')[0].strip() or 1)
+        query = f"{query[:start]}{lower}..{max(lower, max_hops)}{query[end:]}"
+    return query
+
+
+def plan_operators(plan: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    stack = [plan] if plan else []
+    while stack:
+        operator = stack.pop()
+        yield operator
+        stack.extend(operator.get('children') or [])
+
+
+def operator_type(operator: Dict[str, Any]) -> str:
+    # 'CartesianProduct@neo4j' on Neo4j 5
+    return operator.get('operatorType', '').split('@')[0]
+
+
+def estimated_rows(operator: Dict[str, Any]) -> float:
+    arguments = operator.get('args') or operator.get('arguments') or {}
+    return float(arguments.get('EstimatedRows') or 0)
+
+
+def expansion_unbounded(operator: Dict[str, Any], query: str) -> bool:
+    """From the operator's Details when it has them, else from the query text"""
+    arguments = operator.get('args') or operator.get('arguments') or {}
+    spec = LENGTH_SPEC_PATTERN.search(str(arguments.get('Details') or ''))
+    if spec is None:
+        return bool(unbounded_var_lengths(query))
+    lower, dots, upper = spec.groups()
+    return bool(upper == '' if dots else lower == '')
+
+
+def plan_problems(plan: Optional[Dict[str, Any]], query: str, max_rows: float) -> Tuple[List[str], List[str]]:
+    """(cartesian products, unbounded expansions) estimated above max_rows, described"""
+    cartesian, expansions = [], []
+    for operator in plan_operators(plan):
+        name, rows = operator_type(operator), estimated_rows(operator)
+        if rows <= max_rows:
+            continue
+        if name.startswith('CartesianProduct'):
+            cartesian.append(f"{name} ~{rows:,.0f} rows")
+        elif name.startswith(VAR_LENGTH_OPERATORS) and expansion_unbounded(operator, query):
+            expansions.append(f"{name} ~{rows:,.0f} rows")
+    return cartesian, expansions
+
+
+class CypherGuard:
+    """
+    Checks untrusted Cypher with `explain(query, parameters)`, which returns
+    the EXPLAIN plan as the driver reports it (database.explain_neo4j_query).
+    """
+
+    def __init__(self, explain: Callable[[str, Optional[dict]], Awaitable[Optional[Dict[str, Any]]]],
+                 max_rows: float = CYPHER_MAX_ESTIMATED_ROWS):
+        self._explain = explain
+        self.max_rows = max_rows
+        # GuardedQuery, or the message of a QueryRejected
+        self._decisions: 'OrderedDict[Tuple[str, int], Any]' = OrderedDict()
+        self.stats = {'checked': 0, 'cached': 0, 'limited': 0, 'rewritten': 0, 'rejected': 0}
+
+    async def check(self, query: str, parameters: Optional[dict] = None, version: int = 0) -> GuardedQuery:
+        """The query to run instead; raises QueryRejected for plans over the row threshold"""
+        if not CYPHER_GUARD:
+            return GuardedQuery(query, [])
+        prefix = query.lstrip()[:8].upper()
+        if prefix.startswith('EXPLAIN'):
+            return GuardedQuery(query, [])
+        if prefix.startswith('PROFILE'):
+            self.stats['rejected'] += 1
+            raise QueryRejected("PROFILE is not allowed, use EXPLAIN to see the plan")
+        key = (query, version)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            self._decisions.move_to_end(key)
+            self.stats['cached'] += 1
+        else:
+            try:
+                decision = await self._decide(query, parameters)
+            except QueryRejected as e:
+                # The message only: a cached exception would collect a traceback per raise
+                decision = str(e)
+            self._decisions[key] = decision
+            while len(self._decisions) > DECISION_CACHE_SIZE:
+                self._decisions.popitem(last=False)
+        if isinstance(decision, str):
+            raise QueryRejected(decision)
+        return decision
+
+    async def _decide(self, query: str, parameters: Optional[dict]) -> GuardedQuery:
+        self.stats['checked'] += 1
+        notes = []
+        limited = ensure_limit(query)
+        if limited != query:
+            self.stats['limited'] += 1
+            notes.append(f"LIMIT {CYPHER_DEFAULT_LIMIT} added")
+
+        cartesian, expansions = plan_problems(await self._explain(limited, parameters), limited, self.max_rows)
+        if expansions and not cartesian:
+            capped = cap_var_lengths(limited)
+            if capped != limited:
+                cartesian, expansions = plan_problems(await self._explain(capped, parameters), capped, self.max_rows)
+                if not cartesian and not expansions:
+                    self.stats['rewritten'] += 1
+                    notes.append(f"variable-length patterns capped at {CYPHER_MAX_HOPS} hops")
+                    limited = capped
+        if cartesian or expansions:
+            self.stats['rejected'] += 1
+            problems = ', '.join(cartesian + [f"unbounded {e}" for e in expansions])
+            logging.warning(f"Cypher rejected by cost guard ({problems}): {query}")
+            raise QueryRejected(f"estimated plan exceeds {self.max_rows:,.0f} rows: {problems}")
+        if notes:
+            logging.info(f"Cypher guard: {'; '.join(notes)}")
+        return GuardedQuery(limited, notes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'enabled': CYPHER_GUARD,
+            'max_estimated_rows': self.max_rows,
+            'default_limit': CYPHER_DEFAULT_LIMIT,
+            'max_hops': CYPHER_MAX_HOPS,
+            'timeouts': {'query': CYPHER_TIMEOUT_QUERY, 'graphrag': CYPHER_TIMEOUT_GRAPHRAG},
+            'cached_decisions': len(self._decisions),
+            **self.stats,
+        }
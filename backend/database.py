@@ -0,0 +1,130 @@
+"""
+Async Neo4j execution layer.
+
+Every endpoint goes through `run_neo4j_query`, which runs the Cypher inside a
+managed transaction on the async driver. A slow query therefore only suspends
+its own coroutine instead of blocking the whole worker.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+from neo4j import AsyncGraphDatabase, READ_ACCESS, unit_of_work
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Neo4j connection
+neo4j_uri = os.environ['NEO4J_URI']
+neo4j_user = os.environ['NEO4J_USERNAME']
+neo4j_password = os.environ['NEO4J_PASSWORD']
+neo4j_database = os.environ['NEO4J_DATABASE']
+
+# Connection pool configuration
+NEO4J_MAX_POOL_SIZE = int(os.environ.get('NEO4J_MAX_POOL_SIZE', '50'))
+NEO4J_ACQUISITION_TIMEOUT = float(os.environ.get('NEO4J_ACQUISITION_TIMEOUT', '30'))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.environ.get('NEO4J_MAX_CONNECTION_LIFETIME', '3600'))
+
+# The async driver binds to the running event loop, so it is created lazily
+# on first use instead of at import time
+_driver = None
+
+
+def get_driver():
+    """Return the shared async driver, creating it on first use"""
+    global _driver
+    if _driver is None:
+        _driver = AsyncGraphDatabase.driver(
+            neo4j_uri,
+            auth=(neo4j_user, neo4j_password),
+            max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+        )
+        logging.info(f"Neo4j async driver created (pool size {NEO4J_MAX_POOL_SIZE})")
+    return _driver
+
+
+async def close_driver():
+    """Close the shared driver and release all pooled connections"""
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+
+
+def serialize_neo4j_object(obj):
+    """Convert Neo4j objects to serializable dictionaries"""
+    if hasattr(obj, '_properties'):  # Neo4j Node or Relationship
+        return dict(obj._properties)
+    elif hasattr(obj, 'items'):  # Dictionary-like
+        return {k: serialize_neo4j_object(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [serialize_neo4j_object(item) for item in obj]
+    else:
+        return obj
+
+
+async def _collect_records(tx, query: str, parameters: dict) -> List[Dict[str, Any]]:
+    """Transaction function: run the query and materialize every record"""
+    result = await tx.run(query, parameters)
+    records = []
+    async for record in result:
+        record_dict = {}
+        for key, value in record.items():
+            record_dict[key] = serialize_neo4j_object(value)
+        records.append(record_dict)
+    return records
+
+
+async def run_neo4j_query(query: str, parameters: Optional[dict] = None, readonly: bool = False,
+                          timeout: Optional[float] = None):
+    """
+    Execute a Cypher query in a managed transaction.
+
+    Managed transactions are retried by the driver on transient errors, so the
+    query must be idempotent (MERGE-based writes and plain reads are).
+    Read-only queries are routed to read replicas when the cluster has them,
+    and the database refuses any write they attempt. `timeout` (seconds) is
+    enforced by the database, which terminates the transaction.
+    """
+    work = unit_of_work(timeout=timeout)(_collect_records) if timeout else _collect_records
+    async with get_driver().session(database=neo4j_database) as session:
+        if readonly:
+            return await session.execute_read(work, query, parameters or {})
+        return await session.execute_write(work, query, parameters or {})
+
+
+async def _explain_plan(tx, query: str, parameters: dict) -> Optional[Dict[str, Any]]:
+    result = await tx.run(f"EXPLAIN {query}", parameters)
+    summary = await result.consume()
+    return summary.plan
+
+
+async def explain_neo4j_query(query: str, parameters: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+    """
+    The planner's plan for a query without running it: nested dicts with
+    operatorType, args (EstimatedRows, Details, ...) and children.
+    """
+    async with get_driver().session(database=neo4j_database) as session:
+        return await session.execute_read(_explain_plan, query, parameters or {})
+
+
+async def stream_neo4j_query(query: str, parameters: Optional[dict] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield serialized records one at a time straight from the result cursor.
+
+    Used for large read-only scans where materializing every record first
+    would hold the whole result in memory. Runs as a read transaction; it is
+    not retried, since records may already have been sent to the client.
+    """
+    async with get_driver().session(database=neo4j_database, default_access_mode=READ_ACCESS) as session:
+        async with await session.begin_transaction() as tx:
+            result = await tx.run(query, parameters or {})
+            async for record in result:
+                record_dict = {}
+                for key, value in record.items():
+                    record_dict[key] = serialize_neo4j_object(value)
+                yield record_dict
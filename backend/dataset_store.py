@@ -0,0 +1,270 @@
+"""
+Local, content-addressed store for the CSV datasets used by the seed loaders.
+
+Each source is downloaded once, converted to Parquet with explicit dtypes and
+saved as `<sha256 of the CSV>.parquet` under DATASET_DIR. `index.json` maps
+every source location (URL or local path) to the hash of its last content,
+its ETag and when it was fetched. Later loads read the Parquet file; a URL is
+revalidated (conditional GET) at most every DATASET_REFRESH_SECONDS, and
+unchanged content reuses the existing file.
+
+Configuration:
+  DATASET_DIR               where the Parquet files and index live
+  DATASETS_OFFLINE=true     never touch the network; fail if a source was never fetched
+  DATASET_<NAME>_PATH       read a local CSV or Parquet file instead of the URL
+  DATASET_<NAME>_URL        fetch from another URL
+where NAME is AIRPORTS, ROUTES, AIRLINES_BASE or AIRLINES_INFO.
+
+`local_source_file` gives streaming readers a file on disk instead (see
+etl.iter_route_frames). Parquet goes through pyarrow.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+ROOT_DIR = Path(__file__).parent
+
+DATASET_DIR = Path(os.environ.get('DATASET_DIR') or ROOT_DIR / 'dataset_cache')
+DATASETS_OFFLINE = os.environ.get('DATASETS_OFFLINE', 'false').lower() in ('1', 'true', 'yes')
+DATASET_REFRESH_SECONDS = float(os.environ.get('DATASET_REFRESH_SECONDS', '86400'))
+DATASET_DOWNLOAD_TIMEOUT = float(os.environ.get('DATASET_DOWNLOAD_TIMEOUT', '120'))
+
+# url: default location; numeric: columns stored as float64 (unparseable values become NaN).
+# Every other column is stored as a string, so numeric-looking codes keep their text.
+SOURCES: Dict[str, Dict[str, Any]] = {
+    'airports': {
+        'url': 'https://raw.githubusercontent.com/datasets/airport-codes/master/data/airport-codes.csv',
+        'numeric': ['elevation_ft'],
+    },
+    'routes': {
+        'url': 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/13e519574832172b538fd5588673132cb826cd20/routes.csv',
+        'numeric': ['distance'],
+    },
+    'airlines_base': {
+        'url': 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/2697297ee7ae3eed7c679f7d1f195c1f502aa11b/Airlines_Unicas.csv',
+        'numeric': [],
+    },
+    'airlines_info': {
+        'url': 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/2697297ee7ae3eed7c679f7d1f195c1f502aa11b/airline_info.csv',
+        'numeric': [],
+    },
+}
+
+
+class DatasetUnavailable(Exception):
+    """The source cannot be fetched (offline or download error) and was never stored"""
+
+
+# Held only around the index.json read-modify-write
+_index_lock = threading.Lock()
+# One lock per source location: the same source is never fetched twice at once,
+# while different sources download and convert in parallel
+_location_locks: Dict[str, threading.Lock] = {}
+
+
+def _index_path() -> Path:
+    return DATASET_DIR / 'index.json'
+
+
+def _read_index() -> Dict[str, Any]:
+    try:
+        with open(_index_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_index(index: Dict[str, Any]):
+    # Write then rename, so a crash never leaves a truncated index
+    tmp_path = _index_path().with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _index_path())
+
+
+def _read_entry(location: str) -> Optional[Dict[str, Any]]:
+    with _index_lock:
+        return _read_index().get(location)
+
+
+def _record_entry(location: str, entry: Dict[str, Any]):
+    with _index_lock:
+        index = _read_index()
+        index[location] = entry
+        _write_index(index)
+
+
+def _location_lock(location: str) -> threading.Lock:
+    with _index_lock:
+        return _location_locks.setdefault(location, threading.Lock())
+
+
+def source_location(name: str) -> str:
+    """Local path override, URL override or the default URL of a source"""
+    env_name = name.upper()
+    return (os.environ.get(f'DATASET_{env_name}_PATH')
+            or os.environ.get(f'DATASET_{env_name}_URL')
+            or SOURCES[name]['url'])
+
+
+def is_remote(location: str) -> bool:
+    return location.startswith('http://') or location.startswith('https://')
+
+
+def parse_csv(content: bytes, numeric: List[str]) -> pd.DataFrame:
+    """CSV bytes to a DataFrame with the source's explicit dtypes"""
+    df = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=True)
+    for column in numeric:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return df
+
+
+def _parquet_path(digest: str) -> Path:
+    return DATASET_DIR / f'{digest}.parquet'
+
+
+def _store(content: bytes, numeric: List[str]) -> str:
+    """Convert CSV bytes to Parquet under their content hash, unless already there"""
+    digest = hashlib.sha256(content).hexdigest()
+    path = _parquet_path(digest)
+    if not path.exists():
+        df = parse_csv(content, numeric)
+        # Two sources with the same content may be stored at once
+        tmp_path = path.with_name(f'{digest}.{threading.get_ident()}.tmp')
+        df.to_parquet(tmp_path, engine='pyarrow', index=False)
+        os.replace(tmp_path, path)
+        logging.info(f"Stored dataset {digest[:12]} ({len(df)} rows) as Parquet")
+    return digest
+
+
+def _fetch(location: str, entry: Optional[Dict[str, Any]]) -> Optional[requests.Response]:
+    """GET a URL, conditional on the stored ETag. None means 304 Not Modified."""
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    response = requests.get(location, headers=headers, timeout=DATASET_DOWNLOAD_TIMEOUT)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    return response
+
+
+def load_dataset(name: str, force_refresh: bool = False) -> pd.DataFrame:
+    """
+    DataFrame for the source `name`, read from the local Parquet copy when it
+    is current. Raises DatasetUnavailable when the source has never been
+    stored and cannot be fetched.
+    """
+    location = source_location(name)
+    numeric = SOURCES[name]['numeric']
+    started = time.perf_counter()
+
+    if not is_remote(location) and location.endswith('.parquet'):
+        return pd.read_parquet(location, engine='pyarrow')
+
+    DATASET_DIR.mkdir(parents=True, exist_ok=True)
+    with _location_lock(location):
+        entry = _read_entry(location)
+        cached = entry is not None and _parquet_path(entry['sha256']).exists()
+
+        if not is_remote(location):
+            # Local CSVs are hashed on every load; unchanged content reuses the stored Parquet
+            with open(location, 'rb') as f:
+                entry = {'sha256': _store(f.read(), numeric), 'fetched_at': time.time(), 'etag': None}
+            _record_entry(location, entry)
+        else:
+            age = time.time() - entry['fetched_at'] if cached else None
+            fresh = cached and not force_refresh and age < DATASET_REFRESH_SECONDS
+            if DATASETS_OFFLINE or fresh:
+                if not cached:
+                    raise DatasetUnavailable(f"Dataset '{name}' has never been downloaded and DATASETS_OFFLINE is set")
+            else:
+                try:
+                    response = _fetch(location, entry if cached else None)
+                except requests.RequestException as e:
+                    if not cached:
+                        raise DatasetUnavailable(f"Could not download dataset '{name}': {e}") from e
+                    logging.warning(f"Could not revalidate dataset '{name}', using the stored copy: {e}")
+                else:
+                    if response is None:
+                        entry['fetched_at'] = time.time()
+                    else:
+                        entry = {
+                            'sha256': _store(response.content, numeric),
+                            'fetched_at': time.time(),
+                            'etag': response.headers.get('ETag'),
+                        }
+                    _record_entry(location, entry)
+
+        digest = entry['sha256']
+
+    df = pd.read_parquet(_parquet_path(digest), engine='pyarrow')
+    logging.info(f"Dataset '{name}' loaded ({len(df)} rows, {digest[:12]}) in {time.perf_counter() - started:.2f}s")
+    return df
+
+
+def _stored_parquet(location: str) -> Optional[str]:
+    """Path of the Parquet copy load_dataset stored for `location`, if there is one"""
+    entry = _read_entry(location)
+    if entry is None or not _parquet_path(entry['sha256']).exists():
+        return None
+    return str(_parquet_path(entry['sha256']))
+
+
+def local_source_file(name: str, force_refresh: bool = False) -> str:
+    """
+    Path of a local copy of the raw source file, for readers that stream it
+    in chunks instead of loading a DataFrame. Local sources are returned as
+    they are; URLs are downloaded to DATASET_DIR in blocks, so the file never
+    has to fit in memory, and reused for DATASET_REFRESH_SECONDS. Without a
+    downloaded CSV that can be used, the Parquet copy stored by load_dataset
+    is returned instead (etl reads both).
+    """
+    location = source_location(name)
+    if not is_remote(location):
+        return location
+
+    path = DATASET_DIR / f'{name}.stream.csv'
+    DATASET_DIR.mkdir(parents=True, exist_ok=True)
+    with _location_lock(location):
+        age = time.time() - path.stat().st_mtime if path.exists() else None
+        if age is not None and (DATASETS_OFFLINE or (not force_refresh and age < DATASET_REFRESH_SECONDS)):
+            return str(path)
+        stored = _stored_parquet(location)
+        if DATASETS_OFFLINE:
+            if stored is not None:
+                return stored
+            raise DatasetUnavailable(f"Dataset '{name}' has never been downloaded and DATASETS_OFFLINE is set")
+
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with requests.get(location, stream=True, timeout=DATASET_DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                with open(tmp_path, 'wb') as f:
+                    for block in response.iter_content(chunk_size=1 << 20):
+                        f.write(block)
+        except requests.RequestException as e:
+            if age is None and stored is None:
+                raise DatasetUnavailable(f"Could not download dataset '{name}': {e}") from e
+            logging.warning(f"Could not refresh dataset '{name}', using the stored copy: {e}")
+            return str(path) if age is not None else stored
+        os.replace(tmp_path, path)
+        logging.info(f"Downloaded dataset '{name}' to {path} ({path.stat().st_size} bytes)")
+    return str(path)
+
+
+async def load_dataset_async(name: str, force_refresh: bool = False) -> pd.DataFrame:
+    """load_dataset in a worker thread, so downloads and parsing don't block the event loop"""
+    return await asyncio.to_thread(load_dataset, name, force_refresh)
@@ -0,0 +1,443 @@
+"""
+In-memory entity index over airports (code, name), cities, countries and
+airlines (code, name), behind /api/autocomplete and the entity resolution
+step that runs on a GraphRAG question before any Cypher is generated.
+
+Text is folded accent- and case-insensitively ('São Paulo' -> 'sao paulo').
+Prefix lookups run on a sorted array holding every word-start suffix of
+every term ('aeroporto de congonhas', 'de congonhas', 'congonhas'): the keys
+sharing a prefix form one contiguous range found with two bisections, i.e. a
+flattened trie. Prefixes whose range is large get their best completions
+precomputed when the index is built, so one-letter prefixes cost the same
+as long ones. Misspellings fall back to a trigram index.
+
+Countries are resolved to the values actually stored in the graph (the
+sample data writes 'Brazil', the BR/full loaders write 'BR'), see
+countries.py. The server keeps the current index in a snapshots.SnapshotStore,
+rebuilt in the background after each seed like the route graph.
+"""
+
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from countries import ALIASES, COUNTRIES
+
+AIRPORTS_QUERY = """
+MATCH (a:Airport)
+RETURN a.code as code, a.name as name, a.city as city, a.country as country,
+       coalesce(a.out_degree, 0) + coalesce(a.in_degree, 0) as weight
+"""
+
+AIRLINES_QUERY = """
+MATCH (al:Airline)
+RETURN al.code as code, al.name as name, al.country as country, coalesce(al.route_count, 0) as weight
+"""
+
+ENTITY_TYPES = ('airport', 'city', 'country', 'airline')
+
+# Upper bound for /api/autocomplete?limit=
+AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get('AUTOCOMPLETE_MAX_LIMIT', '20'))
+# Prefix ranges longer than this get their completions precomputed
+ENTITY_PRECOMPUTE_RANGE = int(os.environ.get('ENTITY_PRECOMPUTE_RANGE', '64'))
+# Trigram similarity needed for a misspelled name in a question (0-1)
+ENTITY_FUZZY_MIN_SIMILARITY = float(os.environ.get('ENTITY_FUZZY_MIN_SIMILARITY', '0.7'))
+
+# Longest name, in words, looked for in a question
+MAX_MENTION_WORDS = 6
+# Share of an autocomplete query's trigrams a misspelled completion must contain
+AUTOCOMPLETE_FUZZY_MIN = 0.6
+# Past the last folded character, for the end of a prefix range
+PREFIX_END = '\uffff'
+
+# Dropped from airport and airline names for the short form ('congonhas', 'latam')
+AIRPORT_WORDS = {
+    'aeroporto', 'aeropuerto', 'aeroport', 'aeroporti', 'aerodromo', 'airport', 'airfield', 'airstrip',
+    'international', 'internacional', 'intl', 'regional', 'municipal', 'domestic', 'field',
+    'de', 'do', 'da', 'dos', 'das', 'del', 'of', 'the',
+}
+AIRLINE_WORDS = {
+    'airlines', 'airline', 'airways', 'linhas', 'aereas', 'lineas', 'transportes', 'aereos',
+    'ltd', 'ltda', 'inc', 'sa', 'company', 'the', 'de', 'do', 'da',
+}
+# Question words that are never an entity on their own, in Portuguese and English
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'do', 'da', 'dos', 'das', 'em', 'no', 'na', 'nos', 'nas', 'para',
+    'por', 'com', 'sem', 'que', 'qual', 'quais', 'quanto', 'quantos', 'quantas', 'mais', 'menos',
+    'maior', 'maiores', 'menor', 'menores', 'entre', 'todos', 'todas', 'lista', 'listar', 'liste',
+    'mostre', 'mostrar', 'nome', 'nomes', 'pais', 'paises', 'cidade', 'cidades', 'rota', 'rotas',
+    'voo', 'voos', 'aeroporto', 'aeroportos', 'linha', 'linhas', 'aerea', 'aereas', 'companhia',
+    'companhias', 'hub', 'hubs', 'longa', 'longo', 'longas', 'curta', 'sao', 'saem', 'sai', 'chegam',
+    'partem', 'tem', 'ha', 'um', 'uma', 'ao', 'aos', 'pelo', 'pela', 'direto', 'diretos', 'escala',
+    'the', 'of', 'in', 'from', 'to', 'and', 'or', 'by', 'with', 'how', 'many', 'which', 'what', 'most',
+    'all', 'list', 'show', 'airport', 'airports', 'route', 'routes', 'airline', 'airlines', 'flight',
+    'flights', 'country', 'countries', 'city', 'cities', 'between', 'longest', 'shortest', 'top',
+    'international', 'internacional', 'air', 'new', 'san', 'santa', 'santo', 'saint', 'st',
+}
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+_TOKEN = re.compile(r'\w+')
+
+
+def fold(text: Any) -> str:
+    """Accent- and case-insensitive form: 'São Paulo/Guarulhos' -> 'sao paulo guarulhos'"""
+    text = unicodedata.normalize('NFKD', str(text or '')).casefold()
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def short_name(folded: str, generic: Set[str]) -> str:
+    """A folded name without its generic words, or '' when nothing distinctive is left"""
+    words = [word for word in folded.split() if word not in generic]
+    short = ' '.join(words)
+    return short if len(short) >= 3 and short != folded else ''
+
+
+def country_lookup() -> Tuple[Dict[str, str], Dict[str, Tuple[str, str]]]:
+    """Folded name/alias -> ISO code, and ISO code -> (English, Portuguese) names"""
+    names = {code: (english, portuguese) for code, english, portuguese in COUNTRIES}
+    lookup: Dict[str, str] = {}
+    for code, (english, portuguese) in names.items():
+        for name in [english, portuguese] + ALIASES.get(code, []):
+            lookup.setdefault(fold(name), code)
+    return lookup, names
+
+
+class TrigramIndex:
+    """Terms by trigram, for misspelled lookups"""
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = sorted(terms)
+        grams_of = [trigrams(term) for term in self.terms]
+        self.gram_counts = np.array([len(grams) for grams in grams_of], dtype=np.float64)
+        postings: Dict[str, List[int]] = {}
+        for number, grams in enumerate(grams_of):
+            for gram in grams:
+                postings.setdefault(gram, []).append(number)
+        self.postings = {gram: np.array(numbers, dtype=np.int64) for gram, numbers in postings.items()}
+
+    def search(self, text: str, min_score: float, containment: bool = False) -> List[Tuple[float, str]]:
+        """
+        (score, term) for terms sharing enough trigrams with `text`, best
+        first. The score is the Dice coefficient, or with containment=True the
+        share of `text`'s trigrams found in the term (for prefixes).
+        """
+        grams = trigrams(text)
+        postings = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.terms))
+        if containment:
+            score = shared / len(grams)
+        else:
+            score = 2 * shared / (len(grams) + self.gram_counts)
+        found = np.flatnonzero(score >= min_score)
+        found = found[np.argsort(-score[found], kind='stable')]
+        return [(float(score[number]), self.terms[number]) for number in found.tolist()]
+
+
+class EntityIndex:
+    """Entities of one snapshot with their prefix, exact and trigram lookups"""
+
+    def __init__(self, airports: List[Dict[str, Any]], airlines: List[Dict[str, Any]],
+                 version: Optional[int] = None):
+        started = time.perf_counter()
+        self.version = version
+        self.entities: List[Dict[str, Any]] = []
+        self.kinds: List[str] = []
+        self.priority: List[float] = []
+        # Folded term -> entities, and which terms may be matched inside a question
+        self._terms: Dict[str, Set[int]] = {}
+        self._resolvable: Set[str] = set()
+        # Upper-case code -> entities (only matched when written in capitals)
+        self._codes: Dict[str, Set[int]] = {}
+        self._add_entities(airports, airlines)
+        self._build_prefix_index()
+        self._build_trigram_index()
+        self.seconds = round(time.perf_counter() - started, 3)
+
+    # Building
+
+    def _add(self, kind: str, entity: Dict[str, Any], weight: float) -> int:
+        self.entities.append({'type': kind, **entity})
+        self.kinds.append(kind)
+        self.priority.append(float(weight or 0))
+        return len(self.entities) - 1
+
+    def _name(self, entity: int, text: Any, resolvable: bool = True):
+        term = fold(text)
+        if not term:
+            return
+        self._terms.setdefault(term, set()).add(entity)
+        if resolvable and len(term) >= 3 and not all(word in STOPWORDS for word in term.split()):
+            self._resolvable.add(term)
+
+    def _code(self, entity: int, code: Any):
+        code = str(code or '').strip().upper()
+        if code:
+            self._codes.setdefault(code, set()).add(entity)
+            self._name(entity, code, resolvable=False)
+
+    def _add_entities(self, airports: List[Dict[str, Any]], airlines: List[Dict[str, Any]]):
+        lookup, country_names = country_lookup()
+
+        def country_key(value: str) -> str:
+            upper = value.upper()
+            if len(upper) == 2 and upper in country_names:
+                return upper
+            return lookup.get(fold(value), value)
+
+        # Countries first: every stored value grouped under its ISO code
+        stored: Dict[str, Set[str]] = {}
+        country_weight: Dict[str, float] = {}
+        for record in list(airports) + list(airlines):
+            value = str(record.get('country') or '').strip()
+            if not value or value == 'Unknown':
+                continue
+            key = country_key(value)
+            stored.setdefault(key, set()).add(value)
+            country_weight[key] = country_weight.get(key, 0) + 1 + (record.get('weight') or 0)
+        for key, values in stored.items():
+            english, portuguese = country_names.get(key, (key, key))
+            iso = key if key in country_names else None
+            entity = self._add('country', {'code': iso, 'label': english, 'values': sorted(values)},
+                               country_weight[key])
+            if iso:
+                self._code(entity, iso)
+                for name in [english, portuguese] + ALIASES.get(iso, []):
+                    self._name(entity, name)
+            for value in values:
+                if value != iso:
+                    self._name(entity, value)
+                # Stored abbreviations ('UK', 'USA') match like codes when written in capitals
+                if value.isupper() and len(value) <= 3:
+                    self._code(entity, value)
+
+        # Airports, then the cities they are in
+        cities: Dict[Tuple[str, str], List[Tuple[float, str]]] = {}
+        for record in airports:
+            code = str(record.get('code') or '').strip().upper()
+            if not code:
+                continue
+            name, city = record.get('name') or code, str(record.get('city') or '').strip()
+            country = str(record.get('country') or '').strip()
+            weight = record.get('weight') or 0
+            entity = self._add('airport', {'code': code, 'label': name, 'city': city or None,
+                                           'country': country or None}, weight)
+            self._code(entity, code)
+            folded = fold(name)
+            self._name(entity, folded)
+            # 'Aeroporto Internacional de São Paulo/Guarulhos' is also 'guarulhos'
+            for part in [folded] + [fold(part) for part in re.split(r'/| - |,', name) if part.strip()]:
+                self._name(entity, part)
+                self._name(entity, short_name(part, AIRPORT_WORDS))
+            if city:
+                cities.setdefault((city, country), []).append((weight, code))
+        for (city, country), members in cities.items():
+            members.sort(key=lambda member: (-member[0], member[1]))
+            entity = self._add('city', {'label': city, 'country': country or None,
+                                        'airports': [code for _, code in members[:10]]},
+                               sum(weight for weight, _ in members) + len(members))
+            self._name(entity, city)
+
+        for record in airlines:
+            code = str(record.get('code') or '').strip().upper()
+            if not code:
+                continue
+            name = record.get('name') or code
+            entity = self._add('airline', {'code': code, 'label': name,
+                                           'country': record.get('country') or None}, record.get('weight') or 0)
+            self._code(entity, code)
+            # Long codes such as 'LATAM' are names too
+            self._name(entity, code, resolvable=len(code) >= 4)
+            folded = fold(name)
+            self._name(entity, folded)
+            self._name(entity, short_name(folded, AIRLINE_WORDS))
+
+    def _ranked(self, entities: Iterable[int]) -> List[int]:
+        return sorted(set(entities), key=lambda entity: (-self.priority[entity], entity))
+
+    def _build_prefix_index(self):
+        keys = set()
+        for term, entities in self._terms.items():
+            words = term.split()
+            for i in range(len(words)):
+                suffix = ' '.join(words[i:])
+                keys.update((suffix, entity) for entity in entities)
+        pairs = sorted(keys)
+        self._keys = [key for key, _ in pairs]
+        self._key_entities = [entity for _, entity in pairs]
+
+        # Best completions of every prefix whose range is too long to scan per request
+        kind_numbers = np.array([ENTITY_TYPES.index(kind) for kind in self.kinds], dtype=np.int8)
+        priority = np.array(self.priority)
+        key_entities = np.array(self._key_entities, dtype=np.int64)
+        self._top: Dict[str, List[int]] = {}
+        pending = [('', 0, len(self._keys))]
+        while pending:
+            prefix, lo, hi = pending.pop()
+            depth = len(prefix)
+            i = lo
+            while i < hi:
+                if len(self._keys[i]) <= depth:
+                    i += 1
+                    continue
+                longer = prefix + self._keys[i][depth]
+                j = bisect_left(self._keys, longer + PREFIX_END, i, hi)
+                if j - i > ENTITY_PRECOMPUTE_RANGE:
+                    entities = np.unique(key_entities[i:j])
+                    entities = entities[np.lexsort((entities, -priority[entities]))]
+                    # Enough of every type that a `types` filter still fills the limit
+                    kept = np.concatenate([entities[kind_numbers[entities] == number][:AUTOCOMPLETE_MAX_LIMIT]
+                                           for number in range(len(ENTITY_TYPES))])
+                    self._top[longer] = self._ranked(kept.tolist())
+                    pending.append((longer, i, j))
+                i = j
+
+    def _build_trigram_index(self):
+        self._fuzzy = TrigramIndex(self._terms)
+        # Misspelled names in a question are compared with names of as many words
+        by_words: Dict[int, List[str]] = {}
+        for term in self._resolvable:
+            by_words.setdefault(term.count(' ') + 1, []).append(term)
+        self._fuzzy_names = {words: TrigramIndex(terms) for words, terms in by_words.items() if words <= 2}
+
+    # Lookups
+
+    def complete(self, text: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Entities whose code, name or any later word of it starts with `text`, best first"""
+        query = fold(text)
+        if not query:
+            return []
+        wanted = set(types) if types else None
+        picked: List[int] = []
+        seen: Set[int] = set()
+
+        def take(entities: Iterable[int]):
+            for entity in entities:
+                if len(picked) >= limit:
+                    return
+                if entity not in seen and (wanted is None or self.kinds[entity] in wanted):
+                    seen.add(entity)
+                    picked.append(entity)
+
+        # An exact code or name beats any heavier completion
+        take(self._ranked(self._terms.get(query, ())))
+        top = self._top.get(query)
+        if top is not None:
+            take(top)
+        else:
+            lo = bisect_left(self._keys, query)
+            hi = bisect_left(self._keys, query + PREFIX_END, lo)
+            take(self._ranked(self._key_entities[lo:hi]))
+        # Only a prefix nothing starts with is taken for a misspelling
+        if not picked and len(query) >= 3:
+            for _, term in self._fuzzy.search(query, AUTOCOMPLETE_FUZZY_MIN, containment=True)[:limit * 4]:
+                take(self._ranked(self._terms[term]))
+        return [self.entities[entity] for entity in picked]
+
+    def _candidates(self, raw: List[str], phrase: str) -> Set[int]:
+        entities: Set[int] = set()
+        # Codes only count when written in capitals ('GRU', 'LA'), so 'de' or 'la' never match
+        if len(raw) == 1 and raw[0].isupper() and 2 <= len(raw[0]) <= 5:
+            entities |= self._codes.get(raw[0], set())
+        if phrase in self._resolvable:
+            entities |= self._terms[phrase]
+        return entities
+
+    def _order(self, entities: Set[int], raw: List[str]) -> List[int]:
+        # A capitalised three-letter code is most likely an airport, a two-letter one an airline
+        code = raw[0] if len(raw) == 1 and raw[0].isupper() else ''
+        preferred = 'airport' if len(code) == 3 else 'airline' if len(code) == 2 else None
+        return sorted(entities, key=lambda entity: (self.kinds[entity] != preferred, -self.priority[entity], entity))
+
+    def resolve(self, question: str, max_candidates: int = 3) -> List[Dict[str, Any]]:
+        """
+        Entities named in a question, longest names first and without
+        overlaps: [{'text', 'start', 'end', 'fuzzy', 'candidates': [entity, ...]}]
+        in question order, candidates best first.
+        """
+        tokens = list(_TOKEN.finditer(question))
+        folded = [fold(token.group()) for token in tokens]
+        covered = [False] * len(tokens)
+        mentions = []
+
+        def mention(i: int, n: int, entities: List[int], fuzzy: bool):
+            start, end = tokens[i].start(), tokens[i + n - 1].end()
+            mentions.append({
+                'text': question[start:end], 'start': start, 'end': end, 'fuzzy': fuzzy,
+                'candidates': [self.entities[entity] for entity in entities[:max_candidates]],
+            })
+            covered[i:i + n] = [True] * n
+
+        for fuzzy in (False, True):
+            for n in range(MAX_MENTION_WORDS if not fuzzy else 2, 0, -1):
+                for i in range(len(tokens) - n + 1):
+                    if any(covered[i:i + n]) or not all(folded[i:i + n]):
+                        continue
+                    raw = [token.group() for token in tokens[i:i + n]]
+                    phrase = ' '.join(folded[i:i + n])
+                    if not fuzzy:
+                        entities = self._candidates(raw, phrase)
+                    elif len(phrase) >= 5 and n in self._fuzzy_names \
+                            and not any(word in STOPWORDS for word in folded[i:i + n]):
+                        similar = self._fuzzy_names[n].search(phrase, ENTITY_FUZZY_MIN_SIMILARITY)
+                        entities = self._terms[similar[0][1]] if similar else set()
+                    else:
+                        entities = set()
+                    if entities:
+                        mention(i, n, self._order(entities, raw), fuzzy)
+        return sorted(mentions, key=lambda found: found['start'])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'entities': {kind: self.kinds.count(kind) for kind in ENTITY_TYPES},
+            'terms': len(self._terms),
+            'prefix_keys': len(self._keys),
+            'precomputed_prefixes': len(self._top),
+            'seconds': self.seconds,
+        }
+
+
+def cypher_string(value: Any) -> str:
+    """A single-quoted Cypher string literal, with backslashes and quotes escaped"""
+    text = str(value).replace('\\', '\\\\').replace("'", "\\'")
+    return f"'{text}'"
+
+
+def describe_entity(entity: Dict[str, Any]) -> str:
+    """How a resolved entity is written in Cypher, for the generation prompt"""
+    kind = entity['type']
+    if kind == 'airport':
+        place = ', '.join(str(part) for part in (entity['city'], entity['country']) if part)
+        return f"Airport {{code: {cypher_string(entity['code'])}}} ({entity['label']}; {place})"
+    if kind == 'city':
+        return f"Airport city = {cypher_string(entity['label'])} (airports {', '.join(entity['airports'])})"
+    if kind == 'country':
+        values = ', '.join(cypher_string(value) for value in entity['values'])
+        return f"country IN [{values}] (Airport.country / Airline.country)"
+    code = cypher_string(entity['code'])
+    return f"Airline {{code: {code}}} ({entity['label']}); its routes have r.airline = {code}"
+
+
+def describe_mentions(mentions: List[Dict[str, Any]]) -> str:
+    """Prompt lines for resolved mentions, or '' when there are none"""
+    if not mentions:
+        return ""
+    lines = ["Resolved entities (use these exact values):"]
+    for found in mentions:
+        options = ' OR '.join(describe_entity(entity) for entity in found['candidates'])
+        lines.append(f'- "{found["text"]}" -> {options}')
+    return '\n'.join(lines)
+
@@ -0,0 +1,274 @@
+"""
+Vectorized ETL shared by every seed region.
+
+`build_dataset` turns the raw source frames (airports, routes and airline
+tables from dataset_store) into the airport, route and airline records the
+ingest queries expect. Every step is a column operation:
+
+  - airports: IATA code validation (3 letters), column renaming and
+    coordinate parsing from the "lon, lat" `coordinates` column
+  - routes: code normalization, placeholder airlines, numeric distance
+  - airlines: IATA, then ICAO, then Code as the airline code, resolved for
+    route airline codes with one merge instead of a scan per airline
+
+A region is an ISO country code (e.g. 'BR'): only airports of that country
+that take part in a domestic route are kept, along with those routes and the
+airlines operating them. region=None keeps the whole dataset.
+
+`iter_route_records` and `scan_route_keys` apply the same route transform
+to a CSV read in chunks, for route files too large to load at once.
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+# Route CSV lines read at a time by iter_route_frames
+STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', '50000'))
+
+PLACEHOLDER_VALUES = ['', 'unknown', 'null', 'none', 'nan']
+
+# Airline code columns in lookup priority order
+AIRLINE_CODE_COLUMNS = ['IATA', 'ICAO', 'Code']
+
+
+def _column(df: pd.DataFrame, name: str, default: Any = None) -> pd.Series:
+    """Column `name`, or a column of `default` when the source lacks it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """Stripped strings, with missing and placeholder values turned into None"""
+    text = series.astype(object).str.strip()
+    cleaned = text.mask(text.str.lower().isin(PLACEHOLDER_VALUES))
+    return cleaned.astype(object).where(cleaned.notna(), None)
+
+
+def parse_coordinates(coordinates: pd.Series) -> pd.DataFrame:
+    """'lon, lat' strings to float latitude/longitude columns, 0.0 when missing"""
+    parts = coordinates.astype(object).str.split(',', n=1, expand=True)
+    if parts.shape[1] < 2:
+        parts = parts.reindex(columns=[0, 1])
+    return pd.DataFrame({
+        'latitude': pd.to_numeric(parts[1], errors='coerce').fillna(0.0).astype(float),
+        'longitude': pd.to_numeric(parts[0], errors='coerce').fillna(0.0).astype(float),
+    }, index=coordinates.index)
+
+
+def normalize_airports(airports_df: pd.DataFrame) -> pd.DataFrame:
+    """Airports with a valid IATA code: code, name, city, country, latitude, longitude"""
+    codes = _column(airports_df, 'iata_code').astype(object).str.strip().str.upper()
+    valid = codes.str.fullmatch(r'[A-Z]{3}', na=False).astype(bool)
+    df = airports_df[valid]
+
+    airports = pd.DataFrame({
+        'code': codes[valid].astype(object),
+        'name': _column(df, 'name', '').fillna('').astype(str),
+        'city': _column(df, 'municipality', '').fillna('').astype(str),
+        'country': _column(df, 'iso_country', '').fillna('').astype(str).str.strip().str.upper(),
+    })
+    airports = airports.join(parse_coordinates(_column(df, 'coordinates')))
+    return airports.drop_duplicates('code', keep='first')
+
+
+def normalize_routes(routes_df: pd.DataFrame) -> pd.DataFrame:
+    """Routes as from, to, airline (None for placeholders) and distance"""
+    return pd.DataFrame({
+        'from': _column(routes_df, 'source_airport').astype(object).str.strip().str.upper().astype(object),
+        'to': _column(routes_df, 'destination_apirport').astype(object).str.strip().str.upper().astype(object),
+        'airline': _clean_text(_column(routes_df, 'airline')),
+        'distance': pd.to_numeric(_column(routes_df, 'distance'), errors='coerce').fillna(0.0).astype(float),
+    }).dropna(subset=['from', 'to'])
+
+
+def normalize_airlines(airline_tables: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    One row per airline code (code, name, country), from every airline table.
+    The code is the first of IATA, ICAO and Code that is set on each row.
+    """
+    airlines = pd.concat(airline_tables, ignore_index=True).drop_duplicates()
+    code = pd.Series(None, index=airlines.index, dtype=object)
+    for column in AIRLINE_CODE_COLUMNS:
+        code = code.fillna(_clean_text(_column(airlines, column)))
+    name = _clean_text(_column(airlines, 'Name')).fillna(_clean_text(_column(airlines, 'Airline')))
+
+    result = pd.DataFrame({
+        'code': code.astype(object).str.upper().astype(object),
+        'name': name,
+        'country': _clean_text(_column(airlines, 'Country')),
+    }).dropna(subset=['code'])
+    result['name'] = result['name'].fillna(result['code'])
+    return result.drop_duplicates('code', keep='first')
+
+
+def airline_lookup(airline_tables: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Every code an airline is known by (IATA, ICAO or Code, upper-cased) mapped
+    to its name and country, keeping the highest-priority column when two
+    airlines share a code.
+    """
+    airlines = pd.concat(airline_tables, ignore_index=True).drop_duplicates()
+    name = _clean_text(_column(airlines, 'Name')).fillna(_clean_text(_column(airlines, 'Airline')))
+    country = _clean_text(_column(airlines, 'Country'))
+    keyed = [
+        pd.DataFrame({
+            'key': _clean_text(_column(airlines, column)).astype(object).str.upper().astype(object),
+            'priority': priority,
+            'name': name,
+            'country': country,
+        })
+        for priority, column in enumerate(AIRLINE_CODE_COLUMNS)
+    ]
+    lookup = pd.concat(keyed, ignore_index=True).dropna(subset=['key'])
+    return lookup.sort_values('priority', kind='stable').drop_duplicates('key', keep='first')
+
+
+def resolve_airlines(codes: pd.Series, lookup: pd.DataFrame) -> pd.DataFrame:
+    """Airline records for `codes`, joined against the lookup; unknown codes keep the code as name"""
+    wanted = pd.DataFrame({'code': codes.dropna().astype(str).str.strip().str.upper().unique()})
+    resolved = wanted.merge(lookup[['key', 'name', 'country']], how='left', left_on='code', right_on='key')
+    resolved['name'] = resolved['name'].fillna(resolved['code'])
+    resolved['country'] = resolved['country'].fillna('Unknown')
+    return resolved[['code', 'name', 'country']]
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    # None instead of NaN, so missing values become nulls in Cypher. Numeric
+    # columns are already filled, so only text columns with gaps are converted.
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object and df[column].isna().any():
+            df[column] = df[column].where(df[column].notna(), None)
+    return df.to_dict('records')
+
+
+def region_airports(airports_df: pd.DataFrame, region: Optional[str] = None) -> pd.DataFrame:
+    """Normalized airports of one ISO country, or of every country with region=None"""
+    if region is not None:
+        # Filter before the string cleaning, which is the expensive part
+        country = _column(airports_df, 'iso_country').astype(object).str.strip().str.upper()
+        airports_df = airports_df[country == region.upper()]
+    return normalize_airports(airports_df)
+
+
+def transform_routes(routes_df: pd.DataFrame, region_codes: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Normalized routes. With `region_codes`, only routes between two of those
+    airports that have a known airline; without, every route, with missing
+    airlines attributed to 'Unknown' so they are still drawn.
+    """
+    routes = normalize_routes(routes_df)
+    if region_codes is None:
+        routes['airline'] = routes['airline'].fillna('Unknown')
+        return routes
+    routes = routes[routes['from'].isin(region_codes) & routes['to'].isin(region_codes)]
+    return routes.dropna(subset=['airline'])
+
+
+def _read_chunks(source: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if source.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    with pd.read_csv(source, dtype=str, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def iter_route_frames(source: str, region_codes: Optional[pd.Series] = None,
+                      chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a route CSV or Parquet file `chunk_rows` rows at a time and yield the
+    transformed routes of each chunk, so memory use stays flat however large
+    the file is.
+    """
+    for chunk in _read_chunks(source, chunk_rows):
+        routes = transform_routes(chunk, region_codes)
+        if len(routes):
+            yield routes
+
+
+def iter_route_records(source: str, region_codes: Optional[pd.Series] = None,
+                       chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[List[Dict[str, Any]]]:
+    """iter_route_frames as lists of route records for ingest.ROUTES_QUERY"""
+    for routes in iter_route_frames(source, region_codes, chunk_rows):
+        yield _records(routes)
+
+
+def scan_route_keys(source: str, region_codes: Optional[pd.Series] = None,
+                    chunk_rows: int = STREAM_CHUNK_ROWS) -> Tuple[Set[str], Set[str], int]:
+    """
+    One streaming pass over a route CSV: codes of the airports and airlines
+    the kept routes use, and how many routes there are. Bounded by the number
+    of airports and airlines, not routes.
+    """
+    airports: Set[str] = set()
+    airlines: Set[str] = set()
+    count = 0
+    for routes in iter_route_frames(source, region_codes, chunk_rows):
+        airports.update(routes['from'])
+        airports.update(routes['to'])
+        airlines.update(routes['airline'])
+        count += len(routes)
+    return airports, airlines, count
+
+
+def build_dataset(airports_df: pd.DataFrame, routes_df: pd.DataFrame,
+                  airline_tables: List[pd.DataFrame], region: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Airport, route and airline records ready for ingest.AIRPORTS_QUERY,
+    ROUTES_QUERY and AIRLINES_QUERY, for one ISO country or (region=None)
+    the whole dataset.
+    """
+    airports = region_airports(airports_df, region)
+
+    if region is None:
+        routes = transform_routes(routes_df)
+        airlines = normalize_airlines(airline_tables)
+    else:
+        routes = transform_routes(routes_df, airports['code'])
+        # Only airports that take part in a domestic route
+        used = pd.concat([routes['from'], routes['to']]).unique()
+        airports = airports[airports['code'].isin(used)]
+        airlines = resolve_airlines(routes['airline'], airline_lookup(airline_tables))
+
+    return {
+        'airports': _records(airports),
+        'routes': _records(routes),
+        'airlines': _records(airlines),
+    }
+
+
+def plan_streaming_dataset(airports_df: pd.DataFrame, airline_tables: List[pd.DataFrame], routes_source: str,
+                           region: Optional[str] = None, chunk_rows: int = STREAM_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Airport and airline records for a seed whose routes are streamed from
+    `routes_source` with iter_route_records, matching what build_dataset
+    would produce. A region needs one scan of the route file to find the
+    airports and airlines its routes use; the full dataset needs none.
+
+    Returns airports and airlines (records), region_codes (the route filter to
+    pass to iter_route_records) and routes (the route count, None when unknown).
+    """
+    airports = region_airports(airports_df, region)
+    if region is None:
+        return {
+            'airports': _records(airports),
+            'airlines': _records(normalize_airlines(airline_tables)),
+            'region_codes': None,
+            'routes': None,
+        }
+
+    region_codes = airports['code']
+    used_airports, used_airlines, route_count = scan_route_keys(routes_source, region_codes, chunk_rows)
+    airports = airports[airports['code'].isin(used_airports)]
+    airlines = resolve_airlines(pd.Series(sorted(used_airlines), dtype=object), airline_lookup(airline_tables))
+    return {
+        'airports': _records(airports),
+        'airlines': _records(airlines),
+        'region_codes': region_codes,
+        'routes': route_count,
+    }
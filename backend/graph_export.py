@@ -0,0 +1,267 @@
+"""
+Graph payload construction for /api/graph/data.
+
+The node and link formatting is shared by the buffered JSON response, the
+streaming NDJSON variant and the columnar binary encoding, so all of them
+describe the same records.
+
+Only `iter_graph_ndjson` talks to Neo4j, and it imports the database layer
+when it runs, so the formatting and encoders work without a connection.
+"""
+
+import json
+import struct
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Get nodes (airports and airlines) - no limit to show all data
+NODES_QUERY = """
+MATCH (n)
+WHERE n:Airport OR n:Airline
+RETURN id(n) as id, labels(n)[0] as label, properties(n) as properties
+"""
+
+# Get relationships - no limit to show all data
+LINKS_QUERY = """
+MATCH (a)-[r:ROUTE]->(b)
+RETURN id(a) as source, id(b) as target, type(r) as type, properties(r) as properties
+"""
+
+# Nodes and links written by a seed, looked up by business key for delta sync
+DELTA_NODES_QUERY = """
+MATCH (n)
+WHERE (n:Airport AND n.code IN $airports) OR (n:Airline AND n.code IN $airlines)
+RETURN id(n) as id, labels(n)[0] as label, properties(n) as properties
+"""
+
+DELTA_LINKS_QUERY = """
+UNWIND $routes as route
+MATCH (a:Airport {code: route[0]})-[r:ROUTE {airline: route[1]}]->(b:Airport {code: route[2]})
+RETURN id(a) as source, id(b) as target, type(r) as type, properties(r) as properties
+"""
+
+# Number of NDJSON lines grouped into one chunk written to the socket
+NDJSON_CHUNK_LINES = 500
+
+
+def is_meaningful(value) -> bool:
+    """False for null, empty and 'Unknown'-style placeholder values"""
+    return value is not None and value != '' and str(value).lower() not in ['unknown', 'null', 'none']
+
+
+def format_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a NODES_QUERY record into a visualization node"""
+    node_id = node['id']
+    label = node['label']
+    props = node['properties']
+
+    # Filter out null and 'Unknown' values
+    filtered_props = {key: value for key, value in props.items() if is_meaningful(value)}
+
+    # Add country to properties for easy access
+    if label == 'Airport':
+        filtered_props['country'] = filtered_props.get('country', 'Unknown')
+
+    return {
+        'id': str(node_id),
+        'label': label,
+        'name': filtered_props.get('name') or filtered_props.get('code', f"{label}_{node_id}"),
+        'country': filtered_props.get('country', 'Unknown') if label == 'Airport' else None,
+        **filtered_props
+    }
+
+
+def format_link(link: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a LINKS_QUERY record into a visualization link"""
+    link_props = link.get('properties', {})
+    return {
+        'source': str(link['source']),
+        'target': str(link['target']),
+        'type': link['type'],
+        'airline': link_props.get('airline', 'Unknown'),
+        'distance': link_props.get('distance_km', 0)
+    }
+
+
+async def iter_graph_ndjson(chunk_lines: int = NDJSON_CHUNK_LINES,
+                            stream_query: Optional[Callable[[str], AsyncIterator[Dict[str, Any]]]] = None
+                            ) -> AsyncIterator[bytes]:
+    """
+    Stream the graph as NDJSON: every node line, then every link line, then a
+    summary line. Each line is a single-key object ({"node": ...},
+    {"link": ...} or {"done": ...}) so clients can dispatch on the key.
+    Records are pulled from the Neo4j cursor as they arrive, so memory stays
+    bounded by `chunk_lines` regardless of the graph size. `stream_query`
+    yields the records of a query (database.stream_neo4j_query by default).
+    """
+    if stream_query is None:
+        from database import stream_neo4j_query as stream_query
+    buffer = []
+    counts = {'nodes': 0, 'links': 0}
+
+    async for record in stream_query(NODES_QUERY):
+        buffer.append(json.dumps({'node': format_node(record)}, default=str))
+        counts['nodes'] += 1
+        if len(buffer) >= chunk_lines:
+            yield ('\n'.join(buffer) + '\n').encode('utf-8')
+            buffer = []
+
+    async for record in stream_query(LINKS_QUERY):
+        buffer.append(json.dumps({'link': format_link(record)}, default=str))
+        counts['links'] += 1
+        if len(buffer) >= chunk_lines:
+            yield ('\n'.join(buffer) + '\n').encode('utf-8')
+            buffer = []
+
+    buffer.append(json.dumps({'done': counts}))
+    yield ('\n'.join(buffer) + '\n').encode('utf-8')
+
+
+# Negotiated via `Accept` or `?format=binary` on /api/graph/data
+BINARY_MEDIA_TYPE = "application/vnd.aerograph.graph"
+BINARY_MAGIC = b"AGB1"
+
+# Node columns stored as offset-encoded UTF-8 strings
+NODE_STRING_COLUMNS = ['id', 'name', 'code', 'city']
+# Node columns with few distinct values, stored dictionary-encoded
+NODE_DICTIONARY_COLUMNS = ['label', 'country']
+# Node columns stored as float32 (NaN when missing)
+NODE_FLOAT_COLUMNS = ['latitude', 'longitude', 'x', 'y']
+
+
+def _string_column(values: List[Optional[str]]):
+    """UTF-8 blob plus uint32 offsets (n + 1 entries), Arrow style"""
+    encoded = [('' if v is None else str(v)).encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets.tobytes(), b''.join(encoded)
+
+
+def _dictionary_column(values: List[Optional[str]]):
+    """Distinct values plus int32 indices into them (-1 for missing)"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return [str(v) for v in uniques], codes.astype('<i4').tobytes()
+
+
+def _float_column(values) -> bytes:
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype='<f4').tobytes()
+
+
+def encode_graph_binary(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]], graph_version: int = 0) -> bytes:
+    """
+    Encode a graph payload in the AGB1 columnar layout.
+
+    Layout (all integers little-endian):
+      bytes 0-3   magic "AGB1"
+      bytes 4-7   uint32 header length H
+      H bytes     UTF-8 JSON header
+      padding     zero bytes up to the next multiple of 8
+      body        the sections listed in the header, each 8-byte aligned
+
+    The header holds node_count, link_count, graph_version, the dictionaries
+    of dictionary-encoded columns and a `sections` list of
+    {name, dtype, offset, length}, where offset is relative to the body start
+    and dtype is one of uint32, int32, float32 or utf8. This maps directly
+    onto JavaScript typed arrays (new Int32Array(buffer, offset, length / 4)).
+
+    Node sections: <col>.offsets/<col>.data for id, name, code, city;
+    <col>.indices for label and country; latitude, longitude and the
+    server-side layout position x, y as float32.
+    Link sections: source and target as int32 indices into the node table,
+    distance as float32, airline and type as int32 dictionary indices.
+    Links whose endpoints are not in the node table are dropped.
+    """
+    sections = []
+    chunks = []
+    body_length = 0
+
+    def add_section(name: str, dtype: str, data: bytes):
+        nonlocal body_length
+        sections.append({'name': name, 'dtype': dtype, 'offset': body_length, 'length': len(data)})
+        padding = (-len(data)) % 8
+        chunks.append(data + b'\0' * padding)
+        body_length += len(data) + padding
+
+    dictionaries = {}
+
+    for column in NODE_STRING_COLUMNS:
+        offsets, data = _string_column([node.get(column) for node in nodes])
+        add_section(f'{column}.offsets', 'uint32', offsets)
+        add_section(f'{column}.data', 'utf8', data)
+
+    for column in NODE_DICTIONARY_COLUMNS:
+        dictionary, indices = _dictionary_column([node.get(column) for node in nodes])
+        dictionaries[column] = dictionary
+        add_section(f'{column}.indices', 'int32', indices)
+
+    for column in NODE_FLOAT_COLUMNS:
+        add_section(column, 'float32', _float_column([node.get(column) for node in nodes]))
+
+    node_index = pd.Index([node['id'] for node in nodes])
+    sources = node_index.get_indexer([link['source'] for link in links])
+    targets = node_index.get_indexer([link['target'] for link in links])
+    keep = (sources >= 0) & (targets >= 0)
+    kept_links = [link for link, kept in zip(links, keep) if kept]
+
+    add_section('link.source', 'int32', sources[keep].astype('<i4').tobytes())
+    add_section('link.target', 'int32', targets[keep].astype('<i4').tobytes())
+    add_section('link.distance', 'float32', _float_column([link.get('distance') for link in kept_links]))
+
+    for column in ['airline', 'type']:
+        dictionary, indices = _dictionary_column([link.get(column) for link in kept_links])
+        dictionaries[f'link.{column}'] = dictionary
+        add_section(f'link.{column}.indices', 'int32', indices)
+
+    header = json.dumps({
+        'format': 'AGB1',
+        'graph_version': graph_version,
+        'node_count': len(nodes),
+        'link_count': len(kept_links),
+        'dictionaries': dictionaries,
+        'sections': sections,
+    }, separators=(',', ':')).encode('utf-8')
+    prefix = BINARY_MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * ((-len(prefix)) % 8)
+    return prefix + b''.join(chunks)
+
+
+def decode_graph_binary(payload: bytes) -> Dict[str, Any]:
+    """Decode an AGB1 payload back into {'nodes': [...], 'links': [...]}"""
+    if payload[:4] != BINARY_MAGIC:
+        raise ValueError("Not an AGB1 payload")
+    (header_length,) = struct.unpack('<I', payload[4:8])
+    header = json.loads(payload[8:8 + header_length])
+    body_start = 8 + header_length
+    body_start += (-body_start) % 8
+    dtypes = {'uint32': '<u4', 'int32': '<i4', 'float32': '<f4'}
+
+    def section(name):
+        info = next(s for s in header['sections'] if s['name'] == name)
+        raw = payload[body_start + info['offset']:body_start + info['offset'] + info['length']]
+        return raw if info['dtype'] == 'utf8' else np.frombuffer(raw, dtype=dtypes[info['dtype']])
+
+    def strings(column):
+        offsets, data = section(f'{column}.offsets'), section(f'{column}.data')
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def lookup(column, indices):
+        dictionary = header['dictionaries'][column]
+        return [dictionary[i] if i >= 0 else None for i in indices]
+
+    columns = {column: strings(column) for column in NODE_STRING_COLUMNS}
+    for column in NODE_DICTIONARY_COLUMNS:
+        columns[column] = lookup(column, section(f'{column}.indices'))
+    for column in NODE_FLOAT_COLUMNS:
+        columns[column] = [None if np.isnan(v) else float(v) for v in section(column)]
+    nodes = [{column: values[i] for column, values in columns.items()} for i in range(header['node_count'])]
+
+    ids = columns['id']
+    airlines = lookup('link.airline', section('link.airline.indices'))
+    types = lookup('link.type', section('link.type.indices'))
+    links = [
+        {'source': ids[s], 'target': ids[t], 'type': types[i], 'airline': airlines[i], 'distance': float(d)}
+        for i, (s, t, d) in enumerate(zip(section('link.source'), section('link.target'), section('link.distance')))
+    ]
+    return {'graph_version': header['graph_version'], 'nodes': nodes, 'links': links}
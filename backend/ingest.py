@@ -0,0 +1,193 @@
+"""
+Chunked, parallel ingest for the seed loaders.
+
+Rows are split into chunks of INGEST_BATCH_SIZE and each chunk is written by
+its own `UNWIND $batch` transaction, so no single transaction has to hold the
+whole dataset (parameter payload and heap stay bounded) and a failure only
+loses the chunk that failed. A pool of INGEST_WORKERS workers, each holding
+one session, pulls chunks from a shared queue. Chunks failing with a
+transient error (deadlocks between workers merging routes on the same
+airports, leader switches, dropped connections) are retried with backoff on
+a fresh session.
+
+`ingest_stream` takes records from an async source (such as a chunked CSV
+reader) through a bounded queue, so sources larger than memory can be
+loaded; `ingest_rows` is the same engine for a list already in memory.
+
+Callers keep ordering between datasets by awaiting one ingest before
+starting the next: airports must be committed before the routes that MATCH
+them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+from database import get_driver, neo4j_database
+
+# Rows per UNWIND transaction
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '5000'))
+# Concurrent sessions writing chunks
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', '4'))
+# Attempts per chunk after the first one, and the base of the exponential backoff
+INGEST_MAX_RETRIES = int(os.environ.get('INGEST_MAX_RETRIES', '3'))
+INGEST_RETRY_BACKOFF = float(os.environ.get('INGEST_RETRY_BACKOFF', '0.5'))
+
+RETRYABLE_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
+AIRPORTS_QUERY = """
+UNWIND $batch as airport
+MERGE (a:Airport {code: airport.code})
+SET a.name = airport.name,
+    a.city = airport.city,
+    a.country = airport.country,
+    a.latitude = coalesce(airport.latitude, a.latitude),
+    a.longitude = coalesce(airport.longitude, a.longitude),
+    a.location = CASE WHEN airport.latitude IS NULL OR airport.longitude IS NULL THEN a.location
+                      WHEN airport.latitude = 0.0 AND airport.longitude = 0.0 THEN null
+                      ELSE point({latitude: airport.latitude, longitude: airport.longitude}) END
+"""
+
+ROUTES_QUERY = """
+UNWIND $batch as route
+MATCH (a:Airport)
+WHERE a.code = route.from
+MATCH (b:Airport)
+WHERE b.code = route.to
+MERGE (a)-[r:ROUTE {airline: route.airline}]->(b)
+SET r.distance_km = route.distance,
+    r.duration_hours = coalesce(route.duration, r.duration_hours)
+"""
+
+AIRLINES_QUERY = """
+UNWIND $batch as airline
+MERGE (al:Airline {code: airline.code})
+SET al.name = airline.name,
+    al.country = coalesce(airline.country, al.country)
+"""
+
+# progress(label, rows written so far, total rows or None when streaming)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class IngestError(Exception):
+    """A chunk kept failing after every retry"""
+
+
+async def _write_chunk(tx, query: str, batch: List[Dict[str, Any]]):
+    result = await tx.run(query, {'batch': batch})
+    await result.consume()
+
+
+def chunked(rows: List[Any], size: int) -> List[List[Any]]:
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+
+async def iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Pull items from a blocking iterator (e.g. a chunked CSV reader) in a worker thread"""
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def ingest_stream(query: str, source: AsyncIterator[List[Dict[str, Any]]], label: str = 'rows',
+                        batch_size: Optional[int] = None, workers: Optional[int] = None,
+                        progress: Optional[ProgressCallback] = None, total: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Write the record lists produced by `source` with `query`, re-cut into
+    chunks of `batch_size` and spread over a bounded pool of sessions.
+
+    The queue between the producer and the workers holds at most two chunks
+    per worker, so a producer reading faster than Neo4j writes waits
+    (backpressure) and memory stays bounded by the batch size, whatever the
+    length of the source. Returns rows, chunks, retries, seconds and
+    rows_per_sec. Raises IngestError once a chunk has used up its retries;
+    chunks committed before that stay committed.
+    """
+    batch_size = max(1, batch_size or INGEST_BATCH_SIZE)
+    workers = max(1, workers or INGEST_WORKERS)
+    stats = {'label': label, 'rows': 0, 'chunks': 0, 'retries': 0,
+             'batch_size': batch_size, 'workers': workers}
+    started = time.perf_counter()
+    if progress is not None:
+        progress(label, 0, total)
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+    of_total = f"/{total}" if total is not None else ''
+
+    async def producer():
+        async for records in source:
+            for chunk in chunked(records, batch_size):
+                stats['chunks'] += 1
+                await queue.put((stats['chunks'], chunk))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def worker():
+        session = None
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                number, chunk = item
+                for attempt in range(INGEST_MAX_RETRIES + 1):
+                    if session is None:
+                        session = get_driver().session(database=neo4j_database)
+                    try:
+                        await session.execute_write(_write_chunk, query, chunk)
+                        break
+                    except RETRYABLE_ERRORS as e:
+                        # The session may be bound to a dead connection; start over on a new one
+                        await session.close()
+                        session = None
+                        if attempt == INGEST_MAX_RETRIES:
+                            raise IngestError(
+                                f"{label} chunk {number} failed after {attempt + 1} attempts: {e}"
+                            ) from e
+                        stats['retries'] += 1
+                        delay = INGEST_RETRY_BACKOFF * 2 ** attempt
+                        logging.warning(f"Retrying {label} chunk {number} in {delay:.1f}s: {e}")
+                        await asyncio.sleep(delay)
+                stats['rows'] += len(chunk)
+                if progress is not None:
+                    progress(label, stats['rows'], total)
+                logging.info(f"Ingested {label}: {stats['rows']}{of_total}")
+        finally:
+            if session is not None:
+                await session.close()
+
+    tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # One failing task stops the others instead of letting them drain the source
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    stats['rows_per_sec'] = round(stats['rows'] / stats['seconds']) if stats['seconds'] > 0 else None
+    logging.info(
+        f"Ingested {stats['rows']} {label} in {stats['chunks']} chunks with {workers} workers "
+        f"({stats['seconds']}s, {stats['rows_per_sec']} rows/s, {stats['retries']} retries)"
+    )
+    return stats
+
+
+async def ingest_rows(query: str, rows: List[Dict[str, Any]], label: str = 'rows',
+                      batch_size: Optional[int] = None, workers: Optional[int] = None,
+                      progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """ingest_stream over rows already in memory"""
+    async def source():
+        yield rows
+
+    return await ingest_stream(query, source(), label=label, batch_size=batch_size,
+                               workers=workers, progress=progress, total=len(rows))
@@ -0,0 +1,388 @@
+"""
+Deterministic fast path for common GraphRAG questions.
+
+A question is reduced to its folded words with the entities resolved by
+entity_index in place of their names ('rotas da LATAM saindo de GRU' ->
+'rotas da @airline saindo de @airport'). Each intent has a keyword pattern,
+the words it understands and the entity slots it accepts. It only matches
+when every word of the question is one of those, a filler word or a slot
+it uses, so a question with anything the template would ignore ('... com
+mais de 10 rotas') still goes to the LLM. A match is a fixed Cypher
+template with parameters and an answer built from its results, with no
+LLM round trip.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from entity_index import fold
+
+# Set to false to send every question to the LLM
+INTENT_FAST_PATH = os.environ.get('INTENT_FAST_PATH', 'true').lower() == 'true'
+
+# Rows returned by list templates, and the most a number in the question can ask for
+LIST_LIMIT = 50
+
+# Words that never change what a question asks, in Portuguese and English
+FILLER = set("""
+quais qual quem me mostre mostrar mostra liste listar lista exiba exibir ver quero saber todos todas
+todo toda os as o a e um uma sao estao existem existe ha tem cadastrados cadastradas registrados
+registradas de do da dos das em no na nos nas ao aos
+what which show list all the are is there give me please exist in of
+""".split())
+
+# Just before a place, these make it the destination instead of the origin
+TO_WORDS = {'para', 'pra', 'ate', 'chegam', 'chegando', 'chegada', 'destino', 'to', 'into'}
+ARTICLES = {'o', 'a', 'os', 'as', 'the'}
+
+PLACE_TYPES = ('airport', 'city', 'country')
+
+Template = Tuple[str, Dict[str, Any], Callable[[List[Dict[str, Any]]], str]]
+
+
+class Question:
+    """A question as folded words, entity mentions replaced by '@<type>' and numbers by '#'"""
+
+    def __init__(self, text: str, mentions: List[Dict[str, Any]]):
+        self.words: List[str] = []
+        self.numbers: List[int] = []
+        # Resolved entity, the text naming it and whether it is an origin or destination
+        self.slots: List[Dict[str, Any]] = []
+        position = 0
+        for mention in mentions + [None]:
+            end = mention['start'] if mention else len(text)
+            for word in fold(text[position:end]).split():
+                if word.isdigit():
+                    self.numbers.append(int(word))
+                    word = '#'
+                self.words.append(word)
+            if mention is None:
+                break
+            entity = mention['candidates'][0]
+            self.slots.append({'entity': entity, 'text': mention['text'], 'direction': self._direction()})
+            self.words.append('@' + entity['type'])
+            position = mention['end']
+        self.text = ' '.join(self.words)
+
+    def _direction(self) -> str:
+        previous = [word for word in self.words if word not in ARTICLES]
+        return 'to' if previous and previous[-1] in TO_WORDS else 'from'
+
+    def of_type(self, *types: str) -> List[Dict[str, Any]]:
+        return [slot for slot in self.slots if slot['entity']['type'] in types]
+
+    def limit(self, default: int) -> int:
+        """The number in the question as a row count (1..LIST_LIMIT), or `default`"""
+        return max(1, min(self.numbers[0], LIST_LIMIT)) if self.numbers else default
+
+
+class Intent:
+    """
+    One question shape: `pattern` must be found in Question.text, every
+    word must be in `vocabulary` or FILLER, and `slots` caps the entities
+    per type ('#' for numbers). `build` returns the template or None.
+    """
+
+    def __init__(self, name: str, pattern: str, vocabulary: str, slots: Dict[str, int],
+                 build: Callable[[Question], Optional[Template]]):
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.vocabulary = set(vocabulary.split())
+        self.slots = slots
+        self.build = build
+
+    def match(self, question: Question) -> Optional[Template]:
+        if not self.pattern.search(question.text):
+            return None
+        counts = Counter(slot['entity']['type'] for slot in question.slots)
+        counts['#'] = len(question.numbers)
+        if any(count > self.slots.get(kind, 0) for kind, count in counts.items()):
+            return None
+        if not all(word in self.vocabulary or word in FILLER or word[0] in '@#' for word in question.words):
+            return None
+        return self.build(question)
+
+
+class IntentMatch:
+    """A matched intent: Cypher template, its parameters and the answer for its results"""
+
+    def __init__(self, intent: str, cypher: str, parameters: Dict[str, Any],
+                 answer: Callable[[List[Dict[str, Any]]], str]):
+        self.intent = intent
+        self.cypher = cypher
+        self.parameters = parameters
+        self.answer = answer
+
+
+# Templates
+
+def place_condition(node: str, slot: Dict[str, Any], name: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """WHERE condition placing `node` in an airport, city or country slot, with parameter `name`"""
+    entity = slot['entity']
+    if entity['type'] == 'country':
+        name = name or 'countries'
+        return f"{node}.country IN ${name}", {name: entity['values']}
+    name = name or 'codes'
+    codes = entity['airports'] if entity['type'] == 'city' else [entity['code']]
+    return f"{node}.code IN ${name}", {name: codes}
+
+
+def where(conditions: List[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def route_conditions(question: Question) -> Optional[Tuple[List[str], Dict[str, Any], str]]:
+    """
+    Conditions on (a)-[r:ROUTE]->(b) for the places and airline of a
+    question, and how to say them. None when the places don't read as an
+    origin and a destination ('de GRU e GIG').
+    """
+    places = question.of_type(*PLACE_TYPES)
+    if len(places) > 2:
+        return None
+    if len(places) == 2:
+        if places[0]['direction'] == places[1]['direction'] and \
+                not re.search(r'\b(entre|between)\b', question.text):
+            return None
+        origin, destination = places if places[0]['direction'] == 'from' else places[::-1]
+        ends = [('a', origin, 'origins'), ('b', destination, 'destinations')]
+        phrase = f" de {origin['text']} para {destination['text']}"
+    elif len(places) == 1:
+        outgoing = places[0]['direction'] == 'from'
+        ends = [('a' if outgoing else 'b', places[0], 'origins' if outgoing else 'destinations')]
+        phrase = f" {'de' if outgoing else 'para'} {places[0]['text']}"
+    else:
+        ends, phrase = [], ""
+    conditions, parameters = [], {}
+    for node, slot, name in ends:
+        condition, values = place_condition(node, slot, name)
+        conditions.append(condition)
+        parameters.update(values)
+    for slot in question.of_type('airline'):
+        conditions.append("r.airline = $airline")
+        parameters['airline'] = slot['entity']['code']
+        phrase += f" da {slot['text']}"
+    return conditions, parameters, phrase
+
+
+def route_text(row: Dict[str, Any]) -> str:
+    distance = (row.get('r') or {}).get('distance_km')
+    text = f"{(row.get('a') or {}).get('code')} → {(row.get('b') or {}).get('code')}"
+    return f"{text} ({distance:.0f} km)" if isinstance(distance, (int, float)) else text
+
+
+def listing(noun: str, phrase: str) -> Callable[[List[Dict[str, Any]]], str]:
+    def answer(results: List[Dict[str, Any]]) -> str:
+        if not results:
+            return f"Nenhum resultado encontrado: {noun}{phrase}."
+        if len(results) >= LIST_LIMIT:
+            return f"Mostrando os primeiros {len(results)} resultados: {noun}{phrase}."
+        return f"Encontrados {len(results)} resultados: {noun}{phrase}."
+    return answer
+
+
+def total(noun: str, phrase: str) -> Callable[[List[Dict[str, Any]]], str]:
+    def answer(results: List[Dict[str, Any]]) -> str:
+        count = results[0].get('total', 0) if results else 0
+        return f"Há {count} {noun}{phrase}."
+    return answer
+
+
+def build_airports_per_country(question: Question) -> Optional[Template]:
+    def answer(results):
+        top = ', '.join(f"{row.get('country')} ({row.get('total')})" for row in results[:5])
+        return f"Aeroportos por país em {len(results)} países; os maiores: {top}." if results else \
+            "Nenhum aeroporto encontrado."
+    cypher = f"MATCH (a:Airport) RETURN a.country as country, count(a) as total ORDER BY total DESC LIMIT {LIST_LIMIT}"
+    return cypher, {}, answer
+
+
+def build_count_airports(question: Question) -> Optional[Template]:
+    places = question.of_type('city', 'country')
+    if len(places) > 1:
+        return None
+    conditions, parameters, phrase = [], {}, ""
+    if places:
+        condition, parameters = place_condition('a', places[0])
+        conditions, phrase = [condition], f" em {places[0]['text']}"
+    return f"MATCH (a:Airport){where(conditions)} RETURN count(a) as total", parameters, total('aeroportos', phrase)
+
+
+def build_count_airlines(question: Question) -> Optional[Template]:
+    countries = question.of_type('country')
+    conditions, parameters, phrase = [], {}, ""
+    if countries:
+        conditions, parameters = ["al.country IN $countries"], {'countries': countries[0]['entity']['values']}
+        phrase = f" em {countries[0]['text']}"
+    return (f"MATCH (al:Airline){where(conditions)} RETURN count(al) as total", parameters,
+            total('companhias aéreas', phrase))
+
+
+def build_count_routes(question: Question) -> Optional[Template]:
+    conditions = route_conditions(question)
+    if conditions is None:
+        return None
+    conditions, parameters, phrase = conditions
+    cypher = f"MATCH (a:Airport)-[r:ROUTE]->(b:Airport){where(conditions)} RETURN count(r) as total"
+    return cypher, parameters, total('rotas', phrase)
+
+
+def build_extreme_route(question: Question) -> Optional[Template]:
+    shortest = re.search(r'\b(curt[ao]s?|menor(es)?|shortest)\b', question.text) is not None
+    conditions = route_conditions(question)
+    if conditions is None:
+        return None
+    conditions, parameters, phrase = conditions
+    plural = re.search(r'\b(rotas|voos|routes|flights)\b', question.text) is not None
+    parameters['limit'] = question.limit(10 if plural else 1)
+    cypher = (f"MATCH (a:Airport)-[r:ROUTE]->(b:Airport)"
+              f"{where(['r.distance_km IS NOT NULL'] + conditions)} "
+              f"RETURN a, r, b ORDER BY r.distance_km {'ASC' if shortest else 'DESC'} LIMIT $limit")
+    adjective = 'curta' if shortest else 'longa'
+
+    def answer(results):
+        if not results:
+            return f"Nenhuma rota com distância encontrada{phrase}."
+        if len(results) == 1:
+            return f"A rota mais {adjective}{phrase} é {route_text(results[0])}."
+        return f"As {len(results)} rotas mais {adjective}s{phrase}: {', '.join(route_text(row) for row in results)}."
+    return cypher, parameters, answer
+
+
+def build_top_hubs(question: Question) -> Optional[Template]:
+    countries = question.of_type('country')
+    limit = question.limit(20)
+    if countries:
+        cypher = ("MATCH (a:Airport) WHERE a.country IN $countries AND a.hub_rank IS NOT NULL "
+                  "RETURN a ORDER BY a.hub_rank LIMIT $limit")
+        parameters = {'countries': countries[0]['entity']['values'], 'limit': limit}
+        phrase = f" em {countries[0]['text']}"
+    else:
+        cypher, parameters, phrase = "MATCH (a:Airport) WHERE a.hub_rank <= $limit RETURN a ORDER BY a.hub_rank", \
+            {'limit': limit}, ""
+
+    def answer(results):
+        if not results:
+            return f"Nenhum hub encontrado{phrase} (os rankings são calculados após cada carga)."
+        return f"Maiores hubs{phrase} por PageRank: {', '.join(str((row.get('a') or {}).get('code')) for row in results[:10])}."
+    return cypher, parameters, answer
+
+
+def build_busiest(node: str, label: str, count: str, noun: str) -> Callable[[Question], Optional[Template]]:
+    """
+    Airports or airlines with the most routes (a precomputed ranking
+    property): the top N, or those above 'mais de N rotas'.
+    """
+    def build(question: Question) -> Optional[Template]:
+        conditions, parameters, phrase = [], {}, ""
+        countries = question.of_type('country')
+        if countries:
+            conditions.append(f"{node}.country IN $countries")
+            parameters['countries'] = countries[0]['entity']['values']
+            phrase = f" em {countries[0]['text']}"
+        if re.search(r'\bmais de #', question.text):
+            conditions.append(f"{node}.{count} > $min_routes")
+            parameters['min_routes'] = question.numbers[0]
+            phrase += f" com mais de {question.numbers[0]} rotas"
+            limit = f"LIMIT {LIST_LIMIT}"
+        else:
+            conditions.append(f"{node}.{count} > 0")
+            parameters['limit'] = question.limit(20)
+            limit = "LIMIT $limit"
+        cypher = f"MATCH ({node}:{label}){where(conditions)} RETURN {node} ORDER BY {node}.{count} DESC {limit}"
+
+        def answer(results):
+            if not results:
+                return f"Nenhum resultado encontrado: {noun}{phrase} (os rankings são calculados após cada carga)."
+            top = ', '.join(f"{row[node].get('code')} ({row[node].get(count)})" for row in results[:5] if row.get(node))
+            return f"{len(results)} {noun}{phrase}, com mais rotas primeiro: {top}."
+        return cypher, parameters, answer
+    return build
+
+
+def build_airlines_in_country(question: Question) -> Optional[Template]:
+    countries = question.of_type('country')
+    if not countries:
+        return None
+    cypher = (f"MATCH (al:Airline) WHERE al.country IN $countries "
+              f"RETURN al ORDER BY coalesce(al.route_count, 0) DESC, al.code LIMIT {LIST_LIMIT}")
+    return cypher, {'countries': countries[0]['entity']['values']}, \
+        listing('companhias aéreas', f" em {countries[0]['text']}")
+
+
+def build_airports_in_place(question: Question) -> Optional[Template]:
+    places = question.of_type('city', 'country')
+    if len(places) != 1:
+        return None
+    condition, parameters = place_condition('a', places[0])
+    cypher = (f"MATCH (a:Airport) WHERE {condition} "
+              f"RETURN a ORDER BY coalesce(a.out_degree, 0) DESC, a.code LIMIT {LIST_LIMIT}")
+    return cypher, parameters, listing('aeroportos', f" em {places[0]['text']}")
+
+
+def build_routes(question: Question) -> Optional[Template]:
+    conditions = route_conditions(question) if question.slots else None
+    if conditions is None:
+        return None
+    conditions, parameters, phrase = conditions
+    cypher = (f"MATCH (a:Airport)-[r:ROUTE]->(b:Airport){where(conditions)} "
+              f"RETURN a, r, b ORDER BY a.code, b.code LIMIT {LIST_LIMIT}")
+    return cypher, parameters, listing('rotas', phrase)
+
+
+COUNT = r'\b(quant[oa]s|quantidade|numero|how many|count|total)\b'
+AIRPORT = r'\b(aeroportos?|airports?)\b'
+AIRLINE = r'\b(companhias?|cias?|linhas? aereas?|airlines?)\b'
+ROUTE = r'\b(rotas?|voos?|routes?|flights?|conexoes|ligacoes)\b'
+
+COUNT_WORDS = "quantos quantas quantidade numero how many count total existem"
+AIRPORT_WORDS = "aeroporto aeroportos airport airports"
+AIRLINE_WORDS = "companhia companhias cia cias aerea aereas linha linhas airline airlines operam"
+ROUTE_WORDS = ("rota rotas voo voos route routes flight flights conexoes ligacoes saem sai saindo partem "
+               "partindo partir para pra ate chegam chegando chegada destino to from into entre between and "
+               "operadas operados operada pela pelo by operated diretos diretas direct")
+BUSIEST_WORDS = "com mais rotas voos conexoes maiores top que tem operam saindo partindo"
+
+# Checked in order; the first that matches answers the question
+INTENTS = [
+    Intent('airports_per_country', COUNT + r'.*' + AIRPORT + r'.*\b(cada|por|per|each)\b (pais|country)\b',
+           f"{COUNT_WORDS} {AIRPORT_WORDS} cada por per each pais paises country countries", {},
+           build_airports_per_country),
+    Intent('count_airports', COUNT + r'.*' + AIRPORT,
+           f"{COUNT_WORDS} {AIRPORT_WORDS}", {'city': 1, 'country': 1}, build_count_airports),
+    Intent('count_airlines', COUNT + r'.*' + AIRLINE,
+           f"{COUNT_WORDS} {AIRLINE_WORDS}", {'country': 1}, build_count_airlines),
+    Intent('count_routes', COUNT + r'.*' + ROUTE,
+           f"{COUNT_WORDS} {ROUTE_WORDS}", {'airport': 2, 'city': 2, 'country': 2, 'airline': 1}, build_count_routes),
+    Intent('extreme_route', r'\bmais (long|curt|distant)|\b(longest|shortest)\b|\b(maior(es)?|menor(es)?) (rotas?|voos?)\b',
+           f"{ROUTE_WORDS} mais longa longas longo longos curta curtas curto curtos distante distantes "
+           "maior maiores menor menores longest shortest distancia",
+           {'airport': 1, 'city': 1, 'country': 1, 'airline': 1, '#': 1}, build_extreme_route),
+    Intent('top_hubs', r'\bhubs?\b',
+           f"maiores principais hub hubs top biggest largest main major {AIRPORT_WORDS}",
+           {'country': 1, '#': 1}, build_top_hubs),
+    Intent('busiest_airlines', AIRLINE + r'.*\bmais (de # )?(rotas|voos)\b',
+           f"{AIRLINE_WORDS} {BUSIEST_WORDS}", {'country': 1, '#': 1},
+           build_busiest('al', 'Airline', 'route_count', 'companhias aéreas')),
+    Intent('busiest_airports', AIRPORT + r'.*\bmais (de # )?(rotas|voos|conexoes)\b',
+           f"{AIRPORT_WORDS} {BUSIEST_WORDS}", {'country': 1, '#': 1},
+           build_busiest('a', 'Airport', 'out_degree', 'aeroportos')),
+    Intent('airlines_in_country', AIRLINE,
+           f"{AIRLINE_WORDS} sediadas baseadas based", {'country': 1}, build_airlines_in_country),
+    Intent('airports_in_place', AIRPORT,
+           f"{AIRPORT_WORDS} localizados located situados", {'city': 1, 'country': 1}, build_airports_in_place),
+    Intent('routes', ROUTE, ROUTE_WORDS, {'airport': 2, 'city': 2, 'country': 2, 'airline': 1}, build_routes),
+]
+
+
+def match_intent(question: str, mentions: List[Dict[str, Any]]) -> Optional[IntentMatch]:
+    """The template answering `question` (with its entity_index mentions), or None for the LLM"""
+    parsed = Question(question, mentions)
+    for intent in INTENTS:
+        template = intent.match(parsed)
+        if template is not None:
+            cypher, parameters, answer = template
+            return IntentMatch(intent.name, cypher, parameters, answer)
+    return None
@@ -0,0 +1,285 @@
+"""
+Itinerary search on the in-process route graph (route_graph.RouteGraph).
+
+Connections between two airports are collapsed into one weighted edge: the
+shortest distance_km among the routes of the allowed airlines (routes
+without a distance are skipped). A search first computes the exact distance
+from every airport to the destination, per number of remaining flights when
+stops are limited (`distances_to`: Bellman-Ford rounds as numpy operations
+over all pairs at once). With those as the heuristic, an A* search from the
+origin (`guided_path`) only expands airports on or next to the shortest
+itinerary. `k_shortest_paths` is Yen's algorithm on top, giving loopless
+alternatives in order of total distance; every spur search reuses the same
+distances.
+
+A RouteView (adjacency for one airline filter) is built once per snapshot
+and filter, and a batch reuses the destination distances for all pairs
+with the same destination.
+"""
+
+import heapq
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from route_graph import RouteGraph
+
+# Upper bounds accepted by the API
+ITINERARY_MAX_STOPS = int(os.environ.get('ITINERARY_MAX_STOPS', '4'))
+ITINERARY_MAX_K = int(os.environ.get('ITINERARY_MAX_K', '10'))
+ITINERARY_MAX_BATCH = int(os.environ.get('ITINERARY_MAX_BATCH', '500'))
+# RouteViews kept per (snapshot, airline filter)
+ITINERARY_VIEW_CACHE = int(os.environ.get('ITINERARY_VIEW_CACHE', '32'))
+
+Path = Tuple[float, List[int]]
+
+
+class RouteView:
+    """Weighted adjacency lists of one snapshot restricted to some airlines"""
+
+    def __init__(self, graph: RouteGraph, airlines: Optional[Iterable[str]] = None):
+        self.graph = graph
+        self.airlines = frozenset(airlines) if airlines else None
+        count = graph.airport_count
+
+        usable = ~np.isnan(graph.distances) & (graph.sources != graph.targets)
+        if self.airlines is not None:
+            wanted = np.flatnonzero(np.isin(graph.airlines, list(self.airlines)))
+            usable &= np.isin(graph.edge_airlines, wanted)
+        self.edge_mask = usable
+        sources, targets = graph.sources[usable], graph.targets[usable]
+        distances = graph.distances[usable].astype(np.float64)
+
+        # Shortest route per airport pair
+        keys = sources * max(count, 1) + targets
+        order = np.lexsort((distances, keys))
+        first = np.r_[True, keys[order][1:] != keys[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+        picked = order[first]
+        # Pair arrays, grouped by source, for distances_to
+        self.pair_sources, self.pair_targets = sources[picked], targets[picked]
+        self.pair_distances = distances[picked]
+        group_starts = np.flatnonzero(np.r_[True, self.pair_sources[1:] != self.pair_sources[:-1]]) \
+            if len(picked) else np.zeros(0, dtype=np.int64)
+        self.group_starts, self.group_sources = group_starts, self.pair_sources[group_starts]
+        sources, targets, distances = sources[picked].tolist(), targets[picked].tolist(), distances[picked].tolist()
+
+        self.outgoing: List[List[Tuple[int, float]]] = [[] for _ in range(count)]
+        self.incoming: List[List[Tuple[int, float]]] = [[] for _ in range(count)]
+        self.weight: Dict[Tuple[int, int], float] = {}
+        for source, target, distance in zip(sources, targets, distances):
+            self.outgoing[source].append((target, distance))
+            self.incoming[target].append((source, distance))
+            self.weight[(source, target)] = distance
+
+    def leg_airlines(self, source: int, target: int) -> List[str]:
+        """Allowed airlines flying source -> target"""
+        edges = np.arange(self.graph.indptr[source], self.graph.indptr[source + 1])
+        edges = edges[(self.graph.targets[edges] == target) & self.edge_mask[edges]]
+        numbers = self.graph.edge_airlines[edges]
+        return sorted(self.graph.airlines[numbers[numbers >= 0]].tolist())
+
+
+_views: 'OrderedDict[Tuple[int, Optional[FrozenSet[str]]], RouteView]' = OrderedDict()
+_views_lock = threading.Lock()
+
+
+def route_view(graph: RouteGraph, airlines: Optional[Iterable[str]] = None) -> RouteView:
+    """Cached RouteView for a snapshot and airline filter"""
+    key = (id(graph), frozenset(airlines) if airlines else None)
+    with _views_lock:
+        view = _views.get(key)
+        # id() can be reused by a new snapshot once the old one is gone
+        if view is not None and view.graph is graph:
+            _views.move_to_end(key)
+            return view
+    view = RouteView(graph, airlines)
+    with _views_lock:
+        _views[key] = view
+        while len(_views) > ITINERARY_VIEW_CACHE:
+            _views.popitem(last=False)
+    return view
+
+
+def distances_to(view: RouteView, target: int, max_hops: Optional[int] = None) -> List[List[float]]:
+    """
+    Shortest distance from every airport to `target`: layers[r][airport]
+    using at most r flights (r = 0..max_hops), or a single layer without a
+    hop limit. Bellman-Ford rounds as array operations over the pairs.
+    """
+    current = np.full(view.graph.airport_count, np.inf)
+    current[target] = 0.0
+    layers = [current]
+    rounds = max_hops if max_hops is not None else view.graph.airport_count
+    for _ in range(rounds):
+        if not len(view.group_starts):
+            break
+        through = np.minimum.reduceat(current[view.pair_targets] + view.pair_distances, view.group_starts)
+        updated = current.copy()
+        updated[view.group_sources] = np.minimum(updated[view.group_sources], through)
+        if np.array_equal(updated, current):
+            break
+        current = updated
+        layers.append(current)
+    if max_hops is None:
+        return [current.tolist()]
+    # Converged early: more hops don't get any closer
+    layers += [current] * (max_hops + 1 - len(layers))
+    return [layer.tolist() for layer in layers]
+
+
+def guided_path(view: RouteView, source: int, target: int, to_target: List[List[float]],
+                max_hops: Optional[int] = None, banned_nodes: FrozenSet[int] = frozenset(),
+                banned_edges: FrozenSet[Tuple[int, int]] = frozenset(),
+                max_distance: float = float('inf')) -> Optional[Path]:
+    """
+    (distance, airport numbers) of the shortest itinerary with at most
+    `max_hops` flights avoiding the banned airports and pairs, or None (also
+    when nothing shorter than `max_distance` exists). A* over (airport,
+    flights so far) states guided by `to_target` (from distances_to on the
+    same view): those distances stay a consistent lower bound when airports
+    and pairs are banned, and airports that cannot reach the target within
+    the remaining flights are never queued.
+    """
+    limited = max_hops is not None
+    if to_target[max_hops if limited else 0][source] >= max_distance:
+        return None
+    # Best distance per airport, and per flight count when those are limited
+    labels: Dict[int, Any] = {source: {0: 0.0} if limited else 0.0}
+    parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {(source, 0): None}
+    settled: Set[Tuple[int, int]] = set()
+    queue = [(to_target[max_hops if limited else 0][source], 0.0, source, 0)]
+
+    while queue:
+        _, distance, node, hops = heapq.heappop(queue)
+        if node == target:
+            path, state = [], (node, hops)
+            while state is not None:
+                path.append(state[0])
+                state = parent[state]
+            return (distance, path[::-1])
+        if (node, hops) in settled:
+            continue
+        settled.add((node, hops))
+        next_hops = hops + 1 if limited else 0
+        if limited and next_hops > max_hops:
+            continue
+        remaining_layer = to_target[max_hops - next_hops] if limited else to_target[0]
+
+        for neighbor, weight in view.outgoing[node]:
+            candidate = distance + weight
+            estimate = candidate + remaining_layer[neighbor]
+            # Also drops airports that cannot reach the target in the flights left (inf)
+            if estimate >= max_distance or neighbor in banned_nodes or (node, neighbor) in banned_edges:
+                continue
+            if limited:
+                # Dominated by a label reaching the airport as short or shorter in no more flights
+                neighbor_labels = labels.setdefault(neighbor, {})
+                if any(label_hops <= next_hops and label_distance <= candidate
+                       for label_hops, label_distance in neighbor_labels.items()):
+                    continue
+                neighbor_labels[next_hops] = candidate
+            else:
+                if candidate >= labels.get(neighbor, float('inf')):
+                    continue
+                labels[neighbor] = candidate
+            parent[(neighbor, next_hops)] = (node, hops)
+            heapq.heappush(queue, (estimate, candidate, neighbor, next_hops))
+    return None
+
+
+def k_shortest_paths(view: RouteView, source: int, target: int, k: int = 1, max_hops: Optional[int] = None,
+                     to_target: Optional[List[List[float]]] = None) -> List[Path]:
+    """Up to `k` loopless itineraries in order of distance (Yen's algorithm)"""
+    if source == target:
+        return [(0.0, [source])]
+    if to_target is None:
+        to_target = distances_to(view, target, max_hops)
+    first = guided_path(view, source, target, to_target, max_hops)
+    if first is None:
+        return []
+    found: List[Path] = [first]
+    candidates: List[Tuple[float, List[int]]] = []
+    seen = {tuple(first[1])}
+
+    while len(found) < k:
+        previous = found[-1][1]
+        for i in range(len(previous) - 1):
+            spur, root = previous[i], previous[:i + 1]
+            root_distance = sum(view.weight[(a, b)] for a, b in zip(root, root[1:]))
+            banned_edges = frozenset(
+                (path[i], path[i + 1]) for _, path in found if len(path) > i + 1 and path[:i + 1] == root
+            )
+            spur_hops = None if max_hops is None else max_hops - i
+            # Once enough candidates are queued, only spur paths beating the last one needed can matter
+            needed = k - len(found)
+            cutoff = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else float('inf')
+            spur_path = guided_path(view, spur, target, to_target, spur_hops, frozenset(root[:-1]),
+                                    banned_edges, cutoff - root_distance)
+            if spur_path is None:
+                continue
+            path = root[:-1] + spur_path[1]
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (root_distance + spur_path[0], path))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates))
+    return found
+
+
+def format_itinerary(view: RouteView, path: Path) -> Dict[str, Any]:
+    distance, nodes = path
+    codes = view.graph.codes
+    return {
+        'stops': max(len(nodes) - 2, 0),
+        'distance_km': round(distance, 1),
+        'airports': [codes[node] for node in nodes],
+        'legs': [
+            {
+                'from': codes[a],
+                'to': codes[b],
+                'distance_km': round(view.weight[(a, b)], 1),
+                'airlines': view.leg_airlines(a, b),
+            }
+            for a, b in zip(nodes, nodes[1:])
+        ],
+    }
+
+
+def search_itineraries(graph: RouteGraph, origin: str, destination: str, k: int = 1,
+                       max_stops: Optional[int] = None, airlines: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Up to `k` itineraries from `origin` to `destination` (airport codes).
+    Raises KeyError naming the first unknown airport.
+    """
+    return search_batch(graph, [(origin, destination)], k, max_stops, airlines, strict=True)[0]
+
+
+def search_batch(graph: RouteGraph, pairs: List[Tuple[str, str]], k: int = 1, max_stops: Optional[int] = None,
+                 airlines: Optional[Iterable[str]] = None, strict: bool = False) -> List[Dict[str, Any]]:
+    """
+    search_itineraries for many (origin, destination) pairs, in order. Pairs
+    sharing a destination share its distances_to. An unknown airport gives
+    that pair an 'error' entry, or raises KeyError with strict=True.
+    """
+    view = route_view(graph, airlines)
+    max_hops = None if max_stops is None else max_stops + 1
+    destination_distances: Dict[int, List[List[float]]] = {}
+    results = []
+    for origin, destination in pairs:
+        result: Dict[str, Any] = {'origin': origin, 'destination': destination}
+        unknown = [code for code in (origin, destination) if code not in graph.index]
+        if unknown:
+            if strict:
+                raise KeyError(unknown[0])
+            results.append({**result, 'error': f"Airport {unknown[0]} not found", 'itineraries': []})
+            continue
+        source, target = graph.index[origin], graph.index[destination]
+        if target not in destination_distances:
+            destination_distances[target] = distances_to(view, target, max_hops)
+        paths = k_shortest_paths(view, source, target, k, max_hops, destination_distances[target])
+        results.append({**result, 'itineraries': [format_itinerary(view, path) for path in paths]})
+    return results
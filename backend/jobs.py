@@ -0,0 +1,161 @@
+"""
+Background seed jobs.
+
+POST /api/seed-data starts a SeedJob and returns its id right away; the
+download and ingest run in a task on the event loop. A job moves through
+phases (queued, clearing, downloading, then one phase per ingested dataset
+such as airports, routes and airlines) and counts rows per dataset from the
+ingest progress callback. Watchers either poll `snapshot()` or wait on
+`wait_for_change()` for live updates.
+
+SeedJobRegistry keeps the last few jobs and refuses to start a seed while
+another one is still running: two seeds merging the same airports and routes
+at once would only fight over locks.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+
+class SeedInProgress(Exception):
+    """Raised when a seed is requested while another one is running"""
+
+    def __init__(self, job: 'SeedJob'):
+        super().__init__(f"Seed job {job.id} is still running")
+        self.job = job
+
+
+class SeedJob:
+    """State of one seed run, updated by the loader and read by the status endpoints"""
+
+    def __init__(self, region: Optional[str], clear_existing: bool):
+        self.id = uuid.uuid4().hex
+        self.region = region
+        self.clear_existing = clear_existing
+        self.status = 'queued'
+        self.phase = 'queued'
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def _notify(self):
+        # Wake every current watcher, then arm a new event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_phase(self, phase: str):
+        self.phase = phase
+        logging.info(f"Seed job {self.id}: {phase}")
+        self._notify()
+
+    def progress(self, label: str, done: int, total: int):
+        """Ingest progress callback (see ingest.ingest_rows)"""
+        now = time.time()
+        entry = self.rows.setdefault(label, {'done': 0, 'total': total, 'started_at': now})
+        entry['done'], entry['total'] = done, total
+        elapsed = now - entry['started_at']
+        entry['rows_per_sec'] = round(done / elapsed) if elapsed > 0 else None
+        self.phase = label
+        self._notify()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait until the job changes; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rows_done = sum(entry['done'] for entry in self.rows.values())
+        return {
+            'id': self.id,
+            'region': self.region,
+            'clear_existing': self.clear_existing,
+            'status': self.status,
+            'phase': self.phase,
+            'rows': {
+                label: {key: value for key, value in entry.items() if key != 'started_at'}
+                for label, entry in self.rows.items()
+            },
+            'rows_processed': rows_done,
+            'elapsed_seconds': round(elapsed, 2),
+            'rows_per_sec': round(rows_done / elapsed) if elapsed > 0 else None,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class SeedJobRegistry:
+    """The last `max_jobs` seed jobs, with at most one running"""
+
+    def __init__(self, max_jobs: int = 20):
+        self.max_jobs = max_jobs
+        self._jobs: 'OrderedDict[str, SeedJob]' = OrderedDict()
+
+    def active(self) -> Optional[SeedJob]:
+        for job in self._jobs.values():
+            if not job.finished:
+                return job
+        return None
+
+    def get(self, job_id: str) -> Optional[SeedJob]:
+        return self._jobs.get(job_id)
+
+    def start(self, region: Optional[str], clear_existing: bool,
+              runner: Callable[[SeedJob], Awaitable[Dict[str, Any]]]) -> SeedJob:
+        """
+        Create a job and run `runner(job)` in the background. The check and
+        the registration happen without yielding to the event loop, so two
+        concurrent requests cannot both get through.
+        """
+        running = self.active()
+        if running is not None:
+            raise SeedInProgress(running)
+
+        job = SeedJob(region, clear_existing)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+        async def run():
+            job.status = 'running'
+            job.started_at = time.time()
+            job._notify()
+            try:
+                job.result = await runner(job)
+                job.status = 'succeeded'
+            except asyncio.CancelledError:
+                # Shutdown or a cancelled request: a job left 'running' would block every later seed
+                job.error = 'Seed cancelled'
+                job.status = 'failed'
+                logging.warning(f"Seed job {job.id} was cancelled")
+                raise
+            except Exception as e:
+                job.error = str(getattr(e, 'detail', None) or e)
+                job.status = 'failed'
+                logging.error(f"Seed job {job.id} failed: {job.error}")
+            finally:
+                job.finished_at = time.time()
+                job.phase = job.status
+                job._notify()
+
+        job.task = asyncio.create_task(run())
+        return job
@@ -0,0 +1,192 @@
+"""
+Server-side graph layout for /api/graph/data.
+
+Airports with coordinates are placed by a Web Mercator projection, so the
+picture matches a map. Every other node (airlines, sample airports without
+coordinates) is placed by a force-directed layout in which the projected
+airports stay pinned. Repulsion uses a vectorized Barnes-Hut approximation:
+the plane is split into a hierarchy of grids, and at each level a free node
+interacts with the centre of mass of the cells that are well separated from
+it (children of its parent's neighbours that are not its own neighbours).
+Near-field interactions at the finest level also go through cell centroids,
+so each iteration is O(N * levels) numpy work with no Python loop over nodes.
+"""
+
+import logging
+import math
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Half-width of the layout canvas, in the units the frontend draws with
+CANVAS_SCALE = 1000.0
+# Mercator is undefined at the poles; clamp like web maps do
+MAX_LATITUDE = 85.0
+
+
+def project_mercator(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Web Mercator projection scaled so longitude -180..180 maps to -CANVAS_SCALE..CANVAS_SCALE"""
+    lat = np.radians(np.clip(latitude, -MAX_LATITUDE, MAX_LATITUDE))
+    x = longitude / 180.0 * CANVAS_SCALE
+    # Screen coordinates grow downwards
+    y = -np.log(np.tan(np.pi / 4 + lat / 2)) / np.pi * CANVAS_SCALE
+    return np.column_stack([x, y])
+
+
+def _has_coordinates(node: Dict[str, Any]) -> bool:
+    lat, lon = node.get('latitude'), node.get('longitude')
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        return False
+    return not (lat == 0 and lon == 0) and math.isfinite(lat) and math.isfinite(lon)
+
+
+def _cell_aggregates(pos: np.ndarray, lo: np.ndarray, size: float, n: int):
+    """Cell index of every node plus mass and centre of mass of every cell in an n x n grid"""
+    cells = np.clip(((pos - lo) / size * n).astype(np.int64), 0, n - 1)
+    flat = cells[:, 0] * n + cells[:, 1]
+    mass = np.bincount(flat, minlength=n * n).astype(float)
+    sum_x = np.bincount(flat, weights=pos[:, 0], minlength=n * n)
+    sum_y = np.bincount(flat, weights=pos[:, 1], minlength=n * n)
+    return cells, mass, sum_x, sum_y
+
+
+def _repulsion(pos: np.ndarray, k: float, levels: int, targets: np.ndarray) -> np.ndarray:
+    """
+    Barnes-Hut style repulsive displacement k^2 * m / d for the nodes in
+    `targets`. Every node contributes mass to the grid, but only the targets
+    (the nodes that move) get a force computed.
+    """
+    points = pos[targets]
+    force = np.zeros_like(points)
+    lo = pos.min(axis=0)
+    size = float((pos.max(axis=0) - lo).max()) + 1e-9
+
+    # Children of the parent's 3x3 neighbourhood span offsets -2..3 from 2 * parent
+    child_offsets = np.arange(-2, 4)
+    neighbour_offsets = np.arange(-1, 2)
+
+    def accumulate(cx, cy, n, mass, sum_x, sum_y, exclude_self=None):
+        inside = (cx >= 0) & (cx < n) & (cy >= 0) & (cy < n)
+        flat = np.where(inside, cx * n + cy, 0)
+        m = np.where(inside, mass[flat], 0.0)
+        sx = np.where(inside, sum_x[flat], 0.0)
+        sy = np.where(inside, sum_y[flat], 0.0)
+        if exclude_self is not None:
+            # Remove the node itself from its own cell
+            m = m - exclude_self
+            sx = sx - exclude_self * points[:, 0:1]
+            sy = sy - exclude_self * points[:, 1:2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            com_x = np.where(m > 0, sx / np.where(m > 0, m, 1), 0.0)
+            com_y = np.where(m > 0, sy / np.where(m > 0, m, 1), 0.0)
+        dx = points[:, 0:1] - com_x
+        dy = points[:, 1:2] - com_y
+        dist2 = dx * dx + dy * dy + 1e-2
+        scale = np.where(m > 0, k * k * m / dist2, 0.0)
+        force[:, 0] += (scale * dx).sum(axis=1)
+        force[:, 1] += (scale * dy).sum(axis=1)
+
+    for level in range(2, levels + 1):
+        n = 2 ** level
+        cells, mass, sum_x, sum_y = _cell_aggregates(pos, lo, size, n)
+        cells = cells[targets]
+        parent = cells // 2
+        cx = (2 * parent[:, 0:1] + child_offsets)[:, :, None].repeat(6, axis=2).reshape(len(points), -1)
+        cy = (2 * parent[:, 1:2] + child_offsets)[:, None, :].repeat(6, axis=1).reshape(len(points), -1)
+        far = (np.abs(cx - cells[:, 0:1]) > 1) | (np.abs(cy - cells[:, 1:2]) > 1)
+        accumulate(np.where(far, cx, -1), np.where(far, cy, -1), n, mass, sum_x, sum_y)
+
+        if level == levels:
+            # Near field: own cell and its 8 neighbours at the finest level
+            nx = (cells[:, 0:1] + neighbour_offsets)[:, :, None].repeat(3, axis=2).reshape(len(points), -1)
+            ny = (cells[:, 1:2] + neighbour_offsets)[:, None, :].repeat(3, axis=1).reshape(len(points), -1)
+            own = (nx == cells[:, 0:1]) & (ny == cells[:, 1:2])
+            accumulate(nx, ny, n, mass, sum_x, sum_y, exclude_self=own.astype(float))
+    return force
+
+
+def force_layout(pos: np.ndarray, pinned: np.ndarray, edges: np.ndarray,
+                 iterations: int = 120, seed: int = 42) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout with Barnes-Hut repulsion. Nodes with
+    pinned=True keep their position but still repel and attract the others.
+    """
+    count = len(pos)
+    free = ~pinned
+    if count == 0 or not free.any():
+        return pos
+
+    rng = np.random.default_rng(seed)
+    pos = pos.copy()
+    pos[free] = rng.uniform(-CANVAS_SCALE / 2, CANVAS_SCALE / 2, size=(int(free.sum()), 2))
+
+    area = (2 * CANVAS_SCALE) ** 2
+    k = math.sqrt(area / count)
+    # Finest grid has about one node per cell
+    levels = max(2, min(10, int(math.ceil(math.log(max(count, 4), 4)))))
+    targets = np.flatnonzero(free)
+    temperature = CANVAS_SCALE / 10
+    gravity = k * k * count / CANVAS_SCALE ** 2
+
+    # Pinned nodes never move, so only edges touching a free node matter
+    if len(edges):
+        edges = edges[free[edges[:, 0]] | free[edges[:, 1]]]
+
+    for _ in range(iterations):
+        displacement = np.zeros_like(pos)
+        displacement[targets] = _repulsion(pos, k, levels, targets)
+
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            length = np.sqrt((delta * delta).sum(axis=1, keepdims=True)) + 1e-9
+            pull = delta * length / k
+            for axis in range(2):
+                displacement[:, axis] -= np.bincount(edges[:, 0], weights=pull[:, axis], minlength=count)
+                displacement[:, axis] += np.bincount(edges[:, 1], weights=pull[:, axis], minlength=count)
+
+        # Gravity balancing the total repulsion at about CANVAS_SCALE from the
+        # centre keeps disconnected nodes (airlines) on the canvas
+        displacement -= pos * gravity
+
+        step = displacement[targets]
+        length = np.sqrt((step * step).sum(axis=1, keepdims=True)) + 1e-9
+        pos[targets] += step / length * np.minimum(length, temperature)
+        temperature *= 0.96
+    return pos
+
+
+def compute_layout(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]],
+                   iterations: int = 120) -> Dict[str, Tuple[float, float]]:
+    """Return {node id: (x, y)} for every node of a /api/graph/data payload"""
+    started = time.perf_counter()
+    ids = [node['id'] for node in nodes]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+
+    pinned = np.array([_has_coordinates(node) for node in nodes], dtype=bool)
+    pos = np.zeros((len(nodes), 2))
+    if pinned.any():
+        lat = np.array([nodes[i]['latitude'] for i in np.flatnonzero(pinned)], dtype=float)
+        lon = np.array([nodes[i]['longitude'] for i in np.flatnonzero(pinned)], dtype=float)
+        pos[pinned] = project_mercator(lat, lon)
+
+    edges = np.array(
+        [(index[link['source']], index[link['target']]) for link in links
+         if link['source'] in index and link['target'] in index],
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+    pos = force_layout(pos, pinned, edges, iterations=iterations)
+    logging.info(
+        f"Layout computed for {len(nodes)} nodes ({int(pinned.sum())} projected) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return {node_id: (round(float(x), 2), round(float(y), 2)) for node_id, (x, y) in zip(ids, pos)}
+
+
+def apply_layout(nodes: List[Dict[str, Any]], positions: Dict[str, Tuple[float, float]]):
+    """Set x/y on every node that has a computed position"""
+    for node in nodes:
+        position = positions.get(node['id'])
+        if position is not None:
+            node['x'], node['y'] = position
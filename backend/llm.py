@@ -0,0 +1,216 @@
+"""
+Async HTTP clients for the LLM providers.
+
+Each provider gets one shared httpx.AsyncClient with keep-alive pooling, its
+own connection limits and HTTP/2 when the `h2` package is installed. Because
+the calls are awaitable, `asyncio.wait_for` timeouts and client disconnects
+actually cancel the in-flight request.
+
+The `stream_*` variants read the providers' server-sent event APIs and yield
+the text as it is generated.
+"""
+
+import os
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+
+# LLM API Configuration
+gemini_api_key = os.environ.get('GEMINI_API_KEY', '')
+openai_api_key = os.environ.get('OPENAI_API_KEY', '')
+
+OPENAI_URL = "https://api.openai.com/v1"
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# Per-provider connection limits
+OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', '20'))
+GEMINI_MAX_CONNECTIONS = int(os.environ.get('GEMINI_MAX_CONNECTIONS', '20'))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get('LLM_KEEPALIVE_EXPIRY', '60'))
+LLM_REQUEST_TIMEOUT = float(os.environ.get('LLM_REQUEST_TIMEOUT', '10'))
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(base_url: str, max_connections: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=5.0),
+    )
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared client for a provider ('openai' or 'gemini')"""
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        if provider == 'openai':
+            client = _build_client(OPENAI_URL, OPENAI_MAX_CONNECTIONS)
+        elif provider == 'gemini':
+            client = _build_client(GEMINI_URL, GEMINI_MAX_CONNECTIONS)
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        _clients[provider] = client
+        logging.info(f"Created {provider} HTTP client (http2={HTTP2_AVAILABLE})")
+    return client
+
+
+async def close_llm_clients():
+    """Close every provider client and drop their pooled connections"""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
+
+
+async def _sse_events(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """JSON payloads of the `data:` lines of a server-sent event response"""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+def _openai_request(prompt: str):
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {openai_api_key}"
+    }
+
+    payload = {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
+        "max_tokens": 300
+    }
+    return headers, payload
+
+
+# Helper function to call OpenAI API
+async def call_openai_api(prompt: str) -> str:
+    """Call OpenAI API"""
+    headers, payload = _openai_request(prompt)
+
+    response = await get_client('openai').post("/chat/completions", headers=headers, json=payload)
+
+    if response.status_code != 200:
+        raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+
+    result = response.json()
+    return result["choices"][0]["message"]["content"]
+
+
+async def stream_openai_api(prompt: str) -> AsyncIterator[str]:
+    """Call OpenAI API with stream=true, yielding the content deltas"""
+    headers, payload = _openai_request(prompt)
+    payload["stream"] = True
+
+    async with get_client('openai').stream("POST", "/chat/completions", headers=headers, json=payload) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        async for event in _sse_events(response):
+            choices = event.get("choices") or [{}]
+            text = choices[0].get("delta", {}).get("content")
+            if text:
+                yield text
+
+
+# Helper function to list available Gemini models
+async def list_available_models() -> List[str]:
+    """List all available Gemini models"""
+    if not gemini_api_key:
+        return []
+
+    try:
+        response = await get_client('gemini').get("/models", params={"key": gemini_api_key}, timeout=5)
+        if response.status_code == 200:
+            models = response.json().get("models", [])
+            # Get models that support generateContent
+            valid_models = [
+                m["name"].replace("models/", "")
+                for m in models
+                if "generateContent" in m.get("supportedGenerationMethods", [])
+            ]
+            logging.info(f"Available Gemini models: {valid_models}")
+            return valid_models
+        else:
+            logging.warning(f"Failed to list models: {response.status_code}")
+            return []
+    except httpx.HTTPError as e:
+        logging.warning(f"Error listing models: {e}")
+        return []
+
+
+def _gemini_request(prompt: str):
+    headers = {
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "contents": [{
+            "parts": [{
+                "text": prompt
+            }]
+        }],
+        "generationConfig": {
+            "temperature": 0,
+            "maxOutputTokens": 512
+        }
+    }
+    return headers, payload
+
+
+# Helper function to call Gemini API directly via REST
+async def call_gemini_api(prompt: str, model_name: str) -> str:
+    """Call Google Gemini API directly using REST"""
+    # Don't add models/ prefix - API expects just the model name
+    headers, payload = _gemini_request(prompt)
+
+    response = await get_client('gemini').post(
+        f"/models/{model_name}:generateContent",
+        headers=headers,
+        params={"key": gemini_api_key},
+        json=payload,
+    )
+
+    if response.status_code != 200:
+        raise Exception(f"Gemini API error: {response.status_code} - {response.text}")
+
+    result = response.json()
+    return result["candidates"][0]["content"]["parts"][0]["text"]
+
+
+async def stream_gemini_api(prompt: str, model_name: str) -> AsyncIterator[str]:
+    """Call streamGenerateContent with alt=sse, yielding the text of each chunk"""
+    headers, payload = _gemini_request(prompt)
+
+    async with get_client('gemini').stream(
+        "POST",
+        f"/models/{model_name}:streamGenerateContent",
+        headers=headers,
+        params={"key": gemini_api_key, "alt": "sse"},
+        json=payload,
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"Gemini API error: {response.status_code} - {response.text}")
+        async for event in _sse_events(response):
+            for candidate in event.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
@@ -0,0 +1,379 @@
+"""
+Routing of LLM completions across the configured providers.
+
+Every provider keeps a rolling window of its successful latencies and a
+circuit breaker. `ProviderRouter.complete` sends the prompt to the first
+provider whose breaker is closed; if no answer arrives within that
+provider's observed p95 (or LLM_HEDGE_DELAY until there are enough
+samples), the same prompt is also sent to the next one and the first
+answer wins, cancelling the other request. A failure starts the next
+provider at once. After LLM_BREAKER_FAILURES consecutive failures a
+provider is skipped for LLM_BREAKER_COOLDOWN seconds, then gets one trial
+request.
+
+`ProviderRouter.stream` yields the text as the provider generates it. It
+fails over to the next provider only while nothing has been sent yet, and
+is not hedged: a second stream could not be merged into the first.
+
+`warm_up` runs at startup: it opens the connections, lists the Gemini
+models that support generateContent and times a short prompt on the most
+likely candidates, keeping the fastest instead of the first one listed.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import llm
+
+# Hedge after this long while a provider has fewer than LLM_HEDGE_MIN_SAMPLES latencies
+LLM_HEDGE_DELAY = float(os.environ.get('LLM_HEDGE_DELAY', '3'))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get('LLM_HEDGE_MIN_SAMPLES', '20'))
+LLM_LATENCY_WINDOW = int(os.environ.get('LLM_LATENCY_WINDOW', '200'))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', '3'))
+LLM_BREAKER_COOLDOWN = float(os.environ.get('LLM_BREAKER_COOLDOWN', '30'))
+# Gemini models timed at startup
+LLM_DISCOVERY_CANDIDATES = int(os.environ.get('LLM_DISCOVERY_CANDIDATES', '4'))
+
+WARMUP_PROMPT = "Reply with the single word: ok"
+# Models listed for generateContent that are not meant for text completions
+NON_TEXT_MODELS = ('embedding', 'tts', 'image', 'audio', 'live', 'vision')
+
+
+class ProvidersUnavailable(Exception):
+    """Every provider failed or has its circuit breaker open"""
+
+
+class LatencyWindow:
+    """The last `size` successful call latencies, in seconds"""
+
+    def __init__(self, size: int = LLM_LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """Closed, open after `failures` consecutive failures, half-open (one trial) after `cooldown` seconds"""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; a half-open breaker lets a single trial through"""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half-open' and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; True when it (re)opens the breaker"""
+        self.consecutive_failures += 1
+        reopened = self._trial_running or (self.opened_at is None and self.consecutive_failures >= self.failures)
+        if reopened:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+        return reopened
+
+    def release(self):
+        """A trial request that was cancelled proves nothing either way"""
+        self._trial_running = False
+
+
+class Provider:
+    """One LLM backend with its latency window, circuit breaker and counters"""
+
+    def __init__(self, name: str, call: Callable[[str], Awaitable[str]],
+                 stream: Callable[[str], AsyncIterator[str]]):
+        self.name = name
+        self._call = call
+        self._stream = stream
+        self.latency = LatencyWindow()
+        self.breaker = CircuitBreaker()
+        self.stats = {'calls': 0, 'successes': 0, 'failures': 0, 'cancelled': 0, 'hedges': 0, 'hedge_wins': 0}
+        self.last_error: Optional[str] = None
+
+    def hedge_delay(self) -> float:
+        """How long to wait for this provider before also asking the next one"""
+        if len(self.latency) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DELAY
+        return self.latency.percentile(0.95)
+
+    async def prepare(self):
+        """Called before each request, e.g. to pick a model"""
+
+    async def call(self, prompt: str) -> str:
+        await self.prepare()
+        return await self._call(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        await self.prepare()
+        async with aclosing(self._stream(prompt)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def warm_up(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        await self.call(WARMUP_PROMPT)
+        return {'warmup_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    def on_breaker_open(self):
+        """Called when failures open the breaker"""
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.latency.percentile(0.5), self.latency.percentile(0.95)
+        return {
+            'name': self.name,
+            'breaker': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'latency_samples': len(self.latency),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'hedge_delay_ms': round(self.hedge_delay() * 1000, 1),
+            **self.stats,
+            'last_error': self.last_error,
+        }
+
+
+class GeminiProvider(Provider):
+    """Gemini, with the model chosen by timing the listed models"""
+
+    def __init__(self):
+        super().__init__('gemini', self._generate, self._stream_generate)
+        self.model: Optional[str] = None
+        self.model_latencies: Dict[str, Optional[float]] = {}
+        self._discovery: Optional[asyncio.Task] = None
+
+    async def _generate(self, prompt: str) -> str:
+        return await llm.call_gemini_api(prompt, self.model)
+
+    def _stream_generate(self, prompt: str) -> AsyncIterator[str]:
+        return llm.stream_gemini_api(prompt, self.model)
+
+    async def _time_model(self, model: str) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            await llm.call_gemini_api(WARMUP_PROMPT, model)
+        except Exception as e:
+            logging.info(f"Gemini model {model} unavailable: {e}")
+            return None
+        return time.perf_counter() - started
+
+    async def _discover(self):
+        models = await llm.list_available_models()
+        candidates = [model for model in models if not any(word in model for word in NON_TEXT_MODELS)] or models
+        # Flash models first: they are the low-latency tier
+        candidates = sorted(candidates, key=lambda model: 'flash' not in model)[:LLM_DISCOVERY_CANDIDATES]
+        if not candidates:
+            raise ProvidersUnavailable("No Gemini models available")
+        timings = await asyncio.gather(*[self._time_model(model) for model in candidates])
+        self.model_latencies = {
+            model: round(seconds * 1000, 1) if seconds is not None else None
+            for model, seconds in zip(candidates, timings)
+        }
+        working = [(seconds, model) for model, seconds in zip(candidates, timings) if seconds is not None]
+        if not working:
+            raise ProvidersUnavailable(f"No Gemini model answered: {', '.join(candidates)}")
+        self.model = min(working)[1]
+        logging.info(f"Selected Gemini model {self.model} (startup latencies ms: {self.model_latencies})")
+
+    async def prepare(self):
+        if self.model is not None:
+            return
+        # Concurrent requests share one discovery; a failed one is retried by the next request
+        if self._discovery is None or self._discovery.done():
+            self._discovery = asyncio.ensure_future(self._discover())
+        await asyncio.shield(self._discovery)
+
+    async def warm_up(self) -> Dict[str, Any]:
+        # Timing the candidates already warms the connection up
+        self.model = None
+        await self.prepare()
+        return {'model': self.model, 'model_latencies_ms': self.model_latencies}
+
+    def on_breaker_open(self):
+        # The model may have been retired; pick again on the trial request
+        self.model = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), 'model': self.model, 'model_latencies_ms': self.model_latencies}
+
+
+class ProviderRouter:
+    """Hedged, breaker-aware completions over providers in order of preference"""
+
+    def __init__(self, providers: List[Provider]):
+        self.providers = providers
+        self.warmup: Dict[str, Any] = {}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.providers)
+
+    def _record_failure(self, provider: Provider, error: Exception):
+        provider.stats['failures'] += 1
+        provider.last_error = str(error)[:300]
+        if provider.breaker.record_failure():
+            logging.warning(f"Circuit breaker opened for {provider.name} after: {error}")
+            provider.on_breaker_open()
+
+    async def _attempt(self, provider: Provider, prompt: str) -> Tuple[Provider, str]:
+        provider.stats['calls'] += 1
+        started = time.perf_counter()
+        try:
+            text = await provider.call(prompt)
+        except asyncio.CancelledError:
+            provider.stats['cancelled'] += 1
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+        provider.latency.add(time.perf_counter() - started)
+        provider.stats['successes'] += 1
+        provider.breaker.record_success()
+        return provider, text
+
+    async def complete(self, prompt: str) -> Tuple[str, str]:
+        """
+        (text, provider name) of the first successful answer. Raises
+        ProvidersUnavailable when every provider failed or is open.
+        """
+        queue = list(self.providers)
+        # Running attempts: task -> (provider, whether it was a hedge)
+        pending: Dict[asyncio.Future, Tuple[Provider, bool]] = {}
+        errors: List[str] = []
+
+        def launch(hedge: bool) -> Optional[Provider]:
+            # Breakers are asked only when a provider is about to be used: a half-open one admits one trial
+            while queue:
+                provider = queue.pop(0)
+                if not provider.breaker.allow():
+                    errors.append(f"{provider.name}: circuit breaker open")
+                    continue
+                if hedge:
+                    provider.stats['hedges'] += 1
+                    logging.info(f"Hedging LLM request to {provider.name}")
+                pending[asyncio.ensure_future(self._attempt(provider, prompt))] = (provider, hedge)
+                return provider
+            return None
+
+        current = launch(hedge=False)
+        try:
+            while pending:
+                timeout = current.hedge_delay() if queue else None
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than its p95: ask the next provider too
+                    current = launch(hedge=True) or current
+                    continue
+                for task in done:
+                    provider, hedge = pending.pop(task)
+                    if task.exception() is None:
+                        if hedge:
+                            provider.stats['hedge_wins'] += 1
+                        return task.result()[1], provider.name
+                    errors.append(f"{provider.name}: {task.exception()}")
+                if not pending:
+                    # Failed outright: move on without waiting
+                    current = launch(hedge=False) or current
+        finally:
+            for task in pending:
+                task.cancel()
+        raise ProvidersUnavailable("; ".join(errors) or "No LLM provider configured")
+
+    async def stream(self, prompt: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        (provider name, text chunk) pairs of the first provider that starts
+        answering. Raises ProvidersUnavailable when none does; a failure
+        after the first chunk is raised as is.
+        """
+        errors: List[str] = []
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                errors.append(f"{provider.name}: circuit breaker open")
+                continue
+            provider.stats['calls'] += 1
+            streamed = False
+            try:
+                async with aclosing(provider.stream(prompt)) as chunks:
+                    async for chunk in chunks:
+                        streamed = True
+                        yield provider.name, chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                provider.stats['cancelled'] += 1
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                self._record_failure(provider, e)
+                if streamed:
+                    raise
+                errors.append(f"{provider.name}: {e}")
+                continue
+            # Stream durations include the client reading them, so they stay out of the p95 window
+            provider.stats['successes'] += 1
+            provider.breaker.record_success()
+            return
+        raise ProvidersUnavailable("; ".join(errors) or "No LLM provider configured")
+
+    async def warm_up(self):
+        """Open connections, pick the Gemini model and time each provider once"""
+        async def one(provider: Provider):
+            try:
+                result = await provider.warm_up()
+                self.warmup[provider.name] = result
+                logging.info(f"LLM provider {provider.name} warmed up: {result}")
+            except Exception as e:
+                self.warmup[provider.name] = {'error': str(e)[:300]}
+                logging.warning(f"LLM provider {provider.name} warm-up failed: {e}")
+        await asyncio.gather(*[one(provider) for provider in self.providers])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'providers': [provider.snapshot() for provider in self.providers],
+            'warmup': self.warmup,
+            'hedge_delay_default_ms': LLM_HEDGE_DELAY * 1000,
+            'hedge_min_samples': LLM_HEDGE_MIN_SAMPLES,
+        }
+
+
+def build_router() -> ProviderRouter:
+    """Router over the providers with an API key, OpenAI first"""
+    providers: List[Provider] = []
+    if llm.openai_api_key:
+        providers.append(Provider('openai', llm.call_openai_api, llm.stream_openai_api))
+    if llm.gemini_api_key:
+        providers.append(GeminiProvider())
+    return ProviderRouter(providers)
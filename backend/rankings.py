@@ -0,0 +1,60 @@
+"""
+Hub rankings written back onto the graph after each seed.
+
+Airports get out_degree and in_degree (routes leaving and arriving),
+pagerank, betweenness (approximate, see RouteGraph.approximate_betweenness)
+and hub_rank (1 for the highest PageRank); airlines get route_count. They
+are computed on the in-process route graph snapshot and stored as indexed
+properties (schema migration 5), so hub questions and the "major hubs"
+preset are index lookups instead of aggregations over every ROUTE.
+"""
+
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+from route_graph import RouteGraph
+
+# Source airports sampled for approximate betweenness (exact when >= airport count)
+HUB_BETWEENNESS_SAMPLES = int(os.environ.get('HUB_BETWEENNESS_SAMPLES', '256'))
+
+AIRPORT_RANKINGS_QUERY = """
+UNWIND $batch as ranking
+MATCH (a:Airport {code: ranking.code})
+SET a.out_degree = ranking.out_degree,
+    a.in_degree = ranking.in_degree,
+    a.pagerank = ranking.pagerank,
+    a.betweenness = ranking.betweenness,
+    a.hub_rank = ranking.hub_rank
+"""
+
+AIRLINE_RANKINGS_QUERY = """
+UNWIND $batch as ranking
+MATCH (al:Airline {code: ranking.code})
+SET al.route_count = ranking.route_count
+"""
+
+def compute_rankings(graph: RouteGraph, samples: int = HUB_BETWEENNESS_SAMPLES) -> Dict[str, List[Dict[str, Any]]]:
+    """Airport and airline ranking records for AIRPORT_RANKINGS_QUERY and AIRLINE_RANKINGS_QUERY"""
+    pagerank = graph.pagerank()
+    betweenness = graph.approximate_betweenness(samples)
+    hub_rank = np.empty(graph.airport_count, dtype=np.int64)
+    hub_rank[np.argsort(-pagerank, kind='stable')] = np.arange(1, graph.airport_count + 1)
+
+    airports = [
+        {
+            'code': code,
+            'out_degree': out_degree,
+            'in_degree': in_degree,
+            'pagerank': round(rank, 8),
+            'betweenness': round(between, 3),
+            'hub_rank': position,
+        }
+        for code, out_degree, in_degree, rank, between, position in zip(
+            graph.codes.tolist(), graph.out_degree.tolist(), graph.in_degree.tolist(),
+            pagerank.tolist(), betweenness.tolist(), hub_rank.tolist()
+        )
+    ]
+    airlines = [{'code': code, 'route_count': count} for code, count in graph.airline_route_counts().items()]
+    return {'airports': airports, 'airlines': airlines}
@@ -0,0 +1,342 @@
+"""
+In-process route graph for /api/analytics.
+
+A snapshot of every Airport and ROUTE is held as compressed sparse row (CSR)
+arrays: airports are numbered 0..N-1 (`index` maps code to number), the
+outgoing routes of airport i are edges indptr[i]:indptr[i + 1], and each edge
+has a target, a distance and an airline number. The reverse CSR (incoming
+routes) points back into the same edge columns. Degrees, neighbour lists and
+connected components are array lookups on the snapshot instead of Cypher
+round trips; components are labelled once when the snapshot is built.
+
+The server keeps the current snapshot in a snapshots.SnapshotStore, which
+rebuilds it in the background after each seed.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+AIRPORTS_QUERY = """
+MATCH (a:Airport)
+RETURN a.code as code, a.name as name, a.city as city, a.country as country
+"""
+
+ROUTES_QUERY = """
+MATCH (a:Airport)-[r:ROUTE]->(b:Airport)
+RETURN a.code as source, b.code as target, r.airline as airline, r.distance_km as distance
+"""
+
+def _csr(sources: np.ndarray, count: int):
+    """indptr and edge order grouping edges by `sources`"""
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+    return indptr, order
+
+
+def weak_components(count: int, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Component label (smallest member index) per airport, ignoring direction.
+    Min-label propagation over the edge arrays with pointer jumping, so the
+    number of passes grows with the log of the component diameter.
+    """
+    labels = np.arange(count, dtype=np.int64)
+    while True:
+        lowest = np.minimum(labels[sources], labels[targets])
+        updated = labels.copy()
+        np.minimum.at(updated, sources, lowest)
+        np.minimum.at(updated, targets, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def strong_components(count: int, indptr: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Component number per airport along route direction (iterative Tarjan)"""
+    indptr_list, targets_list = indptr.tolist(), targets.tolist()
+    index = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    labels = [-1] * count
+    stack: List[int] = []
+    counter = 0
+    component = 0
+
+    for root in range(count):
+        if index[root] != -1:
+            continue
+        # (node, position of the next edge to visit)
+        work = [(root, indptr_list[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edge = work[-1]
+            if edge < indptr_list[node + 1]:
+                work[-1] = (node, edge + 1)
+                nxt = targets_list[edge]
+                if index[nxt] == -1:
+                    index[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, indptr_list[nxt]))
+                elif on_stack[nxt]:
+                    low[node] = min(low[node], index[nxt])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    labels[member] = component
+                    if member == node:
+                        break
+                component += 1
+    return np.asarray(labels, dtype=np.int64)
+
+
+class RouteGraph:
+    """Immutable CSR snapshot of the airport graph at one graph version"""
+
+    def __init__(self, airports: List[Dict[str, Any]], routes: List[Dict[str, Any]], version: Optional[int] = None):
+        started = time.perf_counter()
+        self.version = version
+        self.codes = np.array([airport['code'] for airport in airports], dtype=object)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.names = [airport.get('name') for airport in airports]
+        self.cities = [airport.get('city') for airport in airports]
+        self.countries = [airport.get('country') for airport in airports]
+        count = len(self.codes)
+        # Position of each airport in code order, for sorted neighbour lists
+        self.code_rank = np.empty(count, dtype=np.int64)
+        self.code_rank[np.argsort(self.codes.astype(str), kind='stable')] = np.arange(count)
+
+        # Routes whose endpoints are not in the snapshot (written in between the two reads) are skipped
+        known = [route for route in routes if route['source'] in self.index and route['target'] in self.index]
+        sources = np.fromiter((self.index[route['source']] for route in known), dtype=np.int64, count=len(known))
+        targets = np.fromiter((self.index[route['target']] for route in known), dtype=np.int64, count=len(known))
+        distances = np.array([route.get('distance') for route in known], dtype=np.float64) if known else np.zeros(0)
+        airline_names = [route.get('airline') for route in known]
+        self.airlines = np.array(sorted({name for name in airline_names if name is not None}), dtype=object)
+        airline_index = {name: i for i, name in enumerate(self.airlines)}
+        airlines = np.array([airline_index.get(name, -1) for name in airline_names], dtype=np.int32)
+
+        # Outgoing CSR; edge columns are stored in that order
+        self.indptr, order = _csr(sources, count)
+        self.sources = sources[order]
+        self.targets = targets[order]
+        self.distances = distances[order].astype(np.float32)
+        self.edge_airlines = airlines[order]
+
+        # Incoming CSR as positions into the outgoing edge columns
+        self.in_indptr, self.in_edges = _csr(self.targets, count)
+
+        self.out_degree = np.diff(self.indptr)
+        self.in_degree = np.diff(self.in_indptr)
+        self.components = {
+            'weak': weak_components(count, self.sources, self.targets),
+            'strong': strong_components(count, self.indptr, self.targets),
+        }
+        self.built_at = time.time()
+        self.seconds = round(time.perf_counter() - started, 3)
+
+    @property
+    def airport_count(self) -> int:
+        return len(self.codes)
+
+    @property
+    def route_count(self) -> int:
+        return len(self.targets)
+
+    def degrees(self, direction: str = 'out') -> np.ndarray:
+        if direction == 'out':
+            return self.out_degree
+        if direction == 'in':
+            return self.in_degree
+        return self.out_degree + self.in_degree
+
+    def airport(self, i: int) -> Dict[str, Any]:
+        return {'code': self.codes[i], 'name': self.names[i], 'city': self.cities[i], 'country': self.countries[i]}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'airports': self.airport_count,
+            'routes': self.route_count,
+            'airlines': len(self.airlines),
+            'weak_components': int(len(np.unique(self.components['weak']))) if self.airport_count else 0,
+            'strong_components': int(len(np.unique(self.components['strong']))) if self.airport_count else 0,
+            'built_at': self.built_at,
+            'seconds': self.seconds,
+        }
+
+    def degree_distribution(self, direction: str = 'out', top: int = 10) -> Dict[str, Any]:
+        """How many airports have each degree, with summary statistics and the top airports"""
+        degrees = self.degrees(direction)
+        counts = np.bincount(degrees) if len(degrees) else np.zeros(0, dtype=np.int64)
+        present = np.flatnonzero(counts)
+        leaders = np.argsort(-degrees, kind='stable')[:top]
+        return {
+            'direction': direction,
+            'histogram': [{'degree': int(d), 'airports': int(counts[d])} for d in present],
+            'mean': round(float(degrees.mean()), 3) if len(degrees) else 0.0,
+            'median': float(np.median(degrees)) if len(degrees) else 0.0,
+            'max': int(degrees.max()) if len(degrees) else 0,
+            'top': [{**self.airport(i), 'degree': int(degrees[i])} for i in leaders],
+        }
+
+    def neighbors(self, code: str, direction: str = 'out', airline: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Airports one route away from `code`, one entry per airport with the
+        airlines flying it and the shortest route distance. Raises KeyError
+        for an unknown code.
+        """
+        i = self.index[code]
+        if direction == 'in':
+            edges = self.in_edges[self.in_indptr[i]:self.in_indptr[i + 1]]
+            others = self.sources[edges]
+        else:
+            edges = np.arange(self.indptr[i], self.indptr[i + 1])
+            others = self.targets[edges]
+        if airline is not None:
+            wanted = np.flatnonzero(self.airlines == airline)
+            keep = np.isin(self.edge_airlines[edges], wanted)
+            edges, others = edges[keep], others[keep]
+
+        if not len(edges):
+            return []
+
+        # Group edges by neighbour (codes are sorted, so the result is too)
+        order = np.lexsort((self.edge_airlines[edges], self.code_rank[others]))
+        edges, others = edges[order], others[order]
+        starts = np.flatnonzero(np.r_[True, others[1:] != others[:-1]])
+        shortest = np.fmin.reduceat(self.distances[edges], starts)
+        airline_groups = np.split(self.edge_airlines[edges], starts[1:])
+        return [
+            {
+                **self.airport(other),
+                'airlines': self.airlines[group[group >= 0]].tolist(),
+                'distance_km': None if np.isnan(distance) else round(float(distance), 1),
+            }
+            for other, distance, group in zip(others[starts].tolist(), shortest.tolist(), airline_groups)
+        ]
+
+    def component_of(self, code: str, kind: str = 'weak', limit: int = 100) -> Dict[str, Any]:
+        """Size and (up to `limit`) members of the component containing `code`; KeyError if unknown"""
+        labels = self.components[kind]
+        members = np.flatnonzero(labels == labels[self.index[code]])
+        return {
+            'kind': kind,
+            'airport': code,
+            'size': int(len(members)),
+            'members': sorted(self.codes[members].tolist())[:limit],
+        }
+
+    def component_sizes(self, kind: str = 'weak', limit: int = 10) -> Dict[str, Any]:
+        """Number of components and the largest ones, with a few member codes each"""
+        labels = self.components[kind]
+        unique, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+        largest = np.argsort(-sizes, kind='stable')[:limit]
+        isolated = int(np.count_nonzero((self.out_degree + self.in_degree) == 0))
+        return {
+            'kind': kind,
+            'count': int(len(unique)),
+            'isolated_airports': isolated,
+            'largest': [
+                {'size': int(sizes[c]), 'sample': sorted(self.codes[inverse == c].tolist())[:10]}
+                for c in largest
+            ],
+        }
+
+    def pagerank(self, damping: float = 0.85, tolerance: float = 1e-9, max_iterations: int = 100) -> np.ndarray:
+        """
+        PageRank by power iteration, one edge per route, so a pair of airports
+        served by several airlines passes on more rank. Airports without
+        outgoing routes spread their rank evenly.
+        """
+        count = self.airport_count
+        if count == 0:
+            return np.zeros(0)
+        rank = np.full(count, 1.0 / count)
+        out_degree = self.out_degree.astype(np.float64)
+        dangling = out_degree == 0
+        share = np.divide(1.0, out_degree, out=np.zeros(count), where=~dangling)
+        for _ in range(max_iterations):
+            flow = np.bincount(self.targets, weights=(rank * share)[self.sources], minlength=count)
+            updated = (1.0 - damping) / count + damping * (flow + rank[dangling].sum() / count)
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+
+    def approximate_betweenness(self, samples: int = 256, seed: int = 0) -> np.ndarray:
+        """
+        Betweenness centrality over hop counts (Brandes), estimated from
+        `samples` random source airports and scaled to the whole graph; exact
+        when samples >= airports. Parallel routes of different airlines count
+        as one connection. Each BFS is level-synchronous, with every level's
+        path counting and dependency accumulation done as array operations.
+        """
+        count = self.airport_count
+        if count == 0 or self.route_count == 0:
+            return np.zeros(count)
+        pairs = np.unique(self.sources * count + self.targets)
+        sources, targets = pairs // count, pairs % count
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+        indptr, _ = _csr(sources, count)
+
+        def edges_of(nodes: np.ndarray) -> np.ndarray:
+            starts, ends = indptr[nodes], indptr[nodes + 1]
+            lengths = ends - starts
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            return offsets + np.arange(lengths.sum())
+
+        if samples >= count:
+            roots = np.arange(count)
+        else:
+            roots = np.random.default_rng(seed).choice(count, size=samples, replace=False)
+
+        centrality = np.zeros(count)
+        for root in roots:
+            distance = np.full(count, -1, dtype=np.int64)
+            sigma = np.zeros(count)
+            distance[root], sigma[root] = 0, 1.0
+            frontier = np.array([root])
+            # Edges from each level to the next, kept for the backward pass
+            level_edges = []
+            while len(frontier):
+                edges = edges_of(frontier)
+                heads = targets[edges]
+                unseen = distance[heads] == -1
+                next_frontier = np.unique(heads[unseen])
+                distance[next_frontier] = distance[frontier[0]] + 1
+                # Only edges into the next level lie on shortest paths
+                on_path = edges[distance[heads] == distance[frontier[0]] + 1]
+                sigma += np.bincount(targets[on_path], weights=sigma[sources[on_path]], minlength=count)
+                level_edges.append(on_path)
+                frontier = next_frontier
+
+            delta = np.zeros(count)
+            for edges in reversed(level_edges):
+                tails, heads = sources[edges], targets[edges]
+                delta += np.bincount(tails, weights=sigma[tails] / sigma[heads] * (1.0 + delta[heads]), minlength=count)
+            delta[root] = 0.0
+            centrality += delta
+        return centrality * (count / len(roots))
+
+    def airline_route_counts(self) -> Dict[str, int]:
+        """Routes flown by each airline"""
+        numbers = self.edge_airlines[self.edge_airlines >= 0]
+        counts = np.bincount(numbers, minlength=len(self.airlines))
+        return dict(zip(self.airlines.tolist(), counts.tolist()))
+
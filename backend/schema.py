@@ -0,0 +1,96 @@
+"""
+Versioned schema migrations for the Neo4j database.
+
+Every loader MERGEs airports and airlines by code and MATCHes both airports of
+each route by code, so without constraints each of those lookups is a label
+scan. MIGRATIONS lists the schema changes in order; the highest applied
+version is stored on a (:SchemaMigration) node, and `ensure_schema()` applies
+whatever is missing. It runs at startup and again before every seed (a fresh
+or cleared database may have been attached in between), and is cheap once
+the database is current.
+
+Statements use IF NOT EXISTS, so re-running a migration whose bookkeeping was
+lost is harmless. Migrations are append-only: to change the schema, add a new
+version instead of editing an applied one. Their statements are written out
+here rather than taken from the modules that use the indexes, so an applied
+migration can never change underneath.
+"""
+
+import asyncio
+import logging
+from typing import List, Tuple
+
+from database import run_neo4j_query
+
+# (version, description, statements), applied in order
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Unique Airport.code", [
+        "CREATE CONSTRAINT airport_code_unique IF NOT EXISTS FOR (a:Airport) REQUIRE a.code IS UNIQUE",
+    ]),
+    (2, "Unique Airline.code", [
+        "CREATE CONSTRAINT airline_code_unique IF NOT EXISTS FOR (al:Airline) REQUIRE al.code IS UNIQUE",
+    ]),
+    (3, "Index on ROUTE.airline", [
+        "CREATE INDEX route_airline IF NOT EXISTS FOR ()-[r:ROUTE]-() ON (r.airline)",
+    ]),
+    (4, "Point index on Airport.location", [
+        "CREATE POINT INDEX airport_location IF NOT EXISTS FOR (a:Airport) ON (a.location)",
+        # Airports loaded before the location property existed
+        """
+        MATCH (a:Airport)
+        WHERE a.location IS NULL AND a.latitude IS NOT NULL AND a.longitude IS NOT NULL
+          AND NOT (a.latitude = 0.0 AND a.longitude = 0.0)
+        SET a.location = point({latitude: a.latitude, longitude: a.longitude})
+        """,
+    ]),
+    (5, "Indexes on hub ranking properties", [
+        "CREATE INDEX airport_out_degree IF NOT EXISTS FOR (a:Airport) ON (a.out_degree)",
+        "CREATE INDEX airport_in_degree IF NOT EXISTS FOR (a:Airport) ON (a.in_degree)",
+        "CREATE INDEX airport_pagerank IF NOT EXISTS FOR (a:Airport) ON (a.pagerank)",
+        "CREATE INDEX airport_betweenness IF NOT EXISTS FOR (a:Airport) ON (a.betweenness)",
+        "CREATE INDEX airport_hub_rank IF NOT EXISTS FOR (a:Airport) ON (a.hub_rank)",
+        "CREATE INDEX airline_route_count IF NOT EXISTS FOR (al:Airline) ON (al.route_count)",
+    ]),
+]
+
+CURRENT_VERSION_QUERY = """
+MATCH (m:SchemaMigration)
+RETURN max(m.version) as version
+"""
+
+RECORD_MIGRATION_QUERY = """
+MERGE (m:SchemaMigration {version: $version})
+SET m.description = $description, m.applied_at = datetime()
+"""
+
+# Startup and a seed request may both find the schema behind
+_lock = asyncio.Lock()
+
+
+async def current_version() -> int:
+    rows = await run_neo4j_query(CURRENT_VERSION_QUERY, readonly=True)
+    return (rows[0]['version'] if rows else None) or 0
+
+
+async def ensure_schema() -> int:
+    """
+    Apply every migration newer than the recorded version and return the
+    resulting version. Stops at the first failing migration (for example a
+    uniqueness constraint on data that already has duplicate codes) so later
+    migrations never run on top of a missing one.
+    """
+    async with _lock:
+        version = await current_version()
+        for migration_version, description, statements in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            logging.info(f"Applying schema migration {migration_version}: {description}")
+            # Schema changes cannot share a transaction with data writes, so each runs on its own
+            for statement in statements:
+                await run_neo4j_query(statement)
+            await run_neo4j_query(RECORD_MIGRATION_QUERY, {
+                'version': migration_version,
+                'description': description
+            })
+            version = migration_version
+        return version
@@ -1,32 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Query
 from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
-import requests
 import json
-import pandas as pd
 from io import StringIO
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Neo4j connection
-neo4j_uri = os.environ['NEO4J_URI']
-neo4j_user = os.environ['NEO4J_USERNAME']
-neo4j_password = os.environ['NEO4J_PASSWORD']
-neo4j_database = os.environ['NEO4J_DATABASE']
-
-driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-
-# LLM API Configuration
-gemini_api_key = os.environ.get('GEMINI_API_KEY', '')
-openai_api_key = os.environ.get('OPENAI_API_KEY', '')
+from neo4j.exceptions import ClientError
+from database import run_neo4j_query, explain_neo4j_query, close_driver
+from graph_export import (
+    NODES_QUERY, LINKS_QUERY, DELTA_NODES_QUERY, DELTA_LINKS_QUERY, BINARY_MEDIA_TYPE,
+    format_node, format_link, iter_graph_ndjson, encode_graph_binary
+)
+from changelog import GraphChangelog
+import viewport
+import layout
+import route_graph
+import entity_index
+import rankings
+import itinerary
+import intents
+from ingest import AIRPORTS_QUERY, ROUTES_QUERY, AIRLINES_QUERY, ingest_rows, ingest_stream, iterate_in_thread
+from etl import build_dataset, plan_streaming_dataset, iter_route_records
+from jobs import SeedJob, SeedJobRegistry, SeedInProgress
+from schema import ensure_schema
+from snapshots import SnapshotStore
+from dataset_store import load_dataset_async, local_source_file
+from caches import TranslationCache, ResultCache, GraphVersion, GraphDataCache
+from llm import gemini_api_key, openai_api_key, close_llm_clients
+from llm_router import ProvidersUnavailable, build_router
+from cypher_guard import CypherGuard, QueryRejected, CYPHER_TIMEOUT_QUERY, CYPHER_TIMEOUT_GRAPHRAG
 
 if not gemini_api_key and not openai_api_key:
     logging.warning("No LLM API key set. LLM features will be limited.")
@@ -37,12 +48,31 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Simple cache for graph data
-graph_data_cache = {
-    'data': None,
-    'timestamp': None
-}
-CACHE_DURATION = 60  # Cache for 60 seconds
+# Bumped by every operation that modifies the graph (seed loaders, write queries)
+graph_version = GraphVersion()
+
+# Keys written at each graph version, used for /api/graph/data?since=<version>
+graph_changelog = GraphChangelog(max_entries=int(os.environ.get('GRAPH_CHANGELOG_SIZE', '50')))
+
+def bump_graph_version(reset: bool = False) -> int:
+    """Move to a new graph version, committing the staged changelog entry to it"""
+    if reset:
+        graph_changelog.record(reset=True)
+    version = graph_version.bump()
+    graph_changelog.commit(version)
+    return version
+
+# Results of executed read-only Cypher, valid until the graph version changes
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+
+# EXPLAIN-based cost checks for Cypher from clients and the LLM
+query_guard = CypherGuard(explain_neo4j_query)
+
+# Background seed jobs; at most one runs at a time
+seed_jobs = SeedJobRegistry(max_jobs=int(os.environ.get('SEED_JOB_HISTORY', '20')))
+SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', '15'))
 
 # Define Models
 class QueryRequest(BaseModel):
@@ -52,6 +82,11 @@ class QueryResponse(BaseModel):
     answer: str
     cypher_query: str
     results: List[Dict[str, Any]]
+    entities: List[Dict[str, Any]] = []
+    # 'template' when an intent answered without the LLM, else 'llm'
+    path: str = 'llm'
+    intent: Optional[str] = None
+    parameters: Dict[str, Any] = {}
 
 class GraphData(BaseModel):
     nodes: List[Dict[str, Any]]
@@ -59,269 +94,425 @@ class GraphData(BaseModel):
 
 class SeedDataRequest(BaseModel):
     clear_existing: bool = False
-    region: str = None  # 'BR', 'full', or None for sample
-
-# Helper function to run Neo4j queries
-def run_neo4j_query(query: str, parameters: dict = None):
-    def serialize_neo4j_object(obj):
-        """Convert Neo4j objects to serializable dictionaries"""
-        if hasattr(obj, '_properties'):  # Neo4j Node or Relationship
-            return dict(obj._properties)
-        elif hasattr(obj, 'items'):  # Dictionary-like
-            return {k: serialize_neo4j_object(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [serialize_neo4j_object(item) for item in obj]
-        else:
-            return obj
-    
-    with driver.session(database=neo4j_database) as session:
-        result = session.run(query, parameters or {})
-        records = []
-        for record in result:
-            record_dict = {}
-            for key, value in record.items():
-                record_dict[key] = serialize_neo4j_object(value)
-            records.append(record_dict)
-        return records
-
-# Helper function to call OpenAI API
-def call_openai_api(prompt: str) -> str:
-    """Call OpenAI API"""
-    url = "https://api.openai.com/v1/chat/completions"
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {openai_api_key}"
-    }
+    region: str = None  # 'BR' (or another ISO country code), 'full', or None for sample
+    stream: bool = False  # read the route file in chunks instead of loading it whole (regions and 'full')
+
+class ItineraryPair(BaseModel):
+    origin: str
+    destination: str
+
+class ItineraryFilters(BaseModel):
+    max_stops: Optional[int] = Field(None, ge=0, le=itinerary.ITINERARY_MAX_STOPS)  # None: any number of connections
+    airlines: Optional[List[str]] = None  # only routes of these airline codes
+    k: int = Field(1, ge=1, le=itinerary.ITINERARY_MAX_K)  # alternatives, shortest first
+
+class ItineraryRequest(ItineraryPair, ItineraryFilters):
+    pass
+
+class ItineraryBatchRequest(ItineraryFilters):
+    pairs: List[ItineraryPair] = Field(..., min_length=1, max_length=itinerary.ITINERARY_MAX_BATCH)
+
+async def load_full_graph() -> GraphData:
+    """Read every node and link for the visualization"""
+    logging.info("Fetching graph data from Neo4j...")
     
-    payload = {
-        "model": "gpt-3.5-turbo",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0,
-        "max_tokens": 300
-    }
+    nodes_data = await run_neo4j_query(NODES_QUERY, readonly=True)
+    links_data = await run_neo4j_query(LINKS_QUERY, readonly=True)
     
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    nodes = [format_node(node) for node in nodes_data]
+    links = [format_link(link) for link in links_data]
     
-    if response.status_code != 200:
-        raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+    # Node ids are only stable within a graph version, so older layouts are not reused
+    if graph_layout['version'] == graph_version.value:
+        layout.apply_layout(nodes, graph_layout['positions'])
     
-    result = response.json()
-    return result["choices"][0]["message"]["content"]
+    logging.info(f"Graph data loaded: {len(nodes)} nodes, {len(links)} links")
+    return GraphData(nodes=nodes, links=links)
 
-# Helper function to list available Gemini models
-def list_available_models():
-    """List all available Gemini models"""
-    if not gemini_api_key:
-        return []
+# Full graph payload: refreshed when the graph version changes or after CACHE_DURATION,
+# with concurrent misses coalesced and the stale copy served during refreshes
+CACHE_DURATION = int(os.environ.get('GRAPH_DATA_CACHE_SECONDS', '60'))
+graph_data_cache = GraphDataCache(load_full_graph, max_age=CACHE_DURATION)
+
+# Server-side x/y for every node, computed once per graph version by a background worker
+LAYOUT_ITERATIONS = int(os.environ.get('GRAPH_LAYOUT_ITERATIONS', '120'))
+graph_layout = {'version': None, 'positions': {}, 'seconds': None, 'pending': False, 'task': None}
+
+async def refresh_graph_layout():
+    """Compute the layout of the current graph and attach it to the cached payload"""
+    version = graph_version.value
+    entry = await graph_data_cache.get(version, allow_stale=False)
+    result = entry['data']
     
-    url = "https://generativelanguage.googleapis.com/v1beta/models"
-    params = {"key": gemini_api_key}
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    positions = await loop.run_in_executor(
+        None, layout.compute_layout, result.nodes, result.links, LAYOUT_ITERATIONS
+    )
+    graph_layout.update(version=entry['version'], positions=positions, seconds=round(loop.time() - started, 2))
     
+    layout.apply_layout(result.nodes, positions)
+    # The binary encoding was built without x/y
+    entry['binary'] = None
+
+async def graph_layout_worker():
+    # Seeds finishing while a layout runs set `pending` again, so the loop picks them up
+    while graph_layout['pending']:
+        graph_layout['pending'] = False
+        try:
+            await refresh_graph_layout()
+        except Exception as e:
+            logging.warning(f"Could not compute graph layout: {e}")
+
+def schedule_graph_layout():
+    """Recompute the layout in the background, coalescing requests made while one is running"""
+    graph_layout['pending'] = True
+    task = graph_layout['task']
+    if task is None or task.done():
+        graph_layout['task'] = asyncio.create_task(graph_layout_worker())
+
+async def load_route_graph() -> route_graph.RouteGraph:
+    """Snapshot Airport and ROUTE into the in-process CSR graph used by /api/analytics"""
+    version = graph_version.value
+    airports = await run_neo4j_query(route_graph.AIRPORTS_QUERY, readonly=True)
+    routes = await run_neo4j_query(route_graph.ROUTES_QUERY, readonly=True)
+    return await asyncio.to_thread(route_graph.RouteGraph, airports, routes, version)
+
+# CSR snapshot of the route graph, rebuilt in the background after each seed
+route_graph_store = SnapshotStore('route graph', load_route_graph, lambda graph: (
+    f"{graph.airport_count} airports, {graph.route_count} routes in {graph.seconds}s"))
+
+async def load_entity_index() -> entity_index.EntityIndex:
+    """Index airport, city, country and airline names for autocomplete and entity resolution"""
+    version = graph_version.value
+    airports = await run_neo4j_query(entity_index.AIRPORTS_QUERY, readonly=True)
+    airlines = await run_neo4j_query(entity_index.AIRLINES_QUERY, readonly=True)
+    return await asyncio.to_thread(entity_index.EntityIndex, airports, airlines, version)
+
+# Name lookups behind /api/autocomplete and GraphRAG entity resolution
+entity_index_store = SnapshotStore('entity index', load_entity_index, lambda index: (
+    f"{len(index.entities)} entities in {index.seconds}s"))
+
+def schedule_snapshots():
+    """Rebuild the in-process route graph and entity index after the data changed"""
+    route_graph_store.schedule()
+    entity_index_store.schedule()
+
+async def update_hub_rankings(job: Optional[SeedJob] = None) -> Dict[str, Any]:
+    """
+    Compute hub rankings on a fresh route graph snapshot and write them onto
+    the Airport and Airline nodes. Failures are reported, not raised: the
+    seeded data is fine without them.
+    """
+    started = asyncio.get_running_loop().time()
     try:
-        response = requests.get(url, params=params, timeout=5)
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            # Get models that support generateContent
-            valid_models = [
-                m["name"].replace("models/", "") 
-                for m in models 
-                if "generateContent" in m.get("supportedGenerationMethods", [])
-            ]
-            logging.info(f"Available Gemini models: {valid_models}")
-            return valid_models
-        else:
-            logging.warning(f"Failed to list models: {response.status_code}")
-            return []
+        graph = await load_route_graph()
+        ranked = await asyncio.to_thread(rankings.compute_rankings, graph)
+        progress = job.progress if job else None
+        airport_stats = await ingest_rows(rankings.AIRPORT_RANKINGS_QUERY, ranked['airports'],
+                                          label='airport rankings', progress=progress)
+        airline_stats = await ingest_rows(rankings.AIRLINE_RANKINGS_QUERY, ranked['airlines'],
+                                          label='airline rankings', progress=progress)
+        return {"airports": airport_stats['rows'], "airlines": airline_stats['rows'],
+                "seconds": round(asyncio.get_running_loop().time() - started, 2)}
     except Exception as e:
-        logging.warning(f"Error listing models: {e}")
-        return []
+        logging.warning(f"Could not update hub rankings: {e}")
+        return {"error": str(e)}
 
-# Helper function to call Gemini API directly via REST
-def call_gemini_api(prompt: str, model_name: str) -> str:
-    """Call Google Gemini API directly using REST"""
-    # Don't add models/ prefix - API expects just the model name
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "contents": [{
-            "parts": [{
-                "text": prompt
-            }]
-        }],
-        "generationConfig": {
-            "temperature": 0,
-            "maxOutputTokens": 512
-        }
-    }
-    
-    params = {
-        "key": gemini_api_key
-    }
-    
-    response = requests.post(url, headers=headers, params=params, json=payload, timeout=10)
-    
-    if response.status_code != 200:
-        raise Exception(f"Gemini API error: {response.status_code} - {response.text}")
-    
-    result = response.json()
-    return result["candidates"][0]["content"]["parts"][0]["text"]
-
-# Cache the working model
-_working_model = None
+# OpenAI then Gemini, hedged past each provider's p95 and skipped while failing
+llm_router = build_router()
 
-# Helper function to generate Cypher query using LLM
-async def generate_cypher_query(natural_language_query: str) -> str:
-    """Generate a Cypher query from natural language using LLM"""
-    global _working_model
-    
-    if not openai_api_key and not gemini_api_key:
-        raise HTTPException(status_code=500, detail="No LLM API key configured")
-    
-    system_prompt = """Neo4j Cypher expert. Aviation database with:
-- Airport: code, name, city, country
-- Airline: code, name, country  
+# Schema prompt used for Cypher generation. Changing it invalidates the translation cache.
+CYPHER_SYSTEM_PROMPT = """Neo4j Cypher expert. Aviation database with:
+- Airport: code, name, city, country, out_degree, in_degree, pagerank, betweenness, hub_rank (1 = biggest hub)
+- Airline: code, name, country, route_count
 - ROUTE: airline, distance_km, duration_hours
 
 Return ONLY Cypher query. LIMIT 50.
+Countries may be stored as names or ISO codes; when the question comes with resolved entities, use exactly the values given there.
 
 Examples:
-- "aeroportos no Brasil" -> MATCH (a:Airport) WHERE a.country = 'Brazil' RETURN a LIMIT 50
+- "aeroportos no Brasil" -> MATCH (a:Airport) WHERE a.country IN ['BR', 'Brazil'] RETURN a LIMIT 50
 - "rotas de GRU" -> MATCH (a:Airport {code: 'GRU'})-[r:ROUTE]->(b:Airport) RETURN a, r, b LIMIT 50
-- "linhas aéreas no Brasil" -> MATCH (a:Airline) WHERE a.country = 'Brazil' OR a.country = 'BR' RETURN a LIMIT 50
+- "linhas aéreas no Brasil" -> MATCH (a:Airline) WHERE a.country IN ['BR', 'Brazil'] RETURN a LIMIT 50
 - "linhas aéreas" -> MATCH (a:Airline) RETURN a LIMIT 50
 - "quantas linhas aéreas" -> MATCH (a:Airline) RETURN count(a) as total
-- "rotas da LATAM" -> MATCH (a:Airport)-[r:ROUTE]->(b:Airport) WHERE r.airline CONTAINS 'LATAM' OR r.airline CONTAINS 'latam' RETURN a, r, b LIMIT 50
+- "rotas da LATAM" -> MATCH (a:Airport)-[r:ROUTE]->(b:Airport) WHERE r.airline = 'LATAM' RETURN a, r, b LIMIT 50
+- "maiores hubs" -> MATCH (a:Airport) WHERE a.hub_rank <= 20 RETURN a ORDER BY a.hub_rank LIMIT 20
+- "aeroportos com mais de 10 rotas" -> MATCH (a:Airport) WHERE a.out_degree > 10 RETURN a ORDER BY a.out_degree DESC LIMIT 50
+- "companhias com mais rotas" -> MATCH (al:Airline) WHERE al.route_count > 0 RETURN al ORDER BY al.route_count DESC LIMIT 20
 """
+
+# Natural language -> Cypher translation cache
+translation_cache = TranslationCache(
+    max_entries=int(os.environ.get('TRANSLATION_CACHE_SIZE', '1000')),
+    ttl=float(os.environ.get('TRANSLATION_CACHE_TTL', '86400')),
+    db_path=os.environ.get('TRANSLATION_CACHE_PATH') or None,
+)
+
+def clean_cypher_response(response_text: str) -> str:
+    """Strip whitespace and markdown code fences from an LLM response"""
+    cypher_query = response_text.strip()
     
-    full_prompt = f"{system_prompt}\n\nQuestion: {natural_language_query}"
+    # Remove markdown code blocks if present
+    if cypher_query.startswith('```'):
+        lines = cypher_query.split('\n')
+        cypher_query = '\n'.join(lines[1:-1] if len(lines) > 2 and lines[-1].strip() == '```' else lines[1:])
     
-    # Try OpenAI first (more reliable)
-    if openai_api_key:
-        try:
-            logging.info("Using OpenAI API")
-            response_text = call_openai_api(full_prompt)
-            
-            cypher_query = response_text.strip()
-            
-            # Remove markdown code blocks if present
-            if cypher_query.startswith('```'):
-                lines = cypher_query.split('\n')
-                cypher_query = '\n'.join(lines[1:-1] if len(lines) > 2 and lines[-1].strip() == '```' else lines[1:])
-            
-            return cypher_query.strip()
-        except Exception as e:
-            logging.warning(f"OpenAI failed: {e}. Trying Gemini...")
-    
-    # Fallback to Gemini
-    if gemini_api_key:
-        # Get available models if not cached
-        if _working_model is None:
-            available_models = list_available_models()
-            if not available_models:
-                raise HTTPException(status_code=500, detail="No models available")
-            _working_model = available_models[0]
-            logging.info(f"Selected Gemini model: {_working_model}")
-        
-        try:
-            logging.info(f"Using Gemini model: {_working_model}")
-            response_text = call_gemini_api(full_prompt, _working_model)
-            
-            cypher_query = response_text.strip()
-            
-            # Remove markdown code blocks if present
-            if cypher_query.startswith('```'):
-                lines = cypher_query.split('\n')
-                cypher_query = '\n'.join(lines[1:-1] if len(lines) > 2 and lines[-1].strip() == '```' else lines[1:])
-            
-            return cypher_query.strip()
-            
-        except Exception as e:
-            error_msg = str(e)
-            logging.error(f"Gemini failed: {error_msg}")
-            _working_model = None
-            raise HTTPException(status_code=500, detail=f"Failed to generate query: {error_msg}")
+    return cypher_query.strip()
+
+# Helper function to generate Cypher query using LLM
+async def generate_cypher_query(natural_language_query: str, entity_context: str = "") -> str:
+    """
+    Generate a Cypher query from natural language using LLM. `entity_context`
+    lists the entities resolved in the question (entity_index.describe_mentions).
+    """
+    # The resolved values are part of the key: a reseed can store countries differently
+    cache_key = f"{natural_language_query}\n{entity_context}" if entity_context else natural_language_query
+    
+    # A cached translation skips the LLM round-trip entirely
+    cached_query = translation_cache.get(cache_key, CYPHER_SYSTEM_PROMPT)
+    if cached_query is not None:
+        logging.info("Translation cache hit")
+        return cached_query
+    
+    if not openai_api_key and not gemini_api_key:
+        raise HTTPException(status_code=500, detail="No LLM API key configured")
+    
+    sections = [CYPHER_SYSTEM_PROMPT, entity_context, f"Question: {natural_language_query}"]
+    full_prompt = "\n\n".join(section for section in sections if section)
     
-    raise HTTPException(status_code=500, detail="All LLM providers failed")
+    try:
+        response_text, provider = await llm_router.complete(full_prompt)
+    except ProvidersUnavailable as e:
+        logging.error(f"Cypher generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate query: {e}")
+    logging.info(f"Cypher generated with {provider}")
+    cypher_query = clean_cypher_response(response_text)
+    translation_cache.put(cache_key, cypher_query, CYPHER_SYSTEM_PROMPT)
+    return cypher_query
 
 @api_router.get("/")
 async def root():
     return {"message": "AeroGraph Analytics API - GraphRAG with Neo4j"}
 
-@api_router.post("/graphrag/query", response_model=QueryResponse)
-async def graphrag_query(request: QueryRequest):
+async def run_cached_query(query: str, parameters: dict = None, timeout: Optional[float] = None):
+    """Run a user-facing Cypher query in a read transaction, serving repeats from the result cache"""
+    version = graph_version.value
+    cached_results = result_cache.get(query, parameters, version)
+    if cached_results is not None:
+        logging.info("Result cache hit")
+        return cached_results
+    
+    results = await run_neo4j_query(query, parameters, readonly=True, timeout=timeout)
+    result_cache.put(query, parameters, version, results)
+    return results
+
+async def run_guarded_query(query: str, timeout: float) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Run Cypher written by a client or the LLM: checked by the cost guard,
+    in a read transaction, terminated by the database after `timeout`
+    seconds. Returns the Cypher actually run (with LIMIT or capped
+    variable-length patterns) and its results.
+    """
     try:
-        logging.info(f"Received query: {request.query}")
-        
-        # Generate Cypher query using LLM with timeout
-        try:
-            cypher_query = await asyncio.wait_for(
-                generate_cypher_query(request.query),
-                timeout=15.0  # 15 second timeout for query generation
-            )
-            logging.info(f"Generated Cypher: {cypher_query}")
-        except asyncio.TimeoutError:
-            logging.error("Query generation timed out after 15 seconds")
-            raise HTTPException(status_code=504, detail="A geração da consulta demorou muito. Tente uma pergunta mais simples.")
-        
-        # Execute the generated query
+        guarded = await query_guard.check(query, version=graph_version.value)
+    except QueryRejected as e:
+        raise HTTPException(status_code=422, detail=f"Consulta rejeitada pelo controle de custo: {e}")
+    try:
+        results = await run_cached_query(guarded.query, timeout=timeout)
+    except ClientError as e:
+        code = e.code or ''
+        if 'TransactionTimedOut' in code:
+            raise HTTPException(status_code=504, detail=f"A consulta excedeu o tempo limite de {timeout:g}s.")
+        if 'AccessMode' in code:
+            raise HTTPException(status_code=403, detail="Somente consultas de leitura são permitidas.")
+        raise
+    return guarded.query, results
+
+# Poll interval used to notice clients that went away mid-request
+DISCONNECT_POLL_INTERVAL = 0.5
+
+async def cancel_on_disconnect(http_request: Request, coro):
+    """Await coro, cancelling it (and any LLM call in flight) if the client disconnects"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logging.info("Client disconnected, cancelling request")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+def resolve_entities(question: str) -> List[Dict[str, Any]]:
+    """Entity mentions in a question (entity_index.EntityIndex.resolve), none until the index is built"""
+    index = entity_index_store.current
+    return index.resolve(question) if index is not None else []
+
+@api_router.post("/graphrag/query", response_model=QueryResponse)
+async def graphrag_query(request: QueryRequest, http_request: Request):
+    return await cancel_on_disconnect(http_request, answer_graphrag_query(request))
+
+def answer_prompt(question: str, results: List[Dict[str, Any]]) -> str:
+    return f"""Query: {question}
+Results (first 3): {results[:3]}
+
+Answer in Portuguese, 2 sentences max."""
+
+def basic_answer(results: List[Dict[str, Any]]) -> str:
+    """Answer used without an LLM or when it fails"""
+    return f"Encontrados {len(results)} resultados para sua consulta."
+
+async def plan_graphrag_query(question: str) -> QueryResponse:
+    """
+    Everything but the LLM answer: the resolved entities, the Cypher (intent
+    template or LLM) and all of its results. `answer` is only filled in on
+    the template path.
+    """
+    logging.info(f"Received query: {question}")
+    
+    # Airports, cities, countries and airlines named in the question, as stored in the graph
+    mentions = resolve_entities(question)
+    
+    # Common questions map straight to a Cypher template, skipping both LLM calls
+    match = intents.match_intent(question, mentions) if intents.INTENT_FAST_PATH else None
+    if match is not None:
+        logging.info(f"Answered by intent template: {match.intent}")
         try:
-            results = run_neo4j_query(cypher_query)
-            logging.info(f"Query returned {len(results)} results")
+            results = await run_cached_query(match.cypher, match.parameters, timeout=CYPHER_TIMEOUT_GRAPHRAG)
         except Exception as e:
             logging.error(f"Neo4j query failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Erro ao executar consulta no banco: {str(e)}")
+        return QueryResponse(
+            answer=match.answer(results),
+            cypher_query=match.cypher,
+            results=results,
+            entities=mentions,
+            path='template',
+            intent=match.intent,
+            parameters=match.parameters
+        )
+    
+    # Generate Cypher query using LLM with timeout
+    try:
+        cypher_query = await asyncio.wait_for(
+            generate_cypher_query(question, entity_index.describe_mentions(mentions)),
+            timeout=15.0  # 15 second timeout for query generation
+        )
+        logging.info(f"Generated Cypher: {cypher_query}")
+    except asyncio.TimeoutError:
+        logging.error("Query generation timed out after 15 seconds")
+        raise HTTPException(status_code=504, detail="A geração da consulta demorou muito. Tente uma pergunta mais simples.")
+    
+    # Execute the generated query
+    try:
+        cypher_query, results = await run_guarded_query(cypher_query, CYPHER_TIMEOUT_GRAPHRAG)
+        logging.info(f"Query returned {len(results)} results")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Neo4j query failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao executar consulta no banco: {str(e)}")
+    
+    return QueryResponse(
+        answer="",
+        cypher_query=cypher_query,
+        results=results,
+        entities=mentions
+    )
+
+async def answer_graphrag_query(request: QueryRequest) -> QueryResponse:
+    try:
+        response = await plan_graphrag_query(request.query)
         
         # Generate natural language answer using LLM
-        if openai_api_key or gemini_api_key:
+        if response.path == 'template':
+            answer = response.answer
+        elif llm_router.configured:
             try:
-                answer_prompt = f"""Query: {request.query}
-Results (first 3): {results[:3]}
-
-Answer in Portuguese, 2 sentences max."""
-                
-                # Try OpenAI first
-                if openai_api_key:
-                    try:
-                        answer = call_openai_api(answer_prompt)
-                        logging.info("Answer generated with OpenAI")
-                    except Exception as openai_error:
-                        logging.warning(f"OpenAI failed: {openai_error}")
-                        if gemini_api_key and _working_model:
-                            answer = call_gemini_api(answer_prompt, _working_model)
-                            logging.info("Answer generated with Gemini")
-                        else:
-                            raise
-                else:
-                    answer = call_gemini_api(answer_prompt, _working_model)
-                    logging.info("Answer generated with Gemini")
+                answer, provider = await llm_router.complete(answer_prompt(request.query, response.results))
+                logging.info(f"Answer generated with {provider}")
             except Exception as e:
                 logging.warning(f"Could not generate answer with LLM: {str(e)}. Using basic response.")
-                answer = f"Encontrados {len(results)} resultados para sua consulta."
+                answer = basic_answer(response.results)
         else:
-            answer = f"Encontrados {len(results)} resultados para sua consulta."
+            answer = basic_answer(response.results)
         
-        return QueryResponse(
-            answer=answer,
-            cypher_query=cypher_query,
-            results=results[:50]
-        )
+        response.answer = answer
+        response.results = response.results[:50]
+        return response
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error in graphrag_query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erro ao processar consulta: {str(e)}")
 
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@api_router.post("/graphrag/stream")
+async def graphrag_stream(request: QueryRequest, http_request: Request):
+    """
+    Server-sent events variant of /graphrag/query. A `query` event carries
+    the QueryResponse fields except the answer (Cypher, results, entities,
+    path) as soon as the query has run, `token` events the answer text as
+    the provider streams it, and `done` the full answer. Failures before
+    the first event are HTTP errors, as in /graphrag/query.
+    """
+    started = asyncio.get_running_loop().time()
+    
+    def elapsed_ms() -> float:
+        return round((asyncio.get_running_loop().time() - started) * 1000, 1)
+    
+    async def plan() -> QueryResponse:
+        try:
+            return await plan_graphrag_query(request.query)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Error in graphrag_stream: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Erro ao processar consulta: {str(e)}")
+    
+    response = await cancel_on_disconnect(http_request, plan())
+    results = response.results
+    
+    async def events():
+        yield sse_event('query', {**response.model_dump(exclude={'answer', 'results'}), 'results': results[:50], 'elapsed_ms': elapsed_ms()})
+        provider = None
+        if response.path == 'template':
+            answer = response.answer
+            yield sse_event('token', {'text': answer})
+        elif not llm_router.configured:
+            answer = basic_answer(results)
+            yield sse_event('token', {'text': answer})
+        else:
+            chunks = []
+            try:
+                async for provider, chunk in llm_router.stream(answer_prompt(request.query, results)):
+                    chunks.append(chunk)
+                    yield sse_event('token', {'text': chunk})
+                logging.info(f"Answer streamed from {provider}")
+            except Exception as e:
+                logging.warning(f"Could not stream answer with LLM: {str(e)}. Using basic response.")
+                if not chunks:
+                    chunks.append(basic_answer(results))
+                    yield sse_event('token', {'text': chunks[0]})
+            answer = "".join(chunks)
+        yield sse_event('done', {'answer': answer, 'provider': provider, 'elapsed_ms': elapsed_ms()})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
 @api_router.post("/query")
 async def direct_cypher_query(request: QueryRequest):
     """Execute a direct Cypher query without AI processing (for preset buttons)"""
     try:
         # Execute the Cypher query directly
-        results = run_neo4j_query(request.query)
+        cypher_query, results = await run_guarded_query(request.query, CYPHER_TIMEOUT_QUERY)
         
         # Filter out null and 'Unknown' values from results
         filtered_results = []
@@ -341,93 +532,323 @@ async def direct_cypher_query(request: QueryRequest):
         
         return {
             "answer": f"Consulta executada com sucesso. {len(filtered_results)} resultados encontrados.",
-            "cypher_query": request.query,
+            "cypher_query": cypher_query,
             "results": filtered_results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in direct query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error executing query: {str(e)}")
 
+def wants_binary_graph(http_request: Request, format: Optional[str]) -> bool:
+    """Binary payload is negotiated with ?format=binary or an Accept header"""
+    if format is not None:
+        return format == 'binary'
+    return BINARY_MEDIA_TYPE in http_request.headers.get('accept', '')
+
+def graph_etag(version: int, variant: str) -> str:
+    # Payloads change once the layout for their version is attached
+    if graph_layout['version'] == version:
+        variant += '-layout'
+    return f'"graph-{version}-{variant}"'
+
+async def load_graph_delta(changes: Dict[str, set]) -> Dict[str, list]:
+    """Current state of every node and link whose key appears in a changelog entry"""
+    nodes, links = [], []
+    if changes['airports'] or changes['airlines']:
+        nodes_data = await run_neo4j_query(DELTA_NODES_QUERY, {
+            'airports': sorted(changes['airports']),
+            'airlines': sorted(changes['airlines'])
+        }, readonly=True)
+        nodes = [format_node(node) for node in nodes_data]
+    if changes['routes']:
+        links_data = await run_neo4j_query(DELTA_LINKS_QUERY, {
+            'routes': [list(route) for route in sorted(changes['routes'])]
+        }, readonly=True)
+        links = [format_link(link) for link in links_data]
+    return {'nodes': nodes, 'links': links}
+
 @api_router.get("/graph/data", response_model=GraphData)
-async def get_graph_data():
+async def get_graph_data(http_request: Request, response: Response, format: Optional[str] = None,
+                         since: Optional[int] = None):
+    """
+    Whole graph for the visualization. JSON by default; clients sending
+    `Accept: application/vnd.aerograph.graph` (or ?format=binary) get the
+    compact AGB1 columnar encoding described in graph_export.encode_graph_binary.
+    
+    Every response carries the graph version in `X-Graph-Version` and an
+    `ETag`; a matching `If-None-Match` gets 304. With ?since=<version> only
+    the nodes and links written after that version are returned
+    ({"full": false, ...}), or the whole graph with "full": true when the
+    changelog can't describe the difference (reset, or version too old).
+    """
     try:
-        import time
-        
-        # Check cache
-        current_time = time.time()
-        if (graph_data_cache['data'] is not None and 
-            graph_data_cache['timestamp'] is not None and 
-            current_time - graph_data_cache['timestamp'] < CACHE_DURATION):
-            logging.info("Returning cached graph data")
-            return graph_data_cache['data']
-        
-        logging.info("Fetching graph data from Neo4j...")
-        
-        # Get nodes (airports and airlines) - no limit to show all data
-        nodes_query = """
-        MATCH (n)
-        WHERE n:Airport OR n:Airline
-        RETURN id(n) as id, labels(n)[0] as label, properties(n) as properties
-        """
-        nodes_data = run_neo4j_query(nodes_query)
-        
-        # Get relationships - no limit to show all data
-        links_query = """
-        MATCH (a)-[r:ROUTE]->(b)
-        RETURN id(a) as source, id(b) as target, type(r) as type, properties(r) as properties
-        """
-        links_data = run_neo4j_query(links_query)
+        version = graph_version.value
+        binary = since is None and wants_binary_graph(http_request, format)
+        if since is not None:
+            variant = f"since-{since}"
+        else:
+            variant = 'binary' if binary else 'json'
+        etag = graph_etag(version, variant)
+        headers = {'ETag': etag, 'X-Graph-Version': str(version)}
         
-        # Format nodes
-        nodes = []
-        for node in nodes_data:
-            node_id = node['id']
-            label = node['label']
-            props = node['properties']
-            
-            # Filter out null and 'Unknown' values
-            filtered_props = {}
-            for key, value in props.items():
-                if value is not None and value != '' and str(value).lower() not in ['unknown', 'null', 'none']:
-                    filtered_props[key] = value
-            
-            # Add country to properties for easy access
-            if label == 'Airport':
-                filtered_props['country'] = filtered_props.get('country', 'Unknown')
-            
-            nodes.append({
-                'id': str(node_id),
-                'label': label,
-                'name': filtered_props.get('name') or filtered_props.get('code', f"{label}_{node_id}"),
-                'country': filtered_props.get('country', 'Unknown') if label == 'Airport' else None,
-                **filtered_props
-            })
+        if http_request.headers.get('if-none-match') == etag or since == version:
+            return Response(status_code=304, headers=headers)
         
-        # Format links
-        links = []
-        for link in links_data:
-            link_props = link.get('properties', {})
-            links.append({
-                'source': str(link['source']),
-                'target': str(link['target']),
-                'type': link['type'],
-                'airline': link_props.get('airline', 'Unknown'),
-                'distance': link_props.get('distance_km', 0)
-            })
+        if since is not None:
+            changes = graph_changelog.changes_since(since, version)
+            if changes is not None:
+                delta = await load_graph_delta(changes)
+                logging.info(f"Graph delta since v{since}: {len(delta['nodes'])} nodes, {len(delta['links'])} links")
+                return JSONResponse(
+                    content={'version': version, 'since': since, 'full': False, **delta},
+                    headers=headers
+                )
         
-        result = GraphData(nodes=nodes, links=links)
+        # Clients that asked for a delta know they are behind, so they wait for fresh data
+        entry = await graph_data_cache.get(version, allow_stale=since is None)
+        result = entry['data']
+        if entry['version'] != version:
+            logging.info(f"Serving stale graph data (v{entry['version']}) while refreshing")
+            headers = {'ETag': graph_etag(entry['version'], variant), 'X-Graph-Version': str(entry['version'])}
         
-        # Update cache
-        graph_data_cache['data'] = result
-        graph_data_cache['timestamp'] = current_time
+        if since is not None:
+            return JSONResponse(
+                content={'version': entry['version'], 'since': since, 'full': True,
+                         'nodes': result.nodes, 'links': result.links},
+                headers=headers
+            )
         
-        logging.info(f"Graph data loaded: {len(nodes)} nodes, {len(links)} links")
+        if binary:
+            if entry['binary'] is None:
+                entry['binary'] = encode_graph_binary(result.nodes, result.links, entry['version'])
+            return Response(content=entry['binary'], media_type=BINARY_MEDIA_TYPE, headers=headers)
         
+        response.headers.update(headers)
         return result
     except Exception as e:
         logging.error(f"Error getting graph data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving graph data: {str(e)}")
 
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "translation": translation_cache.snapshot(),
+        "results": result_cache.snapshot(),
+        "graph_data": graph_data_cache.snapshot(),
+        "layout": {
+            "version": graph_layout['version'],
+            "nodes": len(graph_layout['positions']),
+            "seconds": graph_layout['seconds'],
+            "pending": graph_layout['pending'] or (graph_layout['task'] is not None and not graph_layout['task'].done())
+        },
+        "route_graph": route_graph_store.snapshot(),
+        "entity_index": entity_index_store.snapshot(),
+        "cypher_guard": query_guard.snapshot()
+    }
+
+@api_router.get("/graph/data/stream")
+async def stream_graph_data():
+    """
+    Stream the whole graph as chunked NDJSON: node lines, then link lines,
+    then a {"done": {...}} summary. Records go straight from the Neo4j cursor
+    to the socket, so clients can start rendering before the graph is complete.
+    """
+    return StreamingResponse(iter_graph_ndjson(), media_type="application/x-ndjson")
+
+@api_router.get("/graph/viewport")
+async def get_graph_viewport(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22)
+):
+    """
+    Airports and routes inside a bounding box, with level of detail by zoom.
+    Below VIEWPORT_DETAIL_ZOOM airports are aggregated into grid cells
+    ("mode": "clusters", links carry summed route counts between cells);
+    from there on individual airports and routes are returned ("mode": "airports").
+    Boxes with min_lon > max_lon cross the antimeridian.
+    """
+    if not viewport.is_valid_bbox(min_lat, max_lat):
+        raise HTTPException(status_code=400, detail="min_lat must not be greater than max_lat")
+    
+    params = viewport.viewport_parameters(min_lat, min_lon, max_lat, max_lon, zoom)
+    try:
+        if zoom < viewport.DETAIL_ZOOM:
+            cluster_rows = await run_cached_query(viewport.CLUSTER_NODES_QUERY, params)
+            link_rows = await run_cached_query(viewport.CLUSTER_LINKS_QUERY, params)
+            return {
+                "mode": "clusters",
+                "zoom": zoom,
+                "cell_degrees": params['cell'],
+                **viewport.format_clusters(cluster_rows, link_rows)
+            }
+        
+        nodes_data = await run_cached_query(viewport.DETAIL_NODES_QUERY, params)
+        links_data = await run_cached_query(viewport.DETAIL_LINKS_QUERY, params)
+        return {
+            "mode": "airports",
+            "zoom": zoom,
+            "nodes": [format_node(node) for node in nodes_data],
+            "links": [format_link(link) for link in links_data],
+            "truncated": len(links_data) >= viewport.MAX_DETAIL_ROUTES
+        }
+    except Exception as e:
+        logging.error(f"Error getting viewport: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving viewport: {str(e)}")
+
+def current_route_graph() -> route_graph.RouteGraph:
+    graph = route_graph_store.current
+    if graph is None:
+        detail = "Route graph is still being built" if route_graph_store.building else "Route graph is not available"
+        raise HTTPException(status_code=503, detail=detail)
+    return graph
+
+def analytics_response(graph: route_graph.RouteGraph, body: Dict[str, Any]) -> Dict[str, Any]:
+    # A write since the snapshot means a rebuild is queued or running
+    return {"version": graph.version, "stale": graph.version != graph_version.value, **body}
+
+@api_router.post("/analytics/rankings")
+async def refresh_hub_rankings():
+    """
+    Recompute the hub ranking properties now (seeds already do it), e.g.
+    after a bulk import or manual writes. Not allowed while a seed runs.
+    """
+    if seed_jobs.active() is not None:
+        raise HTTPException(status_code=409, detail="A seed job is running; rankings are updated when it finishes")
+    result = await update_hub_rankings()
+    if 'error' in result:
+        raise HTTPException(status_code=500, detail=f"Error updating rankings: {result['error']}")
+    # Ranking properties show up in graph payloads and query results
+    bump_graph_version(reset=True)
+    schedule_snapshots()
+    return result
+
+@api_router.get("/llm/providers")
+async def get_llm_providers():
+    """Circuit breaker state, latency percentiles, hedging counters and the chosen Gemini model"""
+    return llm_router.snapshot()
+
+@api_router.get("/analytics/summary")
+async def get_analytics_summary():
+    """Size and build information of the in-process route graph"""
+    graph = current_route_graph()
+    return analytics_response(graph, graph.summary())
+
+@api_router.get("/analytics/degree-distribution")
+async def get_degree_distribution(
+    direction: str = Query('out', pattern='^(out|in|total)$'),
+    top: int = Query(10, ge=0, le=500)
+):
+    """Number of airports per route count (outgoing, incoming or both), with the top airports"""
+    graph = current_route_graph()
+    return analytics_response(graph, graph.degree_distribution(direction, top))
+
+@api_router.get("/analytics/airports/{code}/neighbors")
+async def get_airport_neighbors(
+    code: str,
+    direction: str = Query('out', pattern='^(out|in)$'),
+    airline: Optional[str] = None
+):
+    """Airports with a direct route from (out) or to (in) an airport, optionally for one airline"""
+    graph = current_route_graph()
+    code = code.strip().upper()
+    try:
+        neighbors = graph.neighbors(code, direction, airline)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Airport {code} not found")
+    return analytics_response(graph, {"airport": code, "direction": direction, "airline": airline,
+                                      "count": len(neighbors), "neighbors": neighbors})
+
+@api_router.get("/analytics/components")
+async def get_connected_components(
+    kind: str = Query('weak', pattern='^(weak|strong)$'),
+    airport: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=1000)
+):
+    """
+    Connected components of the route graph: weak ignores route direction,
+    strong requires a path both ways. With `airport`, the component containing
+    it (up to `limit` members); otherwise the count and the largest components.
+    """
+    graph = current_route_graph()
+    if airport is None:
+        return analytics_response(graph, graph.component_sizes(kind, limit))
+    code = airport.strip().upper()
+    try:
+        return analytics_response(graph, graph.component_of(code, kind, limit))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Airport {code} not found")
+
+def airline_filter(airlines: Optional[List[str]]) -> Optional[List[str]]:
+    return [airline.strip().upper() for airline in airlines] if airlines else None
+
+@api_router.post("/itineraries")
+async def search_itineraries(request: ItineraryRequest):
+    """
+    Shortest itineraries by total distance between two airports, with at
+    most `max_stops` connections and only the given airlines, from the
+    in-process route graph.
+    """
+    graph = current_route_graph()
+    origin, destination = request.origin.strip().upper(), request.destination.strip().upper()
+    started = asyncio.get_running_loop().time()
+    try:
+        result = await asyncio.to_thread(
+            itinerary.search_itineraries, graph, origin, destination,
+            request.k, request.max_stops, airline_filter(request.airlines)
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Airport {e.args[0]} not found")
+    result['search_ms'] = round((asyncio.get_running_loop().time() - started) * 1000, 2)
+    return analytics_response(graph, result)
+
+@api_router.post("/itineraries/batch")
+async def search_itineraries_batch(request: ItineraryBatchRequest):
+    """Itinerary search for many origin/destination pairs with the same filters; results keep the pair order"""
+    graph = current_route_graph()
+    pairs = [(pair.origin.strip().upper(), pair.destination.strip().upper()) for pair in request.pairs]
+    started = asyncio.get_running_loop().time()
+    results = await asyncio.to_thread(
+        itinerary.search_batch, graph, pairs, request.k, request.max_stops, airline_filter(request.airlines)
+    )
+    return analytics_response(graph, {
+        "results": results,
+        "search_ms": round((asyncio.get_running_loop().time() - started) * 1000, 2)
+    })
+
+@api_router.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=entity_index.AUTOCOMPLETE_MAX_LIMIT),
+    types: Optional[str] = Query(None, description="Comma-separated: airport, city, country, airline")
+):
+    """
+    Airports, cities, countries and airlines whose code or name (any word of
+    it, accents ignored) starts with `q`, busiest first; misspellings are
+    matched when nothing starts with `q`.
+    """
+    index = entity_index_store.current
+    if index is None:
+        detail = "Entity index is still being built" if entity_index_store.building else "Entity index is not available"
+        raise HTTPException(status_code=503, detail=detail)
+    wanted = [kind.strip() for kind in types.split(',') if kind.strip()] if types else None
+    unknown = [kind for kind in wanted or [] if kind not in entity_index.ENTITY_TYPES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown entity type: {unknown[0]}")
+    started = asyncio.get_running_loop().time()
+    results = index.complete(q, limit, wanted)
+    return {
+        "query": q,
+        "version": index.version,
+        "results": results,
+        "lookup_ms": round((asyncio.get_running_loop().time() - started) * 1000, 3)
+    }
+
 @api_router.get("/examples")
 async def get_example_queries():
     return [
@@ -455,41 +876,130 @@ async def get_example_queries():
             "id": 5,
             "question": "Quantos aeroportos existem em cada país?",
             "description": "Contagem de aeroportos por país"
+        },
+        {
+            "id": 6,
+            "question": "Quais são os maiores hubs?",
+            "description": "Aeroportos com maior PageRank"
         }
     ]
 
-@api_router.post("/seed-data")
-async def seed_data(request: SeedDataRequest):
-    """
-    Seed database with data
-    - region=None: Sample data (10 airports)
-    - region='BR': All Brazil-related data
-    - region='full': Complete dataset (3993 nodes)
-    """
+async def run_seed(job: SeedJob, request: SeedDataRequest) -> Dict[str, Any]:
+    """Body of a seed job: clear if requested, run the loader for the region"""
     try:
-        # Clear cache when data is being modified
-        graph_data_cache['data'] = None
-        graph_data_cache['timestamp'] = None
+        # Cached graph data and query results expire with the version bump
+        bump_graph_version()
         
         # Clear existing data if requested
         if request.clear_existing:
-            run_neo4j_query("MATCH (n) DETACH DELETE n")
+            job.set_phase('clearing')
+            # Keep the migration bookkeeping: constraints and indexes survive the delete
+            await run_neo4j_query("MATCH (n) WHERE NOT n:SchemaMigration DETACH DELETE n")
+            graph_changelog.record(reset=True)
         
-        if request.region == 'BR':
+        # MERGE on code needs the uniqueness constraints, or every lookup is a label scan
+        job.set_phase('schema')
+        await ensure_schema()
+        
+        if request.stream and request.region:
+            # Route files larger than memory: chunked read, bounded ingest queue
+            region = None if request.region == 'full' else request.region.upper()
+            result = await seed_region_streaming(job, region, f"{request.region.upper()} data streamed successfully")
+        elif request.region == 'BR':
             # Load all Brazil-related airports and their connections
-            return await seed_brazil_data()
+            result = await seed_brazil_data(job)
         elif request.region == 'full':
             # Load complete dataset
-            return await seed_full_dataset()
+            result = await seed_full_dataset(job)
+        elif request.region:
+            # Any other ISO country code: its airports and domestic routes
+            result = await seed_region_data(job, request.region.upper(), f"{request.region.upper()} data loaded successfully")
         else:
             # Load sample data (original 10 airports)
-            return await seed_sample_data()
-            
-    except Exception as e:
-        logging.error(f"Error seeding data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error seeding data: {str(e)}")
+            result = await seed_sample_data(job)
+        
+        # Post-ingest stage: degree, PageRank and betweenness onto the nodes
+        job.set_phase('rankings')
+        result['rankings'] = await update_hub_rankings(job)
+        # Rankings are rewritten on every Airport and Airline, not just the ones the
+        # loader touched, so a delta against an older version would miss them
+        graph_changelog.record(reset=True)
+        return result
+    finally:
+        # Results cached while the seed was running may already be stale
+        bump_graph_version()
+        schedule_graph_layout()
+        schedule_snapshots()
 
-async def seed_sample_data():
+@api_router.post("/seed-data", status_code=202)
+async def seed_data(request: SeedDataRequest, wait: bool = False):
+    """
+    Seed database with data in a background job
+    - region=None: Sample data (10 airports)
+    - region='BR': All Brazil-related data
+    - region='full': Complete dataset (3993 nodes)
+    - stream=true: read the route file in chunks (for files larger than memory)
+    
+    Returns the job id right away; follow it on /api/seed-data/jobs/{id}
+    or its /events SSE stream. Only one seed runs at a time (409 otherwise).
+    With ?wait=true the request blocks and returns the loader result, as it
+    did before jobs existed.
+    """
+    try:
+        job = seed_jobs.start(request.region, request.clear_existing, lambda job: run_seed(job, request))
+    except SeedInProgress as e:
+        raise HTTPException(status_code=409, detail={
+            "message": "Another seed is already running",
+            "job_id": e.job.id,
+            "status_url": f"/api/seed-data/jobs/{e.job.id}"
+        })
+    
+    if wait:
+        await asyncio.shield(job.task)
+        if job.status == 'failed':
+            raise HTTPException(status_code=500, detail=f"Error seeding data: {job.error}")
+        return JSONResponse(status_code=200, content=job.result)
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/seed-data/jobs/{job.id}",
+        "events_url": f"/api/seed-data/jobs/{job.id}/events"
+    }
+
+@api_router.get("/seed-data/jobs/{job_id}")
+async def get_seed_job(job_id: str):
+    """Phase, rows processed per dataset and throughput of a seed job"""
+    job = seed_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Seed job not found")
+    return job.snapshot()
+
+@api_router.get("/seed-data/jobs/{job_id}/events")
+async def stream_seed_job(job_id: str):
+    """
+    Server-sent events for a seed job: a `progress` event with the job
+    snapshot on every change, then a final `done` event once it finishes.
+    """
+    job = seed_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Seed job not found")
+    
+    async def events():
+        while True:
+            # Read the state before waiting so no change between the two is lost
+            finished = job.finished
+            event = 'done' if finished else 'progress'
+            yield sse_event(event, job.snapshot())
+            if finished:
+                return
+            while not await job.wait_for_change(SSE_KEEPALIVE_SECONDS):
+                # Comment lines keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
+async def seed_sample_data(job: SeedJob):
     """Load sample data with 10 airports"""
     # Create airports
     airports = [
@@ -505,13 +1015,6 @@ async def seed_sample_data():
         {"code": "DXB", "name": "Dubai International Airport", "city": "Dubai", "country": "UAE"}
     ]
     
-    for airport in airports:
-        query = """
-        MERGE (a:Airport {code: $code})
-        SET a.name = $name, a.city = $city, a.country = $country
-        """
-        run_neo4j_query(query, airport)
-    
     # Create airlines
     airlines = [
         {"code": "LATAM", "name": "LATAM Airlines", "country": "Brazil"},
@@ -521,13 +1024,6 @@ async def seed_sample_data():
         {"code": "EK", "name": "Emirates", "country": "UAE"}
     ]
     
-    for airline in airlines:
-        query = """
-        MERGE (al:Airline {code: $code})
-        SET al.name = $name, al.country = $country
-        """
-        run_neo4j_query(query, airline)
-    
     # Create routes
     routes = [
         {"from": "GRU", "to": "GIG", "airline": "LATAM", "distance": 365, "duration": 1.0},
@@ -542,302 +1038,106 @@ async def seed_sample_data():
         {"from": "CGH", "to": "GIG", "airline": "GOL", "distance": 365, "duration": 1.0}
     ]
     
-    for route in routes:
-        query = """
-        MATCH (a:Airport)
-        WHERE a.code = $from
-        MATCH (b:Airport)
-        WHERE b.code = $to
-        MERGE (a)-[r:ROUTE {airline: $airline}]->(b)
-        SET r.distance_km = $distance, r.duration_hours = $duration
-        """
-        run_neo4j_query(query, route)
-    
-    return {"message": "Sample data loaded", "airports": len(airports), "airlines": len(airlines), "routes": len(routes)}
-
-async def seed_brazil_data():
-    """Load Brazil-related airports, airlines and routes - OPTIMIZED"""
+    return await write_dataset(job, {'airports': airports, 'routes': routes, 'airlines': airlines}, "Sample data loaded")
+
+async def write_dataset(job: SeedJob, dataset: Dict[str, List[Dict[str, Any]]], message: str) -> Dict[str, Any]:
+    """
+    Ingest the airports, routes and airlines of an ETL dataset. Airports are
+    committed first so the route MATCHes find both endpoints.
+    """
+    airport_stats = await ingest_rows(AIRPORTS_QUERY, dataset['airports'], label='airports', progress=job.progress)
+    route_stats = await ingest_rows(ROUTES_QUERY, dataset['routes'], label='routes', progress=job.progress)
+    airline_stats = await ingest_rows(AIRLINES_QUERY, dataset['airlines'], label='airlines', progress=job.progress)
+    
+    graph_changelog.record(
+        airports=[airport['code'] for airport in dataset['airports']],
+        airlines=[airline['code'] for airline in dataset['airlines']],
+        routes=[(route['from'], route['airline'], route['to']) for route in dataset['routes']]
+    )
+    
+    return seed_result(message, airport_stats, route_stats, airline_stats)
+
+def seed_result(message: str, airport_stats: Dict[str, Any], route_stats: Dict[str, Any],
+                airline_stats: Dict[str, Any]) -> Dict[str, Any]:
+    logging.info(f"{message}: {airport_stats['rows']} airports, {airline_stats['rows']} airlines, {route_stats['rows']} routes")
+    return {
+        "message": message,
+        "airports": airport_stats['rows'],
+        "airlines": airline_stats['rows'],
+        "routes": route_stats['rows'],
+        "ingest": [airport_stats, route_stats, airline_stats]
+    }
+
+async def seed_region_data(job: SeedJob, region: Optional[str], message: str) -> Dict[str, Any]:
+    """Download (or read the stored copy of) every source and load one region, or everything with region=None"""
     try:
-        logging.info("Loading Brazil dataset...")
-        
-        # Load routes first to know which airports actually have connections
-        url_routes = 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/13e519574832172b538fd5588673132cb826cd20/routes.csv'
-        routes_df = pd.read_csv(url_routes)
-        logging.info(f"Read {len(routes_df)} total routes from CSV")
-        
-        # Load all airports to identify Brazilian ones
-        url_airports = 'https://raw.githubusercontent.com/datasets/airport-codes/master/data/airport-codes.csv'
-        airports_df = pd.read_csv(url_airports)
-        
-        # Get all Brazilian airport IATA codes
-        br_airports_all = airports_df[airports_df['iso_country'] == 'BR'].copy()
-        br_codes_all = set(br_airports_all['iata_code'].dropna().str.strip().str.upper().values)
-        logging.info(f"Found {len(br_codes_all)} Brazilian airport codes in airports CSV")
-        
-        # Filter routes where BOTH source AND destination are in Brazil (domestic routes)
-        br_routes = routes_df[
-            (routes_df['source_airport'].isin(br_codes_all)) & 
-            (routes_df['destination_apirport'].isin(br_codes_all))
-        ].copy()
-        logging.info(f"Filtered to {len(br_routes)} domestic Brazil routes")
-        
-        # Get unique airports actually used in routes
-        airports_with_routes = set(br_routes['source_airport'].unique()) | set(br_routes['destination_apirport'].unique())
-        logging.info(f"Found {len(airports_with_routes)} airports with active routes")
-        
-        # Filter to only airports that have routes
-        br_airports = br_airports_all[br_airports_all['iata_code'].isin(airports_with_routes)].copy()
-        
-        # Prepare airports batch
-        airports_batch = []
-        for _, row in br_airports.iterrows():
-            iata = row.get('iata_code')
-            if pd.notna(iata) and iata:
-                lat, lon = 0.0, 0.0
-                if pd.notna(row.get('coordinates')):
-                    try:
-                        coords = row['coordinates'].split(',')
-                        lon = float(coords[0])
-                        lat = float(coords[1])
-                    except:
-                        pass
-                
-                airports_batch.append({
-                    'code': str(iata).strip().upper(),
-                    'name': row.get('name', ''),
-                    'city': row.get('municipality', ''),
-                    'country': 'BR',
-                    'latitude': lat,
-                    'longitude': lon
-                })
-        
-        # Batch insert airports
-        airport_count = 0
-        if airports_batch:
-            query = """
-            UNWIND $batch as airport
-            MERGE (a:Airport {code: airport.code})
-            SET a.name = airport.name, 
-                a.city = airport.city, 
-                a.country = airport.country,
-                a.latitude = airport.latitude,
-                a.longitude = airport.longitude
-            """
-            run_neo4j_query(query, {'batch': airports_batch})
-            airport_count = len(airports_batch)
-            logging.info(f"Loaded {airport_count} Brazilian airports with routes")
-        
-        # Prepare routes batch
-        routes_batch = []
-        for _, route in br_routes.iterrows():
-            airline = route.get('airline', 'Unknown')
-            if airline and str(airline).lower() not in ['', 'null', 'none']:
-                routes_batch.append({
-                    'from': route['source_airport'],
-                    'to': route['destination_apirport'],
-                    'airline': str(airline),
-                    'distance': float(route.get('distance', 0))
-                })
-        
-        # Batch insert routes
-        route_count = 0
-        if routes_batch:
-            query = """
-            UNWIND $batch as route
-            MATCH (a:Airport)
-            WHERE a.code = route.from
-            MATCH (b:Airport)
-            WHERE b.code = route.to
-            MERGE (a)-[r:ROUTE {airline: route.airline}]->(b)
-            SET r.distance_km = route.distance
-            """
-            run_neo4j_query(query, {'batch': routes_batch})
-            route_count = len(routes_batch)
-            logging.info(f"Loaded {route_count} Brazil domestic routes")
-        
-        # Get unique airlines from routes (airlines actually operating in Brazil)
-        unique_airlines = br_routes['airline'].dropna().unique()
-        unique_airlines = [a for a in unique_airlines if str(a).lower() not in ['unknown', '', 'null', 'none']]
-        logging.info(f"Found {len(unique_airlines)} unique airlines operating in Brazil")
-        
-        # Load airline details from CSV
-        url_airlines = 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/2697297ee7ae3eed7c679f7d1f195c1f502aa11b/Airlines_Unicas.csv'
-        airlines_df = pd.read_csv(url_airlines)
-        
-        # Create airline nodes for each unique airline code found in routes
-        airlines_batch = []
-        for airline_code in unique_airlines:
-            airline_code_upper = str(airline_code).strip().upper()
-            
-            # Try to find airline details in CSV
-            airline_row = None
-            if 'IATA' in airlines_df.columns:
-                airline_row = airlines_df[airlines_df['IATA'].str.upper() == airline_code_upper]
-            if (airline_row is None or airline_row.empty) and 'ICAO' in airlines_df.columns:
-                airline_row = airlines_df[airlines_df['ICAO'].str.upper() == airline_code_upper]
-            if (airline_row is None or airline_row.empty) and 'Code' in airlines_df.columns:
-                airline_row = airlines_df[airlines_df['Code'].str.upper() == airline_code_upper]
-            
-            if airline_row is not None and not airline_row.empty:
-                row = airline_row.iloc[0]
-                name = row.get('Name') or row.get('Airline') or airline_code_upper
-                country = row.get('Country', 'Unknown')
-            else:
-                name = airline_code_upper
-                country = 'Unknown'
-            
-            airlines_batch.append({
-                'code': airline_code_upper,
-                'name': name,
-                'country': country
-            })
-        
-        # Batch insert airlines
-        airline_count = 0
-        if airlines_batch:
-            query = """
-            UNWIND $batch as airline
-            MERGE (al:Airline {code: airline.code})
-            SET al.name = airline.name, al.country = airline.country
-            """
-            run_neo4j_query(query, {'batch': airlines_batch})
-            airline_count = len(airlines_batch)
-            logging.info(f"Loaded {airline_count} airlines operating in Brazil")
+        logging.info(f"Loading {region or 'full'} dataset...")
+        job.set_phase('downloading')
+        airports_df, routes_df, airlines_base_df, airlines_info_df = await asyncio.gather(
+            load_dataset_async('airports'),
+            load_dataset_async('routes'),
+            load_dataset_async('airlines_base'),
+            load_dataset_async('airlines_info'),
+        )
         
-        logging.info(f"Brazil data loaded: {airport_count} airports, {airline_count} airlines, {route_count} routes")
-        return {
-            "message": "Brazil data loaded successfully", 
-            "airports": airport_count,
-            "airlines": airline_count,
-            "routes": route_count
-        }
+        job.set_phase('transforming')
+        dataset = await asyncio.to_thread(
+            build_dataset, airports_df, routes_df, [airlines_base_df, airlines_info_df], region
+        )
+        return await write_dataset(job, dataset, message)
     except Exception as e:
-        logging.error(f"Error loading Brazil data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error loading Brazil data: {str(e)}")
+        logging.error(f"Error loading {region or 'full'} dataset: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading {region or 'full'} dataset: {str(e)}")
 
-async def seed_full_dataset():
-    """Load complete dataset with all airports and routes - OPTIMIZED"""
+async def seed_region_streaming(job: SeedJob, region: Optional[str], message: str) -> Dict[str, Any]:
+    """
+    seed_region_data for route files larger than memory. Airports and airline
+    tables are small and loaded as usual; the route file is read in
+    STREAM_CHUNK_ROWS chunks, filtered and cleaned per chunk, and fed to a
+    bounded ingest queue, so at most a few chunks are in memory at once.
+    """
     try:
-        # Force rebuild: 2025-12-10 22:08 UTC
-        logging.info("Loading full dataset with batch processing...")
-        
-        # Load airports - optimized with vectorized operations
-        url_airports = 'https://raw.githubusercontent.com/datasets/airport-codes/master/data/airport-codes.csv'
-        airports_df = pd.read_csv(url_airports)
-        
-        logging.info(f"Processing {len(airports_df)} airport rows from CSV...")
-        
-        # Filter for valid IATA codes using vectorized operations
-        airports_df = airports_df[airports_df['iata_code'].notna()].copy()
-        airports_df['iata_code'] = airports_df['iata_code'].str.strip().str.upper()
-        airports_df = airports_df[airports_df['iata_code'].str.len() == 3]
-        airports_df = airports_df[airports_df['iata_code'].str.isalpha()]
-        
-        # Parse coordinates vectorized
-        airports_df[['lon', 'lat']] = airports_df['coordinates'].str.split(',', expand=True).astype(float, errors='ignore').fillna(0.0)
-        
-        # Prepare batch data
-        airports_batch = airports_df[['iata_code', 'name', 'municipality', 'iso_country', 'lat', 'lon']].rename(
-            columns={'iata_code': 'code', 'municipality': 'city', 'iso_country': 'country', 'lat': 'latitude', 'lon': 'longitude'}
-        ).fillna('').to_dict('records')
-        
-        logging.info(f"Filtered to {len(airports_batch)} airports with valid IATA codes")
-        
-        # Batch insert all airports at once
-        if airports_batch:
-            query = """
-            UNWIND $batch as airport
-            MERGE (a:Airport {code: airport.code})
-            SET a.name = airport.name, 
-                a.city = airport.city, 
-                a.country = airport.country,
-                a.latitude = airport.latitude,
-                a.longitude = airport.longitude
-            """
-            run_neo4j_query(query, {'batch': airports_batch})
-            airport_count = len(airports_batch)
-            logging.info(f"Loaded {airport_count} airports in batch")
-        else:
-            airport_count = 0
-        
-        # Load ALL routes - optimized
-        logging.info("Loading routes from CSV...")
-        url_routes = 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/13e519574832172b538fd5588673132cb826cd20/routes.csv'
-        routes_df = pd.read_csv(url_routes)
-        logging.info(f"Read {len(routes_df)} routes from CSV")
-        
-        # Prepare batch data with vectorized operations
-        routes_df['airline'] = routes_df['airline'].fillna('Unknown')
-        routes_df['distance'] = pd.to_numeric(routes_df['distance'], errors='coerce').fillna(0.0)
-        
-        routes_batch = routes_df[['source_airport', 'destination_apirport', 'airline', 'distance']].rename(
-            columns={'source_airport': 'from', 'destination_apirport': 'to'}
-        ).to_dict('records')
-        
-        # Batch insert routes
-        route_count = 0
-        if routes_batch:
-            query = """
-            UNWIND $batch as route
-            MATCH (a:Airport)
-            WHERE a.code = route.from
-            MATCH (b:Airport)
-            WHERE b.code = route.to
-            MERGE (a)-[r:ROUTE {airline: route.airline}]->(b)
-            SET r.distance_km = route.distance
-            """
-            run_neo4j_query(query, {'batch': routes_batch})
-            route_count = len(routes_batch)
-            logging.info(f"Loaded {route_count} routes in batch")
-        
-        # Load ALL airlines - optimized
-        logging.info("Loading airlines from CSV...")
-        url_base_airlines = 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/2697297ee7ae3eed7c679f7d1f195c1f502aa11b/Airlines_Unicas.csv'
-        url_info_airlines = 'https://gist.githubusercontent.com/XimenesJu/23ff54741a6f183b2c7e367d003dcc69/raw/2697297ee7ae3eed7c679f7d1f195c1f502aa11b/airline_info.csv'
-        
-        airlines_base_df = pd.read_csv(url_base_airlines)
-        airlines_info_df = pd.read_csv(url_info_airlines)
-        
-        # Merge and deduplicate
-        airlines_df = pd.concat([airlines_base_df, airlines_info_df], ignore_index=True).drop_duplicates()
-        logging.info(f"Merged {len(airlines_df)} unique airlines from both sources")
-        
-        # Combine code columns
-        airlines_df['code'] = airlines_df.get('IATA', airlines_df.get('ICAO', airlines_df.get('Code', ''))).fillna('Unknown')
-        airlines_df['name'] = airlines_df.get('Name', airlines_df.get('Airline', '')).fillna('Unknown')
-        airlines_df['country'] = airlines_df.get('Country', '').fillna('')
-        
-        # Filter out completely empty rows
-        airlines_df = airlines_df[(airlines_df['code'] != '') | (airlines_df['name'] != '')]
-        airlines_df['code'] = airlines_df['code'].replace('', 'Unknown')
-        airlines_df['name'] = airlines_df['name'].replace('', 'Unknown')
+        logging.info(f"Streaming {region or 'full'} dataset...")
+        job.set_phase('downloading')
+        airports_df, airlines_base_df, airlines_info_df, routes_source = await asyncio.gather(
+            load_dataset_async('airports'),
+            load_dataset_async('airlines_base'),
+            load_dataset_async('airlines_info'),
+            asyncio.to_thread(local_source_file, 'routes'),
+        )
         
-        # Prepare batch
-        airlines_batch = airlines_df[['code', 'name', 'country']].to_dict('records')
+        # A region scans the route file once for the airports and airlines it uses
+        job.set_phase('scanning')
+        plan = await asyncio.to_thread(
+            plan_streaming_dataset, airports_df, [airlines_base_df, airlines_info_df], routes_source, region
+        )
+        del airports_df, airlines_base_df, airlines_info_df
         
-        # Batch insert airlines
-        airline_count = 0
-        if airlines_batch:
-            query = """
-            UNWIND $batch as airline
-            MERGE (al:Airline {code: airline.code})
-            SET al.name = airline.name
-            SET al.country = CASE WHEN airline.country IS NOT NULL THEN airline.country ELSE al.country END
-            """
-            run_neo4j_query(query, {'batch': airlines_batch})
-            airline_count = len(airlines_batch)
-            logging.info(f"Loaded {airline_count} airlines in batch")
+        # Airports first, so the route MATCHes find both endpoints
+        airport_stats = await ingest_rows(AIRPORTS_QUERY, plan['airports'], label='airports', progress=job.progress)
+        route_stats = await ingest_stream(
+            ROUTES_QUERY,
+            iterate_in_thread(iter_route_records(routes_source, plan['region_codes'])),
+            label='routes',
+            progress=job.progress,
+            total=plan['routes']
+        )
+        airline_stats = await ingest_rows(AIRLINES_QUERY, plan['airlines'], label='airlines', progress=job.progress)
         
-        logging.info(f"Full dataset loaded: {airport_count} airports, {airline_count} airlines, {route_count} routes")
-        return {
-            "message": "Full dataset loaded successfully",
-            "airports": airport_count,
-            "airlines": airline_count,
-            "routes": route_count
-        }
+        # Route keys are never all in memory, so clients reload instead of patching
+        graph_changelog.record(reset=True)
+        return seed_result(message, airport_stats, route_stats, airline_stats)
     except Exception as e:
-        logging.error(f"Error loading full dataset: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error loading full dataset: {str(e)}")
+        logging.error(f"Error streaming {region or 'full'} dataset: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error streaming {region or 'full'} dataset: {str(e)}")
+
+async def seed_brazil_data(job: SeedJob):
+    """Load Brazilian airports with domestic routes and the airlines operating them"""
+    return await seed_region_data(job, 'BR', "Brazil data loaded successfully")
+
+async def seed_full_dataset(job: SeedJob):
+    """Load complete dataset with all airports, routes and airlines"""
+    return await seed_region_data(job, None, "Full dataset loaded successfully")
 
 # Health check endpoint
 @app.get("/health")
@@ -851,6 +1151,7 @@ app.add_middleware(
     allow_origins=["*"],  # Allow all origins for development
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Graph-Version"],
 )
 
 # Include the router in the main app
@@ -863,6 +1164,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_event():
+    # Constraints and indexes the loaders and viewport queries rely on
+    try:
+        version = await ensure_schema()
+        logging.info(f"Database schema at version {version}")
+    except Exception as e:
+        logging.warning(f"Could not apply schema migrations: {e}")
+    
+    # Layout, analytics snapshot and entity index for the data already in the database
+    schedule_graph_layout()
+    schedule_snapshots()
+    
+    # Connections, Gemini model choice and first latencies before the first question
+    if llm_router.configured:
+        asyncio.create_task(llm_router.warm_up())
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    driver.close()
\ No newline at end of file
+    await close_driver()
+    await close_llm_clients()
\ No newline at end of file
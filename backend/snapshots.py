@@ -0,0 +1,61 @@
+"""
+Background-built, in-process snapshots of the graph.
+
+A SnapshotStore holds the current snapshot (route_graph.RouteGraph,
+entity_index.EntityIndex) and rebuilds it with its loader when `schedule()`
+is called after a seed. Requests that arrive while a build runs are
+coalesced into one more build, and the previous snapshot keeps being served
+meanwhile. The snapshot type only needs a `summary()` dict.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+Snapshot = TypeVar('Snapshot')
+
+
+class SnapshotStore(Generic[Snapshot]):
+    """
+    The current snapshot, rebuilt in the background with `schedule()`.
+    `describe(snapshot)` is logged after each build, e.g. its size and build time.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Snapshot]],
+                 describe: Callable[[Snapshot], str]):
+        self.name = name
+        self._loader = loader
+        self._describe = describe
+        self.current: Optional[Snapshot] = None
+        self.error: Optional[str] = None
+        self._pending = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _worker(self):
+        # Seeds finishing while a build runs set `_pending` again, so the loop picks them up
+        while self._pending:
+            self._pending = False
+            try:
+                self.current = await self._loader()
+                self.error = None
+                logging.info(f"{self.name.capitalize()} rebuilt: {self._describe(self.current)}")
+            except Exception as e:
+                self.error = str(e)
+                logging.warning(f"Could not build {self.name}: {e}")
+
+    def schedule(self):
+        """Rebuild the snapshot in the background, coalescing requests made while one is running"""
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+
+    @property
+    def building(self) -> bool:
+        return self._pending or (self._task is not None and not self._task.done())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **(self.current.summary() if self.current is not None else {'version': None}),
+            'building': self.building,
+            'error': self.error,
+        }
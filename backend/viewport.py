@@ -0,0 +1,107 @@
+"""
+Viewport and level-of-detail queries for the map view.
+
+Airports carry a `location` point (set by the seed loaders from latitude and
+longitude) backed by a point index (schema migration 4), so bounding-box
+filters are index seeks.
+Below DETAIL_ZOOM the airports inside the box are aggregated into grid cells
+whose size follows the zoom level, with route counts summed between cells;
+from DETAIL_ZOOM on, individual airports and routes are returned.
+"""
+
+import os
+from typing import Any, Dict
+
+# Zoom level (web map convention, 0 = whole world) from which airports are returned individually
+DETAIL_ZOOM = int(os.environ.get('VIEWPORT_DETAIL_ZOOM', '6'))
+# Grid cells per 256px map tile at low zoom
+CELLS_PER_TILE = int(os.environ.get('VIEWPORT_CELLS_PER_TILE', '4'))
+# Upper bound on routes returned at high zoom
+MAX_DETAIL_ROUTES = int(os.environ.get('VIEWPORT_MAX_ROUTES', '5000'))
+
+IN_BBOX = "point.withinBBox({var}.location, point({{latitude: $min_lat, longitude: $min_lon}}), point({{latitude: $max_lat, longitude: $max_lon}}))"
+
+CLUSTER_NODES_QUERY = f"""
+MATCH (a:Airport)
+WHERE {IN_BBOX.format(var='a')}
+WITH toInteger(floor((a.latitude + 90) / $cell)) AS row,
+     toInteger(floor((a.longitude + 180) / $cell)) AS col,
+     a
+WITH row, col, count(a) AS airports, avg(a.latitude) AS latitude, avg(a.longitude) AS longitude,
+     collect(a.code)[0..3] AS sample_codes
+RETURN row, col, airports, latitude, longitude, sample_codes
+"""
+
+CLUSTER_LINKS_QUERY = f"""
+MATCH (a:Airport)-[r:ROUTE]->(b:Airport)
+WHERE {IN_BBOX.format(var='a')} AND {IN_BBOX.format(var='b')}
+WITH toInteger(floor((a.latitude + 90) / $cell)) AS source_row,
+     toInteger(floor((a.longitude + 180) / $cell)) AS source_col,
+     toInteger(floor((b.latitude + 90) / $cell)) AS target_row,
+     toInteger(floor((b.longitude + 180) / $cell)) AS target_col
+WHERE source_row <> target_row OR source_col <> target_col
+RETURN source_row, source_col, target_row, target_col, count(*) AS routes
+"""
+
+DETAIL_NODES_QUERY = f"""
+MATCH (a:Airport)
+WHERE {IN_BBOX.format(var='a')}
+RETURN id(a) as id, labels(a)[0] as label, properties(a) as properties
+"""
+
+DETAIL_LINKS_QUERY = f"""
+MATCH (a:Airport)-[r:ROUTE]->(b:Airport)
+WHERE {IN_BBOX.format(var='a')} AND {IN_BBOX.format(var='b')}
+RETURN id(a) as source, id(b) as target, type(r) as type, properties(r) as properties
+LIMIT $max_routes
+"""
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """Grid cell edge in degrees: a tile covers 360 / 2^zoom degrees of longitude"""
+    return 360.0 / (2 ** max(zoom, 0) * CELLS_PER_TILE)
+
+
+def viewport_parameters(min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int) -> Dict[str, Any]:
+    return {
+        'min_lat': min_lat,
+        'min_lon': min_lon,
+        'max_lat': max_lat,
+        'max_lon': max_lon,
+        'cell': cell_size_for_zoom(zoom),
+        'max_routes': MAX_DETAIL_ROUTES,
+    }
+
+
+def cell_id(row: int, col: int) -> str:
+    return f"cell:{row}:{col}"
+
+
+def format_clusters(cluster_rows, link_rows) -> Dict[str, Any]:
+    """Build cluster nodes and inter-cluster links from the aggregation queries"""
+    nodes = []
+    for cluster in cluster_rows:
+        codes = cluster['sample_codes'] or []
+        nodes.append({
+            'id': cell_id(cluster['row'], cluster['col']),
+            'label': 'Cluster',
+            'name': ', '.join(codes) + (f" +{cluster['airports'] - len(codes)}" if cluster['airports'] > len(codes) else ''),
+            'airports': cluster['airports'],
+            'latitude': cluster['latitude'],
+            'longitude': cluster['longitude'],
+        })
+    links = [
+        {
+            'source': cell_id(link['source_row'], link['source_col']),
+            'target': cell_id(link['target_row'], link['target_col']),
+            'type': 'ROUTES',
+            'routes': link['routes'],
+        }
+        for link in link_rows
+    ]
+    return {'nodes': nodes, 'links': links}
+
+
+def is_valid_bbox(min_lat: float, max_lat: float) -> bool:
+    # Longitudes may wrap (min_lon > max_lon crosses the antimeridian), latitudes may not
+    return min_lat <= max_lat
@@ -89,7 +89,7 @@ class GraphRAGAPITester:
         success, response = self.run_test(
             "Seed Data", 
             "POST", 
-            "seed-data", 
+            "seed-data?wait=true", 
             200, 
             data={"clear_existing": True},
             timeout=60
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import '@/App.css';
 import axios from 'axios';
 import { Loader2, Send, Database, GitBranch, Sparkles, Code2 } from 'lucide-react';
@@ -12,6 +12,19 @@ import { toast } from 'sonner';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Link endpoints become node objects once the force graph has rendered them
+const endpointId = (endpoint) => (typeof endpoint === 'object' ? endpoint.id : endpoint);
+const linkKey = (link) => `${endpointId(link.source)}|${link.airline}|${endpointId(link.target)}`;
+
+// Apply a /graph/data?since=<version> delta on top of the graph we already have
+const mergeGraphDelta = (current, delta) => {
+  const nodes = new Map(current.nodes.map(node => [node.id, node]));
+  delta.nodes.forEach(node => nodes.set(node.id, { ...nodes.get(node.id), ...node }));
+  const links = new Map(current.links.map(link => [linkKey(link), link]));
+  delta.links.forEach(link => links.set(linkKey(link), link));
+  return { nodes: Array.from(nodes.values()), links: Array.from(links.values()) };
+};
+
 const App = () => {
   const [query, setQuery] = useState('');
   const [loading, setLoading] = useState(false);
@@ -28,6 +41,12 @@ const App = () => {
   const [showRoutes, setShowRoutes] = useState(true); // Always show routes
   const [graphMode, setGraphMode] = useState('all'); // 'all', 'query-results', 'preset'
   const [currentDataset, setCurrentDataset] = useState('full'); // 'full' or 'BR' - usando full até backend atualizar
+  // True when every node carries x/y computed by the backend, so the force simulation can be skipped
+  const [hasServerLayout, setHasServerLayout] = useState(false);
+
+  // Graph version of the data we hold, for delta sync with the backend
+  const graphVersionRef = useRef(null);
+  const graphDataRef = useRef({ nodes: [], links: [] });
 
   useEffect(() => {
     console.log('=== App initialized ===');
@@ -51,15 +70,34 @@ const App = () => {
     console.log('=== Loading graph data ===');
     console.log('Fetching from:', `${API}/graph/data`);
     try {
-      const res = await axios.get(`${API}/graph/data`);
+      // Only ask for what changed since the version we already have
+      const params = graphVersionRef.current ? { since: graphVersionRef.current } : {};
+      const res = await axios.get(`${API}/graph/data`, {
+        params,
+        validateStatus: (status) => status === 200 || status === 304
+      });
+      if (res.status === 304) {
+        console.log('Graph data unchanged since version', graphVersionRef.current);
+        return;
+      }
+      graphVersionRef.current = res.headers['x-graph-version'] || null;
+
+      let data = res.data;
+      if (data.full === false) {
+        data = mergeGraphDelta(graphDataRef.current, data);
+      } else if (data.full === true) {
+        data = { nodes: data.nodes, links: data.links };
+      }
       console.log('✅ Graph data loaded successfully!');
-      console.log('Total nodes:', res.data.nodes?.length);
-      console.log('Total links:', res.data.links?.length);
-      if (res.data.nodes?.length > 0) {
-        console.log('Sample node:', res.data.nodes[0]);
+      console.log('Total nodes:', data.nodes?.length);
+      console.log('Total links:', data.links?.length);
+      if (data.nodes?.length > 0) {
+        console.log('Sample node:', data.nodes[0]);
       }
-      setGraphData(res.data);
-      applyGraphFilters(res.data);
+      graphDataRef.current = data;
+      setHasServerLayout(data.nodes?.length > 0 && data.nodes.every(n => typeof n.x === 'number' && typeof n.y === 'number'));
+      setGraphData(data);
+      applyGraphFilters(data);
     } catch (error) {
       console.error('❌ Error loading graph data:', error);
       console.error('Error details:', error.response?.data || error.message);
@@ -216,32 +254,78 @@ const App = () => {
     }
   }, [showAirports, showAirlines, showRoutes, graphMode, response, currentDataset, graphData]);
 
+  // POST /graphrag/stream and call onEvent(name, data) for each server-sent event.
+  // Errors are shaped like axios errors so handleQuery reports them the same way.
+  const streamGraphragQuery = async (question, onEvent) => {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), 30000);
+    try {
+      const res = await fetch(`${API}/graphrag/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ query: question }),
+        signal: controller.signal,
+      });
+      if (!res.ok) {
+        const data = await res.json().catch(() => ({}));
+        throw Object.assign(new Error(`HTTP ${res.status}`), { response: { status: res.status, data } });
+      }
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          const event = block.match(/^event: (.*)$/m);
+          const data = block.match(/^data: (.*)$/m);
+          if (event && data) onEvent(event[1], JSON.parse(data[1]));
+        }
+      }
+    } catch (error) {
+      if (error.name === 'AbortError') error.code = 'ECONNABORTED';
+      throw error;
+    } finally {
+      clearTimeout(timer);
+    }
+  };
+
   const handleQuery = async () => {
     if (!query.trim()) return;
 
     setLoading(true);
     try {
       console.log('Executing query:', query);
-      const res = await axios.post(`${API}/graphrag/query`, { query }, {
-        timeout: 30000 // 30 second timeout
+      // Cypher and results arrive first, then the answer token by token
+      await streamGraphragQuery(query, (event, data) => {
+        if (event === 'query') {
+          console.log('Query response:', data);
+          setResponse({ ...data, answer: '' });
+          
+          // Check if the response has graph-worthy data (nodes/relationships)
+          const hasGraphData = data.cypher || 
+                              (data.results && data.results.length > 0 && 
+                               data.results.some(r => typeof r === 'object' && Object.keys(r).length > 0));
+          
+          if (hasGraphData) {
+            // Don't switch tabs - let user stay on query tab to see results
+            toast.success('Consulta executada com sucesso! Veja o grafo na aba de visualização.');
+            setGraphMode('query-results');
+            loadGraphData();
+          } else {
+            // For simple text responses, stay on query tab
+            toast.success('Consulta executada com sucesso!');
+          }
+        } else if (event === 'token') {
+          setResponse(prev => prev && { ...prev, answer: prev.answer + data.text });
+        } else if (event === 'done') {
+          setResponse(prev => prev && { ...prev, answer: data.answer });
+        }
       });
-      console.log('Query response:', res.data);
-      setResponse(res.data);
-      
-      // Check if the response has graph-worthy data (nodes/relationships)
-      const hasGraphData = res.data.cypher || 
-                          (res.data.results && res.data.results.length > 0 && 
-                           res.data.results.some(r => typeof r === 'object' && Object.keys(r).length > 0));
-      
-      if (hasGraphData) {
-        // Don't switch tabs - let user stay on query tab to see results
-        toast.success('Consulta executada com sucesso! Veja o grafo na aba de visualização.');
-        setGraphMode('query-results');
-        loadGraphData();
-      } else {
-        // For simple text responses, stay on query tab
-        toast.success('Consulta executada com sucesso!');
-      }
     } catch (error) {
       console.error('Error executing query:', error);
       console.error('Error response:', error.response?.data);
@@ -297,9 +381,16 @@ const App = () => {
         region: region 
       });
       
+      // Seeding runs as a background job; follow its progress until it finishes
+      const job = await followSeedJob(res.data.job_id);
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
+      const result = job.result || {};
+      
       let message = `Dados carregados com sucesso!`;
-      if (res.data.airports) {
-        message = `${res.data.airports} aeroportos, ${res.data.airlines} companhias, ${res.data.routes} rotas`;
+      if (result.airports) {
+        message = `${result.airports} aeroportos, ${result.airlines} companhias, ${result.routes} rotas`;
       }
       
       toast.success(message);
@@ -312,12 +403,48 @@ const App = () => {
       await loadGraphData();
     } catch (error) {
       console.error('Error seeding data:', error);
-      toast.error('Erro ao popular dados: ' + (error.response?.data?.detail || error.message));
+      const detail = error.response?.data?.detail;
+      toast.error('Erro ao popular dados: ' + (detail?.message || detail || error.message));
     } finally {
       setLoading(false);
     }
   };
 
+  // Resolve with the final job snapshot, showing progress in a toast meanwhile
+  const followSeedJob = (jobId) => new Promise((resolve, reject) => {
+    const toastId = toast.loading('Carregando dados...');
+    const source = new EventSource(`${API}/seed-data/jobs/${jobId}/events`);
+    const showProgress = (job) => {
+      const rows = job.rows[job.phase];
+      const detail = rows ? ` ${rows.done}${rows.total != null ? `/${rows.total}` : ''}` : '';
+      toast.loading(`Carregando dados: ${job.phase}${detail}`, { id: toastId });
+    };
+    source.addEventListener('progress', (event) => showProgress(JSON.parse(event.data)));
+    source.addEventListener('done', (event) => {
+      source.close();
+      toast.dismiss(toastId);
+      resolve(JSON.parse(event.data));
+    });
+    source.onerror = () => {
+      // The stream dropped: fall back to the status endpoint
+      source.close();
+      toast.dismiss(toastId);
+      const poll = async () => {
+        try {
+          const res = await axios.get(`${API}/seed-data/jobs/${jobId}`);
+          if (res.data.status === 'succeeded' || res.data.status === 'failed') {
+            resolve(res.data);
+          } else {
+            setTimeout(poll, 1000);
+          }
+        } catch (error) {
+          reject(error);
+        }
+      };
+      poll();
+    };
+  });
+
   const handleExampleClick = (exampleQuery) => {
     setQuery(exampleQuery);
   };
@@ -339,11 +466,11 @@ const App = () => {
           }
           break;
         case 'major-hubs':
-          // Show major airports (>10 connections) from current dataset
+          // Show major airports (>10 connections) from current dataset, via the indexed out_degree ranking
           if (isBrazil) {
-            cypher = "MATCH (a:Airport)-[r:ROUTE]->() WHERE a.country = 'BR' WITH a, count(r) as connections WHERE connections > 10 RETURN a ORDER BY connections DESC";
+            cypher = "MATCH (a:Airport) WHERE a.out_degree > 10 AND a.country = 'BR' RETURN a ORDER BY a.out_degree DESC";
           } else {
-            cypher = "MATCH (a:Airport)-[r:ROUTE]->() WITH a, count(r) as connections WHERE connections > 10 RETURN a ORDER BY connections DESC";
+            cypher = "MATCH (a:Airport) WHERE a.out_degree > 10 RETURN a ORDER BY a.out_degree DESC";
           }
           break;
         case 'airlines':
@@ -484,10 +611,20 @@ const App = () => {
                   <h3 className="text-lg font-semibold mb-3 text-cyan-400 flex items-center">
                     <Code2 className="mr-2 h-5 w-5" />
                     Query Cypher Gerada
+                    {response.path === 'template' && (
+                      <span className="ml-3 text-xs font-normal text-slate-400" data-testid="query-path">
+                        modelo ({response.intent}), sem LLM
+                      </span>
+                    )}
                   </h3>
                   <div className="cypher-display" data-testid="cypher-query">
                     <code>{response.cypher_query}</code>
                   </div>
+                  {response.parameters && Object.keys(response.parameters).length > 0 && (
+                    <div className="mt-2 text-xs text-slate-400" data-testid="cypher-parameters">
+                      <code>{JSON.stringify(response.parameters)}</code>
+                    </div>
+                  )}
                 </Card>
 
                 {response.results && response.results.length > 0 && (
@@ -667,6 +804,7 @@ const App = () => {
                 {filteredGraphData.nodes.length > 0 ? (
                   <ForceGraph2D
                     graphData={filteredGraphData}
+                    cooldownTicks={hasServerLayout && graphMode === 'all' ? 0 : Infinity}
                     nodeLabel="name"
                     nodeAutoColorBy="label"
                     nodeRelSize={6}
@@ -0,0 +1,32 @@
+"""
+Unit tests for the backend modules. They run offline: nothing here needs
+Neo4j, the LLM providers or the network.
+
+The backend is a flat set of modules imported by name (`import caches`),
+so its directory is put on the path the same way uvicorn sees it.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+
+@pytest.fixture
+def make_graph():
+    """
+    Builds a route_graph.RouteGraph from (source, target[, distance[, airline]])
+    tuples, distance 100 and airline 'LA' by default. The airports are
+    `codes`, or every route endpoint.
+    """
+    from route_graph import RouteGraph
+
+    def make(routes, codes=None):
+        routes = [tuple(route) + (100.0, 'LA')[len(route) - 2:] for route in routes]
+        codes = codes if codes is not None else sorted({code for route in routes for code in route[:2]})
+        airports = [{'code': code, 'name': code, 'city': None, 'country': 'BR'} for code in codes]
+        return RouteGraph(airports, [{'source': source, 'target': target, 'distance': distance, 'airline': airline}
+                                     for source, target, distance, airline in routes], version=1)
+    return make
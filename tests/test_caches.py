@@ -0,0 +1,114 @@
+import caches
+from caches import TranslationCache
+
+PROMPT = "schema prompt v1"
+
+
+def test_translation_cache_normalizes_questions():
+    cache = TranslationCache()
+    cache.put("Quais aeroportos estão no Brasil?", "MATCH (a) RETURN a", PROMPT)
+
+    assert cache.get("  quais AEROPORTOS estao no brasil ", PROMPT) == "MATCH (a) RETURN a"
+    assert cache.get("Quais aeroportos estão na Argentina?", PROMPT) is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+
+def test_translation_cache_evicts_least_recently_used():
+    cache = TranslationCache(max_entries=2)
+    cache.put("a", "A", PROMPT)
+    cache.put("b", "B", PROMPT)
+    cache.get("a", PROMPT)
+    cache.put("c", "C", PROMPT)
+
+    assert cache.get("b", PROMPT) is None
+    assert cache.get("a", PROMPT) == "A"
+    assert cache.get("c", PROMPT) == "C"
+    assert cache.stats['evictions'] == 1
+
+
+def test_translation_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(caches.time, 'time', lambda: now[0])
+    cache = TranslationCache(ttl=60)
+    cache.put("a", "A", PROMPT)
+
+    now[0] += 59
+    assert cache.get("a", PROMPT) == "A"
+    now[0] += 2
+    assert cache.get("a", PROMPT) is None
+
+
+def test_translation_cache_invalidated_by_new_prompt():
+    cache = TranslationCache()
+    cache.put("a", "A", PROMPT)
+
+    assert cache.get("a", "schema prompt v2") is None
+    assert cache.get("a", PROMPT) is None
+    assert cache.stats['invalidations'] == 2
+
+
+def test_translation_cache_persists_across_instances(tmp_path):
+    db_path = str(tmp_path / "translations.sqlite")
+    TranslationCache(db_path=db_path).put("a", "A", PROMPT)
+
+    reopened = TranslationCache(db_path=db_path)
+    assert reopened.get("a", PROMPT) == "A"
+    assert reopened.stats['disk_hits'] == 1
+    assert reopened.get("a", "schema prompt v2") is None
+    assert TranslationCache(db_path=db_path).get("a", PROMPT) is None
+
+
+def test_result_cache_keys_on_query_parameters_and_version():
+    cache = caches.ResultCache()
+    rows = [{'code': 'GRU'}]
+    cache.put("MATCH (a) RETURN a", {'code': 'GRU'}, 1, rows)
+
+    assert cache.get("  MATCH (a) RETURN a ", {'code': 'GRU'}, 1) == rows
+    assert cache.get("MATCH (a) RETURN a", {'code': 'JFK'}, 1) is None
+    assert cache.get("MATCH (a) RETURN a", {'code': 'GRU'}, 2) is None
+
+
+def test_result_cache_drops_entries_of_older_versions():
+    cache = caches.ResultCache()
+    cache.put("q", None, 1, [{'n': 1}])
+    cache.get("q", None, 2)
+
+    assert cache.snapshot()['entries'] == 0
+    assert cache.current_bytes == 0
+    assert cache.get("q", None, 1) is None
+
+
+def test_result_cache_ignores_late_results_of_older_versions():
+    cache = caches.ResultCache()
+    cache.put("q", None, 2, [{'n': 2}])
+    # A query that started before the bump finishes afterwards
+    cache.put("slow", None, 1, [{'n': 1}])
+
+    assert cache.get("q", None, 2) == [{'n': 2}]
+    assert cache.get("slow", None, 1) is None
+    assert cache.snapshot()['entries'] == 1
+    assert cache.snapshot()['graph_version'] == 2
+
+
+def test_result_cache_evicts_by_size():
+    rows = [{'name': 'x' * 100}]
+    size = len(caches.json.dumps(rows))
+    cache = caches.ResultCache(max_bytes=size * 2, max_entry_bytes=size)
+    for query in ("a", "b"):
+        cache.put(query, None, 1, rows)
+    cache.get("a", None, 1)
+    cache.put("c", None, 1, rows)
+
+    assert cache.get("b", None, 1) is None
+    assert cache.get("a", None, 1) == rows
+    assert cache.current_bytes <= cache.max_bytes
+    assert cache.stats['evictions'] == 1
+
+
+def test_result_cache_skips_oversized_results():
+    cache = caches.ResultCache(max_bytes=1000, max_entry_bytes=10)
+    cache.put("q", None, 1, [{'name': 'x' * 100}])
+
+    assert cache.get("q", None, 1) is None
+    assert cache.stats['oversized'] == 1
@@ -0,0 +1,69 @@
+from changelog import GraphChangelog
+
+
+def changelog_with(*entries, max_entries=50):
+    """Commit each (version, kwargs for record) in turn"""
+    changelog = GraphChangelog(max_entries=max_entries)
+    for version, changes in entries:
+        changelog.record(**changes)
+        changelog.commit(version)
+    return changelog
+
+
+def test_changes_since_merges_later_entries():
+    changelog = changelog_with(
+        (11, {'airports': ['GRU']}),
+        (12, {'airports': ['JFK'], 'routes': [('GRU', 'LA', 'JFK')]}),
+        (13, {'airlines': ['LA'], 'airports': ['GRU']}),
+    )
+
+    changes = changelog.changes_since(11, 13)
+    assert changes['airports'] == {'JFK', 'GRU'}
+    assert changes['airlines'] == {'LA'}
+    assert changes['routes'] == {('GRU', 'LA', 'JFK')}
+    assert changelog.changes_since(12, 13)['airports'] == {'GRU'}
+
+
+def test_changes_since_first_covered_version():
+    changelog = changelog_with((11, {'airports': ['GRU']}), (12, {'airports': ['JFK']}))
+
+    # Version 10 is the one right before the oldest entry, so it is still covered
+    assert changelog.changes_since(10, 12)['airports'] == {'GRU', 'JFK'}
+    assert changelog.changes_since(9, 12) is None
+
+
+def test_changes_since_current_version_is_empty():
+    changelog = changelog_with((11, {'airports': ['GRU']}))
+
+    changes = changelog.changes_since(11, 11)
+    assert changes['airports'] == set() and changes['routes'] == set()
+
+
+def test_changes_since_requires_full_reload():
+    changelog = changelog_with(
+        (11, {'airports': ['GRU']}),
+        (12, {'reset': True}),
+        (13, {'airports': ['JFK']}),
+    )
+
+    assert changelog.changes_since(11, 13) is None
+    assert changelog.changes_since(12, 13)['airports'] == {'JFK'}
+    # A version from the future comes from another server process
+    assert changelog.changes_since(20, 13) is None
+    assert GraphChangelog().changes_since(5, 6) is None
+
+
+def test_changelog_window_is_bounded():
+    changelog = changelog_with(*[(version, {'airports': [str(version)]}) for version in range(1, 11)], max_entries=3)
+
+    assert changelog.changes_since(7, 10)['airports'] == {'8', '9', '10'}
+    assert changelog.changes_since(6, 10) is None
+
+
+def test_record_stages_keys_until_commit():
+    changelog = GraphChangelog()
+    changelog.record(routes=[('GRU', 'LA', 'JFK')])
+    assert changelog.changes_since(0, 0)['routes'] == set()
+
+    changelog.commit(1)
+    assert changelog.changes_since(0, 1)['routes'] == {('GRU', 'LA', 'JFK')}
@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+import cypher_guard
+from cypher_guard import CypherGuard, QueryRejected, cap_var_lengths, ensure_limit
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('MATCH (a:Airport) RETURN a', 'MATCH (a:Airport) RETURN a LIMIT 100'),
+    ('MATCH (a) RETURN a;', 'MATCH (a) RETURN a LIMIT 100'),
+    # Every part of a UNION is limited on its own
+    ('MATCH (a) RETURN a UNION MATCH (b) RETURN b AS a',
+     'MATCH (a) RETURN a LIMIT 100 UNION MATCH (b) RETURN b AS a LIMIT 100'),
+    ('MATCH (a) RETURN a LIMIT 5 UNION ALL MATCH (b) RETURN b AS a',
+     'MATCH (a) RETURN a LIMIT 5 UNION ALL MATCH (b) RETURN b AS a LIMIT 100'),
+    # A LIMIT on WITH does not bound the RETURN after it
+    ('MATCH (a) WITH a LIMIT 5 RETURN a', 'MATCH (a) WITH a LIMIT 5 RETURN a LIMIT 100'),
+    ('MATCH (a) WITH a ORDER BY a.code RETURN a.code', 'MATCH (a) WITH a ORDER BY a.code RETURN a.code LIMIT 100'),
+    # Subqueries and pattern comprehensions are left alone
+    ('CALL { MATCH (a) RETURN a } RETURN a', 'CALL { MATCH (a) RETURN a } RETURN a LIMIT 100'),
+    ('MATCH (a) RETURN a, [(a)-->(b) | b.code] AS codes', 'MATCH (a) RETURN a, [(a)-->(b) | b.code] AS codes LIMIT 100'),
+    # Keywords inside literals don't count
+    ("MATCH (a) WHERE a.name = 'x RETURN y' RETURN a", "MATCH (a) WHERE a.name = 'x RETURN y' RETURN a LIMIT 100"),
+    # A trailing comment would swallow the clause
+    ('MATCH (a) RETURN a // all airports', 'MATCH (a) RETURN a // all airports\nLIMIT 100'),
+])
+def test_ensure_limit_adds_limit(query, expected):
+    assert ensure_limit(query, 100) == expected
+
+
+@pytest.mark.parametrize('query', [
+    'MATCH (a) RETURN a LIMIT 10',
+    'MATCH (a) RETURN a ORDER BY a.code LIMIT 10;',
+    'CALL { MATCH (a) RETURN a LIMIT 3 } RETURN a LIMIT 10',
+    'MATCH (a) RETURN a LIMIT 1 UNION MATCH (b) RETURN b AS a LIMIT 2',
+    'MATCH (a) SET a.visited = true',
+])
+def test_ensure_limit_keeps_bounded_queries(query):
+    assert ensure_limit(query, 100) == query
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('MATCH p=(a)-[:ROUTE*]->(b) RETURN p', 'MATCH p=(a)-[:ROUTE*1..3]->(b) RETURN p'),
+    ('MATCH p=(a)-[r:ROUTE*2..]->(b) RETURN p', 'MATCH p=(a)-[r:ROUTE*2..3]->(b) RETURN p'),
+    ('MATCH p=(a)-[*..]-(b) RETURN p', 'MATCH p=(a)-[*1..3]-(b) RETURN p'),
+    # A lower bound above the cap is kept as the only length
+    ('MATCH p=(a)-[:ROUTE*5..]->(b) RETURN p', 'MATCH p=(a)-[:ROUTE*5..5]->(b) RETURN p'),
+    ('MATCH (a)-[:ROUTE*]->(b)-[:ROUTE*2..]->(c) RETURN c',
+     'MATCH (a)-[:ROUTE*1..3]->(b)-[:ROUTE*2..3]->(c) RETURN c'),
+])
+def test_cap_var_lengths(query, expected):
+    assert cap_var_lengths(query, 3) == expected
+
+
+@pytest.mark.parametrize('query', [
+    'MATCH p=(a)-[:ROUTE*1..5]->(b) RETURN p',
+    'MATCH p=(a)-[:ROUTE*2]->(b) RETURN p',
+    "MATCH (a {name: '-[*]-'}) RETURN a",
+])
+def test_cap_var_lengths_keeps_bounded_patterns(query):
+    assert cap_var_lengths(query, 3) == query
+
+
+def operator(name, rows, *children, details=None):
+    args = {'EstimatedRows': rows}
+    if details is not None:
+        args['Details'] = details
+    return {'operatorType': f'{name}@neo4j', 'args': args, 'children': list(children)}
+
+
+class StubExplain:
+    """EXPLAIN returning `plan(query)`, remembering what it was asked"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.queries = []
+
+    async def __call__(self, query, parameters=None):
+        self.queries.append(query)
+        return self.plan(query)
+
+
+def check(guard, query, version=0):
+    return asyncio.run(guard.check(query, version=version))
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(cypher_guard, 'CYPHER_GUARD', True)
+
+
+def test_large_cartesian_product_is_rejected():
+    explain = StubExplain(lambda query: operator('ProduceResults', 5e7, operator('CartesianProduct', 5e7,
+                                                 operator('AllNodesScan', 7000), operator('AllNodesScan', 7000))))
+    guard = CypherGuard(explain, max_rows=1e6)
+
+    with pytest.raises(QueryRejected, match='CartesianProduct ~50,000,000 rows'):
+        check(guard, 'MATCH (a), (b) RETURN a, b')
+    assert explain.queries == ['MATCH (a), (b) RETURN a, b LIMIT 1000']
+    assert guard.stats['rejected'] == 1
+
+
+def test_small_plan_is_limited_and_passed():
+    explain = StubExplain(lambda query: operator('CartesianProduct', 10))
+    guard = CypherGuard(explain, max_rows=1e6)
+
+    guarded = check(guard, 'MATCH (a), (b) RETURN a, b')
+
+    assert guarded.query == 'MATCH (a), (b) RETURN a, b LIMIT 1000'
+    assert guarded.notes == ['LIMIT 1000 added']
+
+
+def test_unbounded_expansion_is_capped_when_that_is_cheap_enough():
+    def plan(query):
+        rows = 1e4 if '*1..3' in query else 1e9
+        return operator('VarLengthExpand(All)', rows)
+    explain = StubExplain(plan)
+    guard = CypherGuard(explain, max_rows=1e6)
+
+    guarded = check(guard, 'MATCH p=(a)-[:ROUTE*]->(b) RETURN p LIMIT 10')
+
+    assert guarded.query == 'MATCH p=(a)-[:ROUTE*1..3]->(b) RETURN p LIMIT 10'
+    assert guarded.notes == ['variable-length patterns capped at 3 hops']
+    assert len(explain.queries) == 2
+
+
+def test_expansion_still_too_large_after_capping_is_rejected():
+    explain = StubExplain(lambda query: operator('VarLengthExpand(All)', 1e9, details='(a)-[*1..]->(b)'))
+    guard = CypherGuard(explain, max_rows=1e6)
+
+    with pytest.raises(QueryRejected, match='unbounded VarLengthExpand'):
+        check(guard, 'MATCH p=(a)-[*]->(b) RETURN p LIMIT 10')
+
+
+def test_bounded_expansion_is_not_rejected():
+    explain = StubExplain(lambda query: operator('VarLengthExpand(All)', 1e9, details='(a)-[*1..5]->(b)'))
+
+    guarded = check(CypherGuard(explain, max_rows=1e6), 'MATCH p=(a)-[*1..5]->(b) RETURN p LIMIT 10')
+
+    assert guarded.notes == []
+
+
+def test_decisions_are_cached_per_query_and_version():
+    explain = StubExplain(lambda query: operator('NodeByLabelScan', 10))
+    guard = CypherGuard(explain)
+
+    first = check(guard, 'MATCH (a:Airport) RETURN a', version=1)
+    again = check(guard, 'MATCH (a:Airport) RETURN a', version=1)
+    assert again is first
+    assert len(explain.queries) == 1
+    assert guard.stats['cached'] == 1
+
+    check(guard, 'MATCH (a:Airport) RETURN a', version=2)
+    check(guard, 'MATCH (a:Airport) RETURN a.code', version=2)
+    assert len(explain.queries) == 3
+
+
+def test_cached_rejection_raises_a_new_exception_each_time():
+    explain = StubExplain(lambda query: operator('CartesianProduct', 5e7))
+    guard = CypherGuard(explain, max_rows=1e6)
+
+    raised = []
+    for _ in range(3):
+        with pytest.raises(QueryRejected) as info:
+            check(guard, 'MATCH (a), (b) RETURN a, b')
+        raised.append(info.value)
+
+    assert len(explain.queries) == 1
+    assert len({id(error) for error in raised}) == 3
+    assert len({str(error) for error in raised}) == 1
+
+
+def test_explain_passes_through_and_profile_is_rejected():
+    explain = StubExplain(lambda query: None)
+    guard = CypherGuard(explain)
+
+    assert check(guard, 'EXPLAIN MATCH (a), (b) RETURN a, b').query == 'EXPLAIN MATCH (a), (b) RETURN a, b'
+    with pytest.raises(QueryRejected, match='PROFILE'):
+        check(guard, '  profile MATCH (a) RETURN a')
+    assert explain.queries == []
+
+
+def test_disabled_guard_changes_nothing(monkeypatch):
+    monkeypatch.setattr(cypher_guard, 'CYPHER_GUARD', False)
+    explain = StubExplain(lambda query: operator('CartesianProduct', 5e7))
+
+    assert check(CypherGuard(explain), 'MATCH (a), (b) RETURN a, b').query == 'MATCH (a), (b) RETURN a, b'
+    assert explain.queries == []
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import dataset_store
+import etl
+
+ROUTES_CSV = (b"airline,source_airport,destination_apirport,distance\n"
+              b"LA,GRU,GIG,365\n"
+              b"G3,GIG,GRU,365\n")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_store, 'DATASET_DIR', tmp_path)
+    monkeypatch.setattr(dataset_store, 'DATASETS_OFFLINE', False)
+    monkeypatch.delenv('DATASET_ROUTES_PATH', raising=False)
+    monkeypatch.delenv('DATASET_ROUTES_URL', raising=False)
+    return tmp_path
+
+
+def store_routes():
+    """What load_dataset leaves behind after downloading the routes"""
+    location = dataset_store.source_location('routes')
+    digest = dataset_store._store(ROUTES_CSV, dataset_store.SOURCES['routes']['numeric'])
+    dataset_store._write_index({location: {'sha256': digest, 'fetched_at': time.time(), 'etag': None}})
+    return str(dataset_store._parquet_path(digest))
+
+
+def refuse_network(*args, **kwargs):
+    raise requests.ConnectionError('offline')
+
+
+def test_offline_without_any_copy_is_unavailable(store, monkeypatch):
+    monkeypatch.setattr(dataset_store, 'DATASETS_OFFLINE', True)
+
+    with pytest.raises(dataset_store.DatasetUnavailable):
+        dataset_store.local_source_file('routes')
+
+
+def test_offline_streams_from_the_stored_parquet(store, monkeypatch):
+    parquet = store_routes()
+    monkeypatch.setattr(dataset_store, 'DATASETS_OFFLINE', True)
+
+    source = dataset_store.local_source_file('routes')
+
+    assert source == parquet
+    routes = [route for chunk in etl.iter_route_records(source, chunk_rows=1) for route in chunk]
+    assert routes == [
+        {'from': 'GRU', 'to': 'GIG', 'airline': 'LA', 'distance': 365.0},
+        {'from': 'GIG', 'to': 'GRU', 'airline': 'G3', 'distance': 365.0},
+    ]
+
+
+def test_failed_download_falls_back_to_the_stored_parquet(store, monkeypatch):
+    parquet = store_routes()
+    monkeypatch.setattr(dataset_store.requests, 'get', refuse_network)
+
+    assert dataset_store.local_source_file('routes') == parquet
+
+
+def test_downloaded_csv_is_preferred(store, monkeypatch):
+    store_routes()
+    csv_path = store / 'routes.stream.csv'
+    csv_path.write_bytes(ROUTES_CSV)
+    monkeypatch.setattr(dataset_store, 'DATASETS_OFFLINE', True)
+
+    assert dataset_store.local_source_file('routes') == str(csv_path)
+
+
+def test_failed_download_without_any_copy_is_unavailable(store, monkeypatch):
+    monkeypatch.setattr(dataset_store.requests, 'get', refuse_network)
+
+    with pytest.raises(dataset_store.DatasetUnavailable):
+        dataset_store.local_source_file('routes')
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {'ETag': '"v1"'}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_different_sources_download_in_parallel(store, monkeypatch):
+    # The routes download waits until the airports one has started: with one
+    # lock held over every download, this would only end at the timeout
+    monkeypatch.setenv('DATASET_AIRPORTS_URL', 'https://example.test/airports.csv')
+    monkeypatch.setenv('DATASET_ROUTES_URL', 'https://example.test/routes.csv')
+    airports_started = threading.Event()
+
+    def get(location, headers=None, timeout=None):
+        if location.endswith('airports.csv'):
+            airports_started.set()
+            return FakeResponse(b"iata_code,name\nGRU,Guarulhos\n")
+        assert airports_started.wait(timeout=5), "airports download never started"
+        return FakeResponse(ROUTES_CSV)
+
+    monkeypatch.setattr(dataset_store.requests, 'get', get)
+    results = {}
+
+    def load(name):
+        results[name] = dataset_store.load_dataset(name)
+
+    threads = [threading.Thread(target=load, args=(name,)) for name in ('routes', 'airports')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert list(results['routes']['airline']) == ['LA', 'G3']
+    assert list(results['airports']['iata_code']) == ['GRU']
+    # Both entries survive the concurrent index updates
+    assert sorted(dataset_store._read_index()) == ['https://example.test/airports.csv',
+                                                  'https://example.test/routes.csv']
@@ -0,0 +1,109 @@
+import pytest
+
+from entity_index import EntityIndex, describe_entity, describe_mentions
+
+AIRPORTS = [
+    {'code': 'GRU', 'name': 'Aeroporto Internacional de São Paulo/Guarulhos', 'city': 'São Paulo',
+     'country': 'BR', 'weight': 500},
+    {'code': 'CGH', 'name': 'Aeroporto de Congonhas', 'city': 'São Paulo', 'country': 'BR', 'weight': 200},
+    {'code': 'JFK', 'name': 'John F Kennedy International Airport', 'city': 'New York', 'country': 'US',
+     'weight': 400},
+    {'code': 'LHR', 'name': 'Heathrow Airport', 'city': 'London', 'country': 'UK', 'weight': 450},
+    {'code': 'LAX', 'name': 'Los Angeles International Airport', 'city': 'Los Angeles', 'country': 'US',
+     'weight': 300},
+]
+AIRLINES = [
+    {'code': 'LA', 'name': 'LATAM Airlines', 'country': 'Chile', 'weight': 300},
+    {'code': 'G3', 'name': 'GOL Linhas Aéreas', 'country': 'Brazil', 'weight': 250},
+    {'code': 'GRU', 'name': 'Grupo Airline', 'country': 'Brazil', 'weight': 1},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return EntityIndex(AIRPORTS, AIRLINES, version=7)
+
+
+def resolved(index, question):
+    return [(found['text'], [(entity['type'], entity.get('code') or entity['label'])
+                             for entity in found['candidates']], found['fuzzy'])
+            for found in index.resolve(question)]
+
+
+def test_codes_resolve_only_in_capitals(index):
+    assert resolved(index, 'rotas de GRU para JFK') == [
+        ('GRU', [('airport', 'GRU'), ('airline', 'GRU')], False),
+        ('JFK', [('airport', 'JFK')], False),
+    ]
+    # 'la' and 'gru' in lower case are words, not codes
+    assert resolved(index, 'voos da la saindo de gru') == []
+
+
+def test_two_letter_code_prefers_the_airline(index):
+    assert resolved(index, 'voos da LA') == [('LA', [('airline', 'LA')], False)]
+
+
+def test_names_cities_and_countries(index):
+    found = resolved(index, 'Voos da LATAM saindo de São Paulo para os Estados Unidos')
+
+    assert found == [
+        ('LATAM', [('airline', 'LA')], False),
+        # GRU's name contains 'São Paulo' too; the city outweighs it
+        ('São Paulo', [('city', 'São Paulo'), ('airport', 'GRU')], False),
+        ('Estados Unidos', [('country', 'US')], False),
+    ]
+    city = index.resolve('São Paulo')[0]['candidates'][0]
+    assert city['airports'] == ['GRU', 'CGH']
+
+
+def test_countries_match_the_stored_values(index):
+    brazil = index.resolve('aeroportos do Brasil')[0]['candidates'][0]
+    assert brazil['code'] == 'BR'
+    # The sample data writes 'Brazil', the loaders 'BR'
+    assert brazil['values'] == ['BR', 'Brazil']
+
+    assert resolved(index, 'rotas para o UK') == [('UK', [('country', 'GB')], False)]
+
+
+def test_longest_name_wins_without_overlaps(index):
+    found = index.resolve('Los Angeles International Airport e Congonhas')
+
+    assert [(m['text'], m['candidates'][0]['code']) for m in found] == [
+        ('Los Angeles International Airport', 'LAX'), ('Congonhas', 'CGH')]
+    question = 'Los Angeles International Airport e Congonhas'
+    assert [question[m['start']:m['end']] for m in found] == [m['text'] for m in found]
+
+
+def test_misspelled_names_resolve_fuzzily(index):
+    assert resolved(index, 'voos saindo de Guarulos') == [('Guarulos', [('airport', 'GRU')], True)]
+    assert resolved(index, 'voos para Heatrow') == [('Heatrow', [('airport', 'LHR')], True)]
+    # Too far from any name
+    assert resolved(index, 'voos saindo de Xyzzyq') == []
+
+
+def test_stopwords_are_not_entities(index):
+    assert index.resolve('quais as rotas mais longas entre aeroportos internacionais') == []
+
+
+def test_max_candidates(index):
+    assert len(index.resolve('GRU', max_candidates=1)[0]['candidates']) == 1
+
+
+def test_describe_mentions(index):
+    lines = describe_mentions(index.resolve('rotas de GRU')).splitlines()
+
+    assert lines[0] == 'Resolved entities (use these exact values):'
+    assert lines[1].startswith('''- "GRU" -> Airport {code: 'GRU'}''')
+    assert describe_mentions([]) == ''
+
+
+def test_describe_entity_escapes_cypher_literals():
+    index = EntityIndex([{'code': 'ORD', 'name': "Chicago O'Hare International Airport", 'city': "O'Hare",
+                          'country': 'US', 'weight': 1}],
+                        [{'code': 'X\\Y', 'name': 'Slash Air', 'country': "Côte d'Ivoire", 'weight': 1}])
+
+    described = {entity.get('code') or entity['label']: describe_entity(entity) for entity in index.entities}
+
+    assert described["O'Hare"] == "Airport city = 'O\\'Hare' (airports ORD)"
+    assert described['X\\Y'] == "Airline {code: 'X\\\\Y'} (Slash Air); its routes have r.airline = 'X\\\\Y'"
+    assert described['CI'] == "country IN ['Côte d\\'Ivoire'] (Airport.country / Airline.country)"
@@ -0,0 +1,92 @@
+import pandas as pd
+
+import etl
+
+AIRPORTS = pd.DataFrame({
+    'iata_code': ['GRU', 'gig ', 'JFK', 'XX', None, 'CGH', 'GRU'],
+    'name': ['Guarulhos', 'Galeão', 'Kennedy', 'Bad code', 'No code', 'Congonhas', 'Duplicate'],
+    'municipality': ['São Paulo', 'Rio de Janeiro', 'New York', '', '', 'São Paulo', ''],
+    'iso_country': ['BR', 'br', 'US', 'BR', 'BR', 'BR', 'BR'],
+    'coordinates': ['-46.47, -23.43', '-43.25, -22.81', '-73.78, 40.64', '', '', None, ''],
+})
+ROUTES = pd.DataFrame({
+    'airline': ['LA', 'G3', 'LA', 'Unknown', 'AA', ' la '],
+    'source_airport': ['GRU', 'GIG', 'GRU', 'GRU', 'JFK', 'gig'],
+    'destination_apirport': ['GIG', 'GRU', 'JFK', 'GIG', 'GRU', 'gru'],
+    'distance': ['365', '365.5', '7680', 'n/a', '7680', '365'],
+})
+AIRLINE_TABLES = [
+    pd.DataFrame({'IATA': ['LA', 'AA'], 'ICAO': ['LAN', 'AAL'], 'Name': ['LATAM', 'American'],
+                  'Country': ['Chile', 'United States']}),
+    pd.DataFrame({'Code': ['G3'], 'Airline': ['GOL'], 'Country': ['Brazil']}),
+]
+
+
+def by_key(records, key):
+    return {record[key]: record for record in records}
+
+
+def test_full_dataset_keeps_every_valid_airport_and_route():
+    dataset = etl.build_dataset(AIRPORTS, ROUTES, AIRLINE_TABLES)
+
+    airports = by_key(dataset['airports'], 'code')
+    assert sorted(airports) == ['CGH', 'GIG', 'GRU', 'JFK']
+    assert airports['GRU'] == {'code': 'GRU', 'name': 'Guarulhos', 'city': 'São Paulo', 'country': 'BR',
+                               'latitude': -23.43, 'longitude': -46.47}
+    assert airports['GIG']['country'] == 'BR'
+    assert (airports['CGH']['latitude'], airports['CGH']['longitude']) == (0.0, 0.0)
+
+    assert len(dataset['routes']) == 6
+    assert [route['airline'] for route in dataset['routes']][3] == 'Unknown'
+    assert dataset['routes'][3]['distance'] == 0.0
+    assert dataset['routes'][5] == {'from': 'GIG', 'to': 'GRU', 'airline': 'la', 'distance': 365.0}
+
+    airlines = by_key(dataset['airlines'], 'code')
+    assert sorted(airlines) == ['AA', 'G3', 'LA']
+    assert airlines['G3'] == {'code': 'G3', 'name': 'GOL', 'country': 'Brazil'}
+
+
+def test_region_keeps_domestic_routes_with_known_airlines():
+    dataset = etl.build_dataset(AIRPORTS, ROUTES, AIRLINE_TABLES, region='br')
+
+    # CGH has no domestic route; JFK is abroad
+    assert sorted(airport['code'] for airport in dataset['airports']) == ['GIG', 'GRU']
+    assert [(route['from'], route['to'], route['airline']) for route in dataset['routes']] == [
+        ('GRU', 'GIG', 'LA'), ('GIG', 'GRU', 'G3'), ('GIG', 'GRU', 'la')]
+
+    airlines = by_key(dataset['airlines'], 'code')
+    assert sorted(airlines) == ['G3', 'LA']
+    assert airlines['LA'] == {'code': 'LA', 'name': 'LATAM', 'country': 'Chile'}
+
+
+def test_region_resolves_airline_codes_by_priority():
+    routes = pd.DataFrame({'airline': ['LAN', 'ZZ'], 'source_airport': ['GRU', 'GIG'],
+                           'destination_apirport': ['GIG', 'GRU'], 'distance': ['1', '2']})
+    dataset = etl.build_dataset(AIRPORTS, routes, AIRLINE_TABLES, region='BR')
+
+    airlines = by_key(dataset['airlines'], 'code')
+    assert airlines['LAN'] == {'code': 'LAN', 'name': 'LATAM', 'country': 'Chile'}
+    # Codes missing from every table keep the code as name
+    assert airlines['ZZ'] == {'code': 'ZZ', 'name': 'ZZ', 'country': 'Unknown'}
+
+
+def test_records_use_none_for_missing_text():
+    airline_tables = [pd.DataFrame({'IATA': ['LA'], 'Name': ['LATAM'], 'Country': [None]})]
+    dataset = etl.build_dataset(AIRPORTS, ROUTES, airline_tables)
+
+    assert by_key(dataset['airlines'], 'code')['LA']['country'] is None
+
+
+def test_streaming_plan_matches_build_dataset(tmp_path):
+    source = tmp_path / 'routes.csv'
+    ROUTES.to_csv(source, index=False)
+
+    for region in (None, 'BR'):
+        built = etl.build_dataset(AIRPORTS, ROUTES, AIRLINE_TABLES, region)
+        plan = etl.plan_streaming_dataset(AIRPORTS, AIRLINE_TABLES, str(source), region, chunk_rows=2)
+        streamed = [route for chunk in etl.iter_route_records(str(source), plan['region_codes'], chunk_rows=2)
+                    for route in chunk]
+
+        assert plan['airports'] == built['airports']
+        assert sorted(plan['airlines'], key=lambda a: a['code']) == sorted(built['airlines'], key=lambda a: a['code'])
+        assert streamed == built['routes']
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import struct
+
+import pytest
+
+import graph_export
+
+NODES = [
+    {'id': 1, 'label': 'Airport', 'properties': {'code': 'GRU', 'name': 'Guarulhos', 'country': 'BR', 'city': 'Unknown'}},
+    {'id': 2, 'label': 'Airport', 'properties': {'code': 'JFK', 'name': 'John F Kennedy', 'country': 'US'}},
+    {'id': 3, 'label': 'Airline', 'properties': {'code': 'LA', 'name': 'LATAM'}},
+]
+LINKS = [
+    {'source': 1, 'target': 2, 'type': 'ROUTE', 'properties': {'airline': 'LA', 'distance_km': 7680.5}},
+    {'source': 2, 'target': 1, 'type': 'ROUTE', 'properties': {}},
+]
+
+
+async def fake_stream(query):
+    for record in NODES if query == graph_export.NODES_QUERY else LINKS:
+        yield record
+
+
+def collect_ndjson(chunk_lines):
+    async def collect():
+        return [chunk async for chunk in graph_export.iter_graph_ndjson(chunk_lines, stream_query=fake_stream)]
+    return asyncio.run(collect())
+
+
+def test_ndjson_lines_are_nodes_then_links_then_summary():
+    lines = [json.loads(line) for line in b''.join(collect_ndjson(500)).decode('utf-8').splitlines()]
+
+    assert [next(iter(line)) for line in lines] == ['node'] * 3 + ['link'] * 2 + ['done']
+    assert lines[0]['node']['id'] == '1'
+    assert 'city' not in lines[0]['node']
+    assert lines[3]['link'] == {'source': '1', 'target': '2', 'type': 'ROUTE', 'airline': 'LA', 'distance': 7680.5}
+    assert lines[4]['link']['airline'] == 'Unknown'
+    assert lines[-1] == {'done': {'nodes': 3, 'links': 2}}
+
+
+def test_ndjson_chunks_hold_at_most_chunk_lines():
+    chunks = collect_ndjson(2)
+
+    assert len(chunks) == 3
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    assert all(chunk.count(b'\n') <= 2 for chunk in chunks[:-1])
+    assert sum(chunk.count(b'\n') for chunk in chunks) == 6
+
+
+def formatted_graph():
+    nodes = [graph_export.format_node(node) for node in NODES]
+    nodes[0].update(latitude=-23.43, longitude=-46.47)
+    links = [graph_export.format_link(link) for link in LINKS]
+    links.append({'source': '1', 'target': '99', 'type': 'ROUTE', 'airline': 'XX', 'distance': 1})
+    return nodes, links
+
+
+def test_binary_payload_round_trips():
+    nodes, links = formatted_graph()
+    payload = graph_export.encode_graph_binary(nodes, links, graph_version=42)
+    decoded = graph_export.decode_graph_binary(payload)
+
+    assert decoded['graph_version'] == 42
+    assert [node['id'] for node in decoded['nodes']] == ['1', '2', '3']
+    assert [node['code'] for node in decoded['nodes']] == ['GRU', 'JFK', 'LA']
+    assert [node['label'] for node in decoded['nodes']] == ['Airport', 'Airport', 'Airline']
+    assert decoded['nodes'][1]['country'] == 'US'
+    assert decoded['nodes'][2]['country'] is None
+    assert decoded['nodes'][0]['latitude'] == pytest.approx(-23.43, abs=1e-4)
+    assert decoded['nodes'][1]['latitude'] is None
+    assert decoded['nodes'][2]['city'] == ''
+    # The link to an unknown node is dropped
+    assert [(link['source'], link['target'], link['airline']) for link in decoded['links']] == [
+        ('1', '2', 'LA'), ('2', '1', 'Unknown')]
+    assert decoded['links'][0]['distance'] == pytest.approx(7680.5)
+
+
+def test_binary_sections_are_aligned():
+    nodes, links = formatted_graph()
+    payload = graph_export.encode_graph_binary(nodes, links)
+    (header_length,) = struct.unpack('<I', payload[4:8])
+    header = json.loads(payload[8:8 + header_length])
+    body_start = 8 + header_length + (-(8 + header_length)) % 8
+
+    assert payload[:4] == graph_export.BINARY_MAGIC
+    assert header['node_count'] == 3 and header['link_count'] == 2
+    assert all(section['offset'] % 8 == 0 for section in header['sections'])
+    last = header['sections'][-1]
+    assert body_start + last['offset'] + last['length'] <= len(payload)
+
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        graph_export.decode_graph_binary(b'{"nodes": []}')
@@ -0,0 +1,112 @@
+import pytest
+
+from entity_index import EntityIndex
+from intents import LIST_LIMIT, match_intent
+
+AIRPORTS = [
+    {'code': 'GRU', 'name': 'Aeroporto Internacional de São Paulo/Guarulhos', 'city': 'São Paulo',
+     'country': 'BR', 'weight': 500},
+    {'code': 'CGH', 'name': 'Aeroporto de Congonhas', 'city': 'São Paulo', 'country': 'BR', 'weight': 200},
+    {'code': 'GIG', 'name': 'Aeroporto Internacional do Galeão', 'city': 'Rio de Janeiro', 'country': 'BR',
+     'weight': 300},
+    {'code': 'JFK', 'name': 'John F Kennedy International Airport', 'city': 'New York', 'country': 'US',
+     'weight': 400},
+]
+AIRLINES = [
+    {'code': 'LA', 'name': 'LATAM Airlines', 'country': 'Chile', 'weight': 300},
+    {'code': 'G3', 'name': 'GOL Linhas Aéreas', 'country': 'Brazil', 'weight': 250},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return EntityIndex(AIRPORTS, AIRLINES)
+
+
+@pytest.fixture
+def match(index):
+    return lambda question: match_intent(question, index.resolve(question))
+
+
+def test_count_airports_in_a_country(match):
+    found = match('Quantos aeroportos existem no Brasil?')
+
+    assert found.intent == 'count_airports'
+    assert found.cypher == 'MATCH (a:Airport) WHERE a.country IN $countries RETURN count(a) as total'
+    assert found.parameters == {'countries': ['BR', 'Brazil']}
+    assert found.answer([{'total': 3}]) == 'Há 3 aeroportos em Brasil.'
+
+
+def test_routes_between_two_places(match):
+    found = match('rotas de GRU para New York')
+
+    assert found.intent == 'routes'
+    assert 'a.code IN $origins AND b.code IN $destinations' in found.cypher
+    assert found.parameters == {'origins': ['GRU'], 'destinations': ['JFK']}
+
+
+def test_destination_before_origin(match):
+    found = match('quantos voos para o Rio de Janeiro saindo de São Paulo')
+
+    assert found.intent == 'count_routes'
+    assert found.parameters == {'origins': ['GRU', 'CGH'], 'destinations': ['GIG']}
+
+
+def test_routes_of_an_airline(match):
+    found = match('voos da LATAM saindo de GRU')
+
+    assert found.intent == 'routes'
+    assert found.parameters == {'origins': ['GRU'], 'airline': 'LA'}
+    assert 'r.airline = $airline' in found.cypher
+
+
+def test_two_origins_go_to_the_llm(match):
+    assert match('rotas de GRU e de GIG') is None
+
+
+def test_extreme_route_limit(match):
+    assert match('qual a rota mais longa').parameters == {'limit': 1}
+    assert match('as 5 rotas mais longas saindo de GRU').parameters == {'origins': ['GRU'], 'limit': 5}
+    assert match('as 500 rotas mais curtas').parameters['limit'] == LIST_LIMIT
+    found = match('as rotas mais curtas')
+    assert found.parameters == {'limit': 10}
+    assert 'ORDER BY r.distance_km ASC' in found.cypher
+
+
+def test_zero_is_clamped_to_one(match):
+    assert match('0 rotas mais longas').parameters['limit'] == 1
+    assert match('top 0 hubs').parameters == {'limit': 1}
+
+
+def test_top_hubs(match):
+    assert match('top 5 hubs').cypher == \
+        'MATCH (a:Airport) WHERE a.hub_rank <= $limit RETURN a ORDER BY a.hub_rank'
+    found = match('maiores hubs do Brasil')
+    assert found.parameters == {'countries': ['BR', 'Brazil'], 'limit': 20}
+
+
+def test_busiest_with_a_threshold(match):
+    found = match('companhias com mais de 10 rotas')
+
+    assert found.intent == 'busiest_airlines'
+    assert found.parameters == {'min_routes': 10}
+    assert f'LIMIT {LIST_LIMIT}' in found.cypher
+
+
+@pytest.mark.parametrize('question', [
+    'quais rotas têm escala em GRU',
+    'quantos aeroportos com mais de 10 rotas',
+    'qual o aeroporto mais movimentado em número de passageiros',
+    'explique o que é um hub',
+])
+def test_unknown_words_go_to_the_llm(match, question):
+    assert match(question) is None
+
+
+def test_fast_path_answers(match):
+    found = match('rotas mais longas')
+
+    rows = [{'a': {'code': 'GRU'}, 'r': {'distance_km': 7680.4}, 'b': {'code': 'JFK'}},
+            {'a': {'code': 'GIG'}, 'r': {}, 'b': {'code': 'GRU'}}]
+    assert found.answer(rows) == 'As 2 rotas mais longas: GRU → JFK (7680 km), GIG → GRU.'
+    assert found.answer([]) == 'Nenhuma rota com distância encontrada.'
@@ -0,0 +1,169 @@
+import random
+
+import pytest
+
+import itinerary
+
+
+def all_paths(view, source, target, max_hops=None):
+    """Every loopless path by brute force, in order of distance"""
+    found = []
+
+    def walk(path, distance):
+        node = path[-1]
+        if node == target:
+            found.append((distance, path))
+            return
+        if max_hops is not None and len(path) - 1 >= max_hops:
+            return
+        for neighbor, weight in view.outgoing[node]:
+            if neighbor not in path:
+                walk(path + [neighbor], distance + weight)
+
+    walk([source], 0.0)
+    return sorted(found)
+
+
+def codes_of(graph, path):
+    return [graph.codes[node] for node in path[1]]
+
+
+# GRU -> BSB -> REC is shorter than the direct flight; GIG is a detour
+ROUTES = [
+    ('GRU', 'REC', 2100, 'LA'),
+    ('GRU', 'REC', 2300, 'G3'),
+    ('GRU', 'BSB', 870, 'G3'),
+    ('BSB', 'REC', 1000, 'G3'),
+    ('GRU', 'GIG', 340, 'LA'),
+    ('GIG', 'BSB', 930, 'LA'),
+    ('GIG', 'REC', 1870, 'AD'),
+    ('REC', 'GRU', 2100, 'LA'),
+]
+
+
+@pytest.fixture
+def graph(make_graph):
+    return make_graph(ROUTES)
+
+
+def test_k_shortest_paths_in_order(graph):
+    view = itinerary.RouteView(graph)
+    source, target = graph.index['GRU'], graph.index['REC']
+
+    paths = itinerary.k_shortest_paths(view, source, target, k=10)
+
+    assert [codes_of(graph, path) for path in paths] == [
+        ['GRU', 'BSB', 'REC'], ['GRU', 'REC'], ['GRU', 'GIG', 'REC'], ['GRU', 'GIG', 'BSB', 'REC']]
+    # The cheapest route of each pair is used
+    assert [path[0] for path in paths] == [1870.0, 2100.0, 2210.0, 2270.0]
+
+
+def test_k_shortest_paths_respects_max_hops(graph):
+    view = itinerary.RouteView(graph)
+    source, target = graph.index['GRU'], graph.index['REC']
+
+    paths = itinerary.k_shortest_paths(view, source, target, k=10, max_hops=1)
+
+    assert [codes_of(graph, path) for path in paths] == [['GRU', 'REC']]
+
+
+def test_k_shortest_paths_with_airline_filter(graph):
+    view = itinerary.RouteView(graph, ['LA'])
+
+    paths = itinerary.k_shortest_paths(view, graph.index['GRU'], graph.index['REC'], k=3)
+
+    assert [(path[0], codes_of(graph, path)) for path in paths] == [(2100.0, ['GRU', 'REC'])]
+
+
+def test_k_shortest_paths_same_airport_and_unreachable(graph):
+    view = itinerary.RouteView(graph)
+
+    assert itinerary.k_shortest_paths(view, graph.index['GIG'], graph.index['GIG']) == [(0.0, [graph.index['GIG']])]
+    # AD only flies GIG -> REC
+    only_ad = itinerary.RouteView(graph, ['AD'])
+    assert itinerary.k_shortest_paths(only_ad, graph.index['REC'], graph.index['GIG'], k=3) == []
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('max_hops', [None, 2, 3])
+def test_k_shortest_paths_matches_brute_force(seed, max_hops, make_graph):
+    rng = random.Random(seed)
+    codes = [f'A{i:02d}' for i in range(9)]
+    routes = [(a, b, float(rng.randint(1, 50)), rng.choice(['LA', 'G3']))
+              for a in codes for b in codes if a != b and rng.random() < 0.35]
+    graph = make_graph(routes)
+    view = itinerary.RouteView(graph)
+    source, target = graph.index[routes[0][0]], graph.index[routes[-1][1]]
+    if source == target:
+        return
+    expected = all_paths(view, source, target, max_hops)
+
+    paths = itinerary.k_shortest_paths(view, source, target, k=6, max_hops=max_hops)
+
+    # Ties may come in any order, so compare the distances and that each path is real
+    assert [distance for distance, _ in paths] == [distance for distance, _ in expected[:6]]
+    assert len({tuple(path) for _, path in paths}) == len(paths)
+    for distance, path in paths:
+        assert (distance, path) in expected
+
+
+def test_guided_path_finds_the_shortest_path(graph):
+    view = itinerary.RouteView(graph)
+    target = graph.index['REC']
+    to_target = itinerary.distances_to(view, target)
+
+    path = itinerary.guided_path(view, graph.index['GRU'], target, to_target)
+
+    assert (path[0], codes_of(graph, path)) == (1870.0, ['GRU', 'BSB', 'REC'])
+
+
+def test_guided_path_with_hop_limit(graph):
+    view = itinerary.RouteView(graph)
+    target = graph.index['REC']
+    to_target = itinerary.distances_to(view, target, max_hops=2)
+
+    assert to_target[1][graph.index['GIG']] == 1870.0
+    assert to_target[2][graph.index['GIG']] == 1870.0
+    assert to_target[0][graph.index['GRU']] == float('inf')
+
+    path = itinerary.guided_path(view, graph.index['GIG'], target, to_target, max_hops=1)
+    assert codes_of(graph, path) == ['GIG', 'REC']
+    assert itinerary.guided_path(view, graph.index['GRU'], target, to_target, max_hops=0) is None
+
+
+def test_guided_path_avoids_banned_airports_and_pairs(graph):
+    view = itinerary.RouteView(graph)
+    gru, bsb, gig, rec = (graph.index[code] for code in ('GRU', 'BSB', 'GIG', 'REC'))
+    to_target = itinerary.distances_to(view, rec)
+
+    path = itinerary.guided_path(view, gru, rec, to_target, banned_nodes=frozenset({bsb}))
+    assert codes_of(graph, path) == ['GRU', 'REC']
+
+    path = itinerary.guided_path(view, gru, rec, to_target, banned_nodes=frozenset({bsb}),
+                                 banned_edges=frozenset({(gru, rec)}))
+    assert codes_of(graph, path) == ['GRU', 'GIG', 'REC']
+
+    assert itinerary.guided_path(view, gru, rec, to_target, banned_nodes=frozenset({bsb, gig}),
+                                 banned_edges=frozenset({(gru, rec)})) is None
+
+
+def test_guided_path_max_distance(graph):
+    view = itinerary.RouteView(graph)
+    gru, rec = graph.index['GRU'], graph.index['REC']
+    to_target = itinerary.distances_to(view, rec)
+
+    assert itinerary.guided_path(view, gru, rec, to_target, max_distance=1870.0) is None
+    assert itinerary.guided_path(view, gru, rec, to_target, max_distance=1870.5)[0] == 1870.0
+
+
+def test_search_itineraries_formats_legs(graph):
+    result = itinerary.search_itineraries(graph, 'GRU', 'REC', k=2, max_stops=0)
+
+    assert result['itineraries'] == [{
+        'stops': 0,
+        'distance_km': 2100.0,
+        'airports': ['GRU', 'REC'],
+        'legs': [{'from': 'GRU', 'to': 'REC', 'distance_km': 2100.0, 'airlines': ['G3', 'LA']}],
+    }]
+    with pytest.raises(KeyError):
+        itinerary.search_itineraries(graph, 'GRU', 'XXX')
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from jobs import SeedInProgress, SeedJobRegistry
+
+
+def test_finished_job_frees_the_registry():
+    async def scenario():
+        registry = SeedJobRegistry()
+
+        async def runner(job):
+            job.set_phase('airports')
+            return {'airports': 3}
+
+        job = registry.start('BR', False, runner)
+        with pytest.raises(SeedInProgress):
+            registry.start('BR', False, runner)
+        await job.task
+        return registry, job
+
+    registry, job = asyncio.run(scenario())
+    assert (job.status, job.phase, job.result) == ('succeeded', 'succeeded', {'airports': 3})
+    assert registry.active() is None
+
+
+def test_failed_runner_marks_the_job_failed():
+    async def scenario():
+        registry = SeedJobRegistry()
+
+        async def runner(job):
+            raise RuntimeError('download failed')
+
+        job = registry.start(None, False, runner)
+        await job.task
+        return registry, job
+
+    registry, job = asyncio.run(scenario())
+    assert (job.status, job.error) == ('failed', 'download failed')
+    assert registry.active() is None
+
+
+def test_cancelled_job_does_not_block_later_seeds():
+    async def scenario():
+        registry = SeedJobRegistry()
+
+        async def runner(job):
+            await asyncio.sleep(60)
+
+        job = registry.start('BR', False, runner)
+        await asyncio.sleep(0)
+        job.task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job.task
+        return registry, job
+
+    registry, job = asyncio.run(scenario())
+    assert (job.status, job.phase, job.error) == ('failed', 'failed', 'Seed cancelled')
+    assert job.finished_at is not None
+    assert registry.active() is None
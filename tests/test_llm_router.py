@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+import llm_router
+from llm_router import CircuitBreaker, Provider, ProviderRouter, ProvidersUnavailable
+
+
+def expire_cooldown(breaker):
+    breaker.opened_at -= breaker.cooldown
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, cooldown=30)
+
+    assert [breaker.record_failure() for _ in range(2)] == [False, False]
+    assert breaker.state == 'closed' and breaker.allow()
+    assert breaker.record_failure() is True
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failures=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+
+    assert breaker.record_failure() is False
+    assert breaker.state == 'closed'
+
+
+def test_half_open_breaker_admits_a_single_trial():
+    breaker = CircuitBreaker(failures=3, cooldown=30)
+    for _ in range(3):
+        breaker.record_failure()
+    expire_cooldown(breaker)
+
+    assert breaker.state == 'half-open'
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failures=3, cooldown=30)
+    for _ in range(3):
+        breaker.record_failure()
+    expire_cooldown(breaker)
+    assert breaker.allow()
+
+    assert breaker.record_failure() is True
+    assert breaker.state == 'open'
+
+
+def test_released_trial_can_be_retried():
+    breaker = CircuitBreaker(failures=1, cooldown=30)
+    breaker.record_failure()
+    expire_cooldown(breaker)
+    assert breaker.allow()
+
+    breaker.release()
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+
+
+def make_provider(name, delay=0.0, error=None, calls=None):
+    async def call(prompt):
+        if calls is not None:
+            calls.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f'{name} cancelled')
+            raise
+        if error is not None:
+            raise error
+        return f'{name}: {prompt}'
+
+    async def stream(prompt):
+        yield await call(prompt)
+
+    return Provider(name, call, stream)
+
+
+@pytest.fixture
+def short_hedge(monkeypatch):
+    monkeypatch.setattr(llm_router, 'LLM_HEDGE_DELAY', 0.05)
+
+
+def test_fast_first_provider_is_not_hedged(short_hedge):
+    first, second = make_provider('first'), make_provider('second')
+    router = ProviderRouter([first, second])
+
+    assert asyncio.run(router.complete('hi')) == ('first: hi', 'first')
+    assert second.stats['calls'] == 0
+    assert len(first.latency) == 1
+
+
+def test_slow_provider_is_hedged_and_loses(short_hedge):
+    calls = []
+    slow, fast = make_provider('slow', delay=5, calls=calls), make_provider('fast', calls=calls)
+    router = ProviderRouter([slow, fast])
+
+    assert asyncio.run(asyncio.wait_for(router.complete('hi'), 2)) == ('fast: hi', 'fast')
+    # The slow request is cancelled once the hedge wins
+    assert calls == ['slow', 'fast', 'slow cancelled']
+    assert fast.stats['hedges'] == 1 and fast.stats['hedge_wins'] == 1
+    assert slow.stats['cancelled'] == 1 and slow.stats['failures'] == 0
+
+
+def test_hedge_delay_follows_the_observed_p95(short_hedge, monkeypatch):
+    monkeypatch.setattr(llm_router, 'LLM_HEDGE_MIN_SAMPLES', 5)
+    provider = make_provider('p')
+    assert provider.hedge_delay() == 0.05
+
+    for seconds in [0.1, 0.2, 0.3, 0.4, 2.0]:
+        provider.latency.add(seconds)
+    assert provider.hedge_delay() == 2.0
+
+
+def test_failure_moves_on_without_waiting(monkeypatch):
+    monkeypatch.setattr(llm_router, 'LLM_HEDGE_DELAY', 30)
+    broken = make_provider('broken', error=RuntimeError('boom'))
+    router = ProviderRouter([broken, make_provider('backup')])
+
+    assert asyncio.run(asyncio.wait_for(router.complete('hi'), 2)) == ('backup: hi', 'backup')
+    assert broken.stats['failures'] == 1
+    assert broken.last_error == 'boom'
+
+
+def test_open_breaker_skips_the_provider(short_hedge):
+    calls = []
+    broken = make_provider('broken', error=RuntimeError('boom'), calls=calls)
+    router = ProviderRouter([broken, make_provider('backup', calls=calls)])
+
+    for _ in range(3):
+        asyncio.run(router.complete('hi'))
+    assert broken.breaker.state == 'open'
+
+    calls.clear()
+    assert asyncio.run(router.complete('hi')) == ('backup: hi', 'backup')
+    assert calls == ['backup']
+
+    # After the cooldown the broken provider gets one trial again
+    expire_cooldown(broken.breaker)
+    calls.clear()
+    asyncio.run(router.complete('hi'))
+    assert calls == ['broken', 'backup']
+
+
+def test_every_provider_failing_raises(short_hedge):
+    router = ProviderRouter([make_provider('a', error=RuntimeError('down')),
+                             make_provider('b', error=ValueError('bad key'))])
+
+    with pytest.raises(ProvidersUnavailable, match='a: down; b: bad key'):
+        asyncio.run(router.complete('hi'))
+
+
+def test_no_providers():
+    with pytest.raises(ProvidersUnavailable, match='No LLM provider configured'):
+        asyncio.run(ProviderRouter([]).complete('hi'))
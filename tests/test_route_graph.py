@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+
+def by_code(graph, values):
+    return {code: round(float(value), 6) for code, value in zip(graph.codes, values)}
+
+
+def reference_pagerank(graph, damping=0.85, iterations=200):
+    """Textbook power iteration, one term per route"""
+    count = graph.airport_count
+    rank = [1.0 / count] * count
+    for _ in range(iterations):
+        dangling = sum(rank[i] for i in range(count) if graph.out_degree[i] == 0)
+        updated = [(1 - damping) / count + damping * dangling / count] * count
+        for source, target in zip(graph.sources.tolist(), graph.targets.tolist()):
+            updated[target] += damping * rank[source] / graph.out_degree[source]
+        rank = updated
+    return np.array(rank)
+
+
+# A <-> B <-> C with a spoke C -> D (no way back) and an isolated airport E
+COMPONENT_EDGES = [('A', 'B'), ('B', 'A'), ('B', 'C'), ('C', 'B'), ('C', 'D')]
+
+
+def test_weak_and_strong_components(make_graph):
+    graph = make_graph(COMPONENT_EDGES, codes=['A', 'B', 'C', 'D', 'E'])
+
+    assert graph.component_of('A', 'weak')['members'] == ['A', 'B', 'C', 'D']
+    assert graph.component_of('A', 'strong')['members'] == ['A', 'B', 'C']
+    assert graph.component_of('D', 'strong')['size'] == 1
+    assert graph.component_of('E', 'weak')['members'] == ['E']
+
+    weak = graph.component_sizes('weak')
+    assert weak['count'] == 2
+    assert weak['isolated_airports'] == 1
+    assert [component['size'] for component in weak['largest']] == [4, 1]
+    assert graph.component_sizes('strong')['count'] == 3
+    assert graph.summary()['weak_components'] == 2
+
+
+def test_components_follow_long_chains(make_graph):
+    codes = [f'A{i:02d}' for i in range(40)]
+    chain = list(zip(codes, codes[1:]))
+    graph = make_graph(chain + [(codes[-1], codes[0])], codes=codes)
+
+    assert graph.component_sizes('strong')['count'] == 1
+    assert make_graph(chain, codes=codes).component_sizes('strong')['count'] == 40
+    assert make_graph(chain, codes=codes).component_sizes('weak')['count'] == 1
+
+
+def test_unknown_airport_raises_key_error(make_graph):
+    with pytest.raises(KeyError):
+        make_graph(COMPONENT_EDGES).component_of('ZZZ')
+
+
+def test_pagerank_matches_power_iteration(make_graph):
+    edges = COMPONENT_EDGES + [('A', 'C'), ('E', 'A')]
+    graph = make_graph(edges)
+
+    rank = graph.pagerank()
+
+    assert rank.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(rank, reference_pagerank(graph), atol=1e-8)
+    # Nothing flies to E; it only keeps the teleport share
+    assert rank[graph.index['E']] == pytest.approx((1 - 0.85) / 5 + 0.85 * rank[graph.index['D']] / 5)
+
+
+def test_pagerank_of_a_cycle_is_uniform(make_graph):
+    graph = make_graph([('A', 'B'), ('B', 'C'), ('C', 'A')])
+
+    np.testing.assert_allclose(graph.pagerank(), [1 / 3] * 3)
+
+
+def test_pagerank_counts_each_airline_route(make_graph):
+    single = make_graph([('A', 'B'), ('A', 'C'), ('B', 'A'), ('C', 'A')])
+    doubled = make_graph([('A', 'B', 100.0, 'LA'), ('A', 'B', 100.0, 'G3'), ('A', 'C'), ('B', 'A'), ('C', 'A')])
+
+    assert single.pagerank()[single.index['B']] == pytest.approx(single.pagerank()[single.index['C']])
+    assert doubled.pagerank()[doubled.index['B']] > doubled.pagerank()[doubled.index['C']]
+
+
+def test_pagerank_of_an_empty_graph(make_graph):
+    assert len(make_graph([], codes=[]).pagerank()) == 0
+
+
+def test_betweenness_on_a_directed_path(make_graph):
+    graph = make_graph([('A', 'B'), ('B', 'C'), ('C', 'D')])
+
+    # B lies on A->C and A->D, C on A->D and B->D
+    assert by_code(graph, graph.approximate_betweenness()) == {'A': 0.0, 'B': 2.0, 'C': 2.0, 'D': 0.0}
+
+
+def test_betweenness_splits_between_equal_paths(make_graph):
+    graph = make_graph([('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('A', 'A')])
+
+    assert by_code(graph, graph.approximate_betweenness()) == {'A': 0.0, 'B': 0.5, 'C': 0.5, 'D': 0.0}
+
+
+def test_betweenness_counts_parallel_routes_once(make_graph):
+    single = make_graph([('A', 'B'), ('B', 'C')])
+    parallel = make_graph([('A', 'B', 100.0, 'LA'), ('A', 'B', 100.0, 'G3'),
+                          ('B', 'C', 100.0, 'LA'), ('B', 'C', 100.0, 'AD')])
+
+    np.testing.assert_allclose(parallel.approximate_betweenness(), single.approximate_betweenness())
+
+
+def test_betweenness_sampling_is_seeded_and_scaled(make_graph):
+    # Star: every path between two spokes goes through the hub
+    spokes = [f'S{i:02d}' for i in range(20)]
+    edges = [(spoke, 'HUB') for spoke in spokes] + [('HUB', spoke) for spoke in spokes]
+    graph = make_graph(edges)
+    exact = graph.approximate_betweenness()
+
+    sampled = graph.approximate_betweenness(samples=10, seed=3)
+
+    assert exact[graph.index['HUB']] == 20 * 19
+    np.testing.assert_array_equal(sampled, graph.approximate_betweenness(samples=10, seed=3))
+    # Sampled spokes each add 19 pairs through the hub; a sampled hub adds none
+    assert 0 < sampled[graph.index['HUB']] <= exact[graph.index['HUB']] * 21 / 10
+    assert sampled[graph.index['S00']] == 0.0
+
+
+def test_betweenness_without_routes(make_graph):
+    graph = make_graph([], codes=['A', 'B'])
+
+    np.testing.assert_array_equal(graph.approximate_betweenness(), [0.0, 0.0])
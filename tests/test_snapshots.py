@@ -0,0 +1,60 @@
+import asyncio
+
+from snapshots import SnapshotStore
+
+
+class Built:
+    def __init__(self, number):
+        self.number = number
+
+    def summary(self):
+        return {'version': self.number}
+
+
+def test_requests_during_a_build_are_coalesced():
+    async def scenario():
+        builds = []
+        release = asyncio.Event()
+
+        async def loader():
+            builds.append(len(builds) + 1)
+            await release.wait()
+            return Built(builds[-1])
+
+        store = SnapshotStore('test snapshot', loader, lambda built: f"build {built.number}")
+        assert store.snapshot() == {'version': None, 'building': False, 'error': None}
+        store.schedule()
+        await asyncio.sleep(0)
+        # Three more seeds finish while the first build runs: one more build covers them
+        for _ in range(3):
+            store.schedule()
+        assert store.building
+        release.set()
+        await store._task
+        return store, builds
+
+    store, builds = asyncio.run(scenario())
+    assert builds == [1, 2]
+    assert store.current.number == 2
+    assert store.snapshot() == {'version': 2, 'building': False, 'error': None}
+
+
+def test_failed_build_keeps_the_previous_snapshot():
+    async def scenario():
+        results = [Built(1), RuntimeError('database down')]
+
+        async def loader():
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        store = SnapshotStore('test snapshot', loader, lambda built: "")
+        for _ in range(2):
+            store.schedule()
+            await store._task
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.current.number == 1
+    assert store.snapshot() == {'version': 1, 'building': False, 'error': 'database down'}